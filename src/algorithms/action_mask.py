@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def resolve_action_mask(env, mask_actions):
+    """
+    Máscara (s, a) de ações válidas a usar num algoritmo.
+
+    Args:
+        env: Ambiente (APIEnv), que expõe env.action_mask.
+        mask_actions: True para usar a máscara do ambiente, False para considerar todas as
+            ações, ou um array (s, a) com uma máscara própria.
+
+    Returns:
+        O array (s, a) de booleanos, ou None quando o mascaramento está desligado.
+    """
+    if mask_actions is False or mask_actions is None:
+        return None
+    if mask_actions is True:
+        return env.action_mask
+    return np.asarray(mask_actions, dtype=bool)
+
+
+def masked_argmax(values, mask=None):
+    """argmax no último eixo considerando apenas as ações válidas."""
+    if mask is None:
+        return np.argmax(values, axis=-1)
+    return np.argmax(np.where(mask, values, -np.inf), axis=-1)
+
+
+def masked_max(values, mask=None):
+    """max no último eixo considerando apenas as ações válidas."""
+    if mask is None:
+        return np.max(values, axis=-1)
+    return np.max(np.where(mask, values, -np.inf), axis=-1)
+
+
+def random_action(num_actions, mask=None):
+    """Ação uniforme entre as válidas (todas, se mask for None)."""
+    if mask is None:
+        return np.random.randint(num_actions)
+    return np.random.choice(np.flatnonzero(mask))
+
+
+def epsilon_greedy_probabilities(values, epsilon, mask=None):
+    """
+    Probabilidades da política epsilon-greedy sobre as ações válidas: epsilon é dividido entre
+    as ações válidas e o restante vai para a melhor delas. Ações mascaradas têm probabilidade 0.
+    """
+    valid = np.ones(len(values), dtype=bool) if mask is None else mask
+    probabilities = valid * (epsilon / np.count_nonzero(valid))
+    probabilities[masked_argmax(values, mask)] += 1.0 - epsilon
+    return probabilities
@@ -0,0 +1,125 @@
+import os
+import random
+import tempfile
+from collections import defaultdict
+
+import numpy as np
+
+
+def save_checkpoint(path, algorithm, **arrays):
+    """
+    Grava um checkpoint binário (.npz sem compressão) de forma atômica.
+
+    O arquivo é escrito primeiro em um temporário no mesmo diretório e depois
+    renomeado com os.replace, de modo que uma queda durante a escrita nunca deixa
+    um checkpoint corrompido no lugar do anterior. O estado dos geradores
+    aleatórios (numpy e random) é salvo junto para que a retomada seja determinística.
+
+    Args:
+        path: Caminho do arquivo de checkpoint.
+        algorithm: Nome do algoritmo que gerou o checkpoint (validado ao carregar).
+        **arrays: Arrays (ou escalares) a serem armazenados.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, algorithm=np.array(algorithm), **_get_rng_state(), **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(path, algorithm):
+    """
+    Carrega um checkpoint salvo com save_checkpoint e restaura o estado dos geradores aleatórios.
+
+    Args:
+        path: Caminho do arquivo de checkpoint (ou None).
+        algorithm: Nome do algoritmo esperado no checkpoint.
+
+    Returns:
+        Um dicionário com os arrays salvos, ou None se não houver checkpoint.
+    """
+    if path is None or not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        checkpoint = {key: data[key] for key in data.files}
+
+    if str(checkpoint["algorithm"]) != algorithm:
+        raise ValueError(
+            f"Checkpoint {path} pertence ao algoritmo '{checkpoint['algorithm']}', não a '{algorithm}'."
+        )
+
+    _set_rng_state(checkpoint)
+    return checkpoint
+
+
+def should_checkpoint(checkpoint_path, episode, checkpoint_every):
+    """
+    Indica se um checkpoint deve ser gravado ao final do episódio (contado a partir de 1).
+    """
+    return checkpoint_path is not None and episode % checkpoint_every == 0
+
+
+def table_to_arrays(table):
+    """
+    Converte um dicionário (ex.: Q ou returns_sum) em arrays de chaves e valores,
+    preservando a ordem de inserção.
+    """
+    keys = np.array(list(table.keys()))
+    values = np.array(list(table.values()), dtype=float)
+    return keys, values
+
+
+def arrays_to_table(keys, values, default_factory):
+    """
+    Reconstrói um defaultdict a partir dos arrays gerados por table_to_arrays.
+    """
+    table = defaultdict(default_factory)
+    for key, value in zip(keys, values):
+        key = tuple(key.tolist()) if np.ndim(key) else key.item()
+        table[key] = value.copy() if np.ndim(value) else value.item()
+    return table
+
+
+def _get_rng_state():
+    _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+    version, internal_state, gauss_next = random.getstate()
+
+    return {
+        "np_rng_keys": keys,
+        "np_rng_pos": np.array(pos),
+        "np_rng_has_gauss": np.array(has_gauss),
+        "np_rng_cached_gaussian": np.array(cached_gaussian),
+        "py_rng_version": np.array(version),
+        "py_rng_state": np.array(internal_state, dtype=np.uint64),
+        "py_rng_gauss_next": np.array(np.nan if gauss_next is None else gauss_next),
+    }
+
+
+def _set_rng_state(checkpoint):
+    np.random.set_state(
+        (
+            "MT19937",
+            checkpoint["np_rng_keys"],
+            int(checkpoint["np_rng_pos"]),
+            int(checkpoint["np_rng_has_gauss"]),
+            float(checkpoint["np_rng_cached_gaussian"]),
+        )
+    )
+
+    gauss_next = float(checkpoint["py_rng_gauss_next"])
+    random.setstate(
+        (
+            int(checkpoint["py_rng_version"]),
+            tuple(int(x) for x in checkpoint["py_rng_state"]),
+            None if np.isnan(gauss_next) else gauss_next,
+        )
+    )
@@ -0,0 +1,175 @@
+import functools
+
+import numpy as np
+
+from src.state_transitions.model import TransitionModel
+
+# Acima deste número de estados, a avaliação usa varreduras em vez de solução linear densa
+DENSE_SOLVE_MAX_STATES = 2000
+
+# Memória máxima, em bytes, dos arrays intermediários de cada bloco de políticas avaliado junto
+CHUNK_BYTES = 64 * 2**20
+
+
+def stack_policies(policies, num_states, num_actions):
+    """
+    Empilha políticas em formatos variados num único array (k, s, a).
+
+    Aceita um array (k, s, a), um array (k, s) de índices de ação, ou uma lista cujos elementos
+    são matrizes (s, a), vetores (s,) de ações ou dicionários {estado: probabilidades} (como os
+    devolvidos por SARSA e Monte Carlo; estados ausentes recebem política uniforme).
+    """
+    if isinstance(policies, np.ndarray):
+        if policies.ndim == 3:
+            return policies.astype(float, copy=False)
+        if policies.ndim == 2 and np.issubdtype(policies.dtype, np.integer):
+            return np.eye(num_actions)[policies]
+        raise ValueError(f"Array de políticas com forma inválida: {policies.shape}.")
+
+    stacked = np.full((len(policies), num_states, num_actions), 1.0 / num_actions)
+    for i, policy in enumerate(policies):
+        if isinstance(policy, dict):
+            for state, probabilities in policy.items():
+                stacked[i, state] = probabilities
+        else:
+            policy = np.asarray(policy)
+            stacked[i] = np.eye(num_actions)[policy] if policy.ndim == 1 else policy
+    return stacked
+
+
+def policy_matrices(model, policies):
+    """
+    Matrizes de transição e recompensas esperadas de cada política.
+
+    Args:
+        model: TransitionModel.
+        policies: Array (k, s, a).
+
+    Returns:
+        P: Array (k, s, s') com P_π(s' | s).
+        r: Array (k, s) com a recompensa esperada de um passo sob cada política.
+    """
+    num_policies = policies.shape[0]
+    expected_rewards = np.sum(model.probabilities * model.rewards(), axis=-1)
+
+    P = np.zeros((num_policies, model.num_states, model.num_states))
+    # Índices por broadcast (sem materializar np.indices); só o operando (k, s, a, j) é alocado
+    rows = (np.arange(num_policies)[:, None, None, None], np.arange(model.num_states)[None, :, None, None])
+    np.add.at(P, rows + (model.next_states[None],), policies[..., None] * model.probabilities[None])
+    r = np.sum(policies * expected_rewards, axis=-1)
+    return P, r
+
+
+def evaluate_policies(env, policies, discount_factor=0.9, theta=0.000001, method="auto", chunk_bytes=CHUNK_BYTES):
+    """
+    Avalia k políticas de uma vez sobre o mesmo modelo de transição.
+
+    As políticas são avaliadas em blocos, com o tamanho do bloco escolhido para que os arrays
+    intermediários (as matrizes densas (s, s') de "solve" ou os valores (s, a, k) de "sweeps")
+    ocupem no máximo 'chunk_bytes'; a memória não cresce com o número de políticas.
+
+    Args:
+        env: Ambiente (APIEnv) ou TransitionModel.
+        policies: Políticas em qualquer formato aceito por stack_policies.
+        discount_factor: Fator de desconto.
+        theta: Critério de parada das varreduras (ignorado na solução linear).
+        method: "solve" (k sistemas (I - γ P_π) V = r_π resolvidos juntos), "sweeps" (varreduras
+            de Bellman em lote sobre as tabelas de sucessores, sem matrizes densas) ou "auto"
+            (solve até DENSE_SOLVE_MAX_STATES estados).
+        chunk_bytes: Memória máxima dos intermediários de cada bloco (pelo menos uma política por bloco).
+
+    Returns:
+        Array (k, s) com a função de valor de cada política.
+    """
+    model = env if isinstance(env, TransitionModel) else TransitionModel.from_env(env)
+    policies = stack_policies(policies, model.num_states, model.num_actions)
+
+    if method == "auto":
+        method = "solve" if model.num_states <= DENSE_SOLVE_MAX_STATES else "sweeps"
+
+    if method == "solve":
+        # Por política: P_π e a matriz do sistema, ambas (s, s'), e o operando (s, a, j) do np.add.at
+        policy_bytes = (2 * model.num_states**2 + model.next_states.size) * 8
+        evaluate = functools.partial(_solve, model, discount_factor)
+    elif method == "sweeps":
+        # Por política: os sucessores e os termos (s, a, k) de cada varredura
+        policy_bytes = 2 * model.next_states.size * 8
+        evaluate = functools.partial(_sweeps, model, model.rewards(), discount_factor, theta)
+    else:
+        raise ValueError(f"method deve ser 'auto', 'solve' ou 'sweeps', recebido '{method}'.")
+
+    chunk = max(1, chunk_bytes // policy_bytes)
+    V = np.zeros(policies.shape[:2])
+    for i in range(0, len(policies), chunk):
+        V[i : i + chunk] = evaluate(policies[i : i + chunk])
+    return V
+
+
+def _solve(model, discount_factor, policies):
+    """Resolve (I - γ P_π) V = r_π para um bloco de políticas."""
+    P, r = policy_matrices(model, policies)
+    return np.linalg.solve(np.eye(model.num_states) - discount_factor * P, r[..., None])[..., 0]
+
+
+def _sweeps(model, rewards, discount_factor, theta, policies):
+    """Varreduras de Bellman em lote para um bloco de políticas, sobre as tabelas de sucessores."""
+    V = np.zeros(policies.shape[:2])
+    while True:
+        # Q (k, s, a) de todas as políticas do bloco numa única operação
+        Q = np.sum(model.probabilities * (rewards + discount_factor * V[:, model.next_states]), axis=-1)
+        V_new = np.sum(policies * Q, axis=-1)
+        if np.max(np.abs(V_new - V)) < theta:
+            return V_new
+        V = V_new
+
+
+def compare_policies(env, policies, names=None, discount_factor=0.9, start_state="Offline_Slow_Error_Medium"):
+    """
+    Avalia k políticas em lote e monta uma tabela comparativa, ordenada pelo valor no estado inicial.
+
+    Args:
+        env: Ambiente (APIEnv).
+        policies: Políticas em qualquer formato aceito por stack_policies (ou um dicionário nome -> política).
+        names: Nomes das políticas (padrão: índices ou as chaves do dicionário).
+        discount_factor: Fator de desconto.
+        start_state: Estado usado para o ranking (padrão: o estado de APIEnv.reset()).
+
+    Returns:
+        Uma lista de dicionários (uma linha por política) com o valor no estado inicial, a média,
+        o mínimo e o máximo de V, a diferença para a melhor política e a fração de estados em
+        que a política é a melhor (a menos de 1e-6).
+    """
+    if isinstance(policies, dict):
+        names = list(policies) if names is None else names
+        policies = list(policies.values())
+
+    V = evaluate_policies(env, policies, discount_factor)
+    names = [str(i) for i in range(len(V))] if names is None else list(names)
+    start = env.states.index(start_state)
+    best = V.max(axis=0)
+
+    rows = [
+        {
+            "name": name,
+            "start_value": float(values[start]),
+            "mean_value": float(values.mean()),
+            "min_value": float(values.min()),
+            "max_value": float(values.max()),
+            "regret_at_start": float(best[start] - values[start]),
+            "best_state_fraction": float(np.mean(values >= best - 1e-6)),
+        }
+        for name, values in zip(names, V)
+    ]
+    return sorted(rows, key=lambda row: -row["start_value"])
+
+
+def format_comparison(rows):
+    """Formata a tabela de compare_policies como texto."""
+    header = f"{'policy':<24}{'V(start)':>12}{'mean V':>12}{'min V':>12}{'regret':>10}{'best %':>9}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['name']:<24}{row['start_value']:>12.2f}{row['mean_value']:>12.2f}{row['min_value']:>12.2f}"
+            f"{row['regret_at_start']:>10.2f}{100 * row['best_state_fraction']:>8.1f}%"
+        )
+    return "\n".join(lines)
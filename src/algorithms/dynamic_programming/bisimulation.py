@@ -0,0 +1,182 @@
+import numpy as np
+from gymnasium import spaces
+
+from src.algorithms.dynamic_programming.value_iteration import value_iteration
+from src.state_transitions.model import TransitionModel
+
+
+class QuotientEnv:
+    """
+    MDP quociente de uma partição de bisimulação, com a mesma interface usada pelos solvers
+    (states, actions, states_rewards, action_rewards, transition_probabilities, action_mask e as
+    tabelas de sucessores), de modo que qualquer solver existente possa resolvê-lo.
+
+    Cada bloco herda as transições de um estado representante, com os sucessores trocados pelos
+    seus blocos; pela bisimulação, qualquer outro estado do bloco daria o mesmo modelo.
+    """
+
+    def __init__(self, env, blocks):
+        """
+        Args:
+            env: Ambiente original (APIEnv).
+            blocks: Array (s,) com o bloco de cada estado (ver bisimulation_partition).
+        """
+        num_blocks = int(blocks.max()) + 1
+        representatives = np.array([np.flatnonzero(blocks == b)[0] for b in range(num_blocks)])
+
+        # Cada bloco é nomeado pelos estados que contém
+        self.states = ["|".join(np.array(env.states)[blocks == b]) for b in range(num_blocks)]
+        self.state_space = num_blocks
+        self.actions = list(env.actions)
+        self.action_space = spaces.Discrete(len(self.actions))
+
+        self.states_rewards = {
+            state: env.states_rewards.get(env.states[s], 0) for state, s in zip(self.states, representatives)
+        }
+        self.action_rewards = dict(env.action_rewards)
+        self.terminal_states = [
+            state
+            for state, s in zip(self.states, representatives)
+            if env.states[s] in getattr(env, "terminal_states", ())
+        ]
+
+        # Ações válidas de cada bloco: as do seu representante
+        self.action_mask = np.asarray(env.action_mask)[representatives]
+
+        self.next_state_indices = blocks[env.next_state_indices[representatives]]
+        self.next_state_probabilities = np.array(env.next_state_probabilities[representatives], dtype=float)
+        self.transition_probabilities = {
+            (state, action): [
+                (self.states[next_state], prob)
+                for next_state, prob in zip(
+                    self.next_state_indices[b, a].tolist(), self.next_state_probabilities[b, a].tolist()
+                )
+            ]
+            for b, state in enumerate(self.states)
+            for a, action in enumerate(self.actions)
+        }
+
+
+def bisimulation_partition(model, labels=None, probability_tolerance=0.0, reward_tolerance=0.0):
+    """
+    Partição de bisimulação mais grossa por refinamento sucessivo.
+
+    Dois estados ficam no mesmo bloco quando têm a mesma recompensa de chegada (e o mesmo
+    rótulo) e, para cada ação, a mesma massa de probabilidade indo para cada bloco. Como a
+    recompensa deste ambiente depende apenas do estado de destino e da ação, o quociente
+    preserva exatamente os valores e as políticas ótimas.
+
+    A cada rodada, as massas são agregadas diretamente sobre os k sucessores de cada par
+    (s, a), e a assinatura de cada estado (seu bloco atual e as entradas (ação, bloco, massa)
+    não nulas) é comparada por hash num dicionário: o custo é O(s * a * k) por rodada, sem o
+    array denso (s, a, blocos).
+
+    Com tolerâncias > 0, recompensas e massas são discretizadas em intervalos desse tamanho
+    antes da comparação (bisimulação ε-aproximada): o quociente fica menor, e o erro nos
+    valores cresce com as tolerâncias.
+
+    Args:
+        model: TransitionModel (sem transition_rewards).
+        labels: Array (s,) opcional de rótulos que não podem ser misturados (ex.: terminal ou não).
+        probability_tolerance: Tolerância nas massas de probabilidade (0 = exata).
+        reward_tolerance: Tolerância nas recompensas de chegada (0 = exata).
+
+    Returns:
+        blocks: Array (s,) com o bloco de cada estado, numerados de 0 a num_blocks - 1.
+        iterations: Número de rodadas de refinamento.
+    """
+    if model.transition_rewards is not None:
+        raise ValueError("A partição usa as recompensas de chegada; modelos com transition_rewards não são suportados.")
+
+    labels = np.zeros(model.num_states) if labels is None else np.asarray(labels)
+    initial = np.column_stack([labels, _discretize(model.state_rewards, reward_tolerance)])
+    blocks = np.unique(initial, axis=0, return_inverse=True)[1].ravel()
+
+    # Par (s, a) de cada entrada das tabelas de sucessores achatadas
+    pairs = np.repeat(np.arange(model.num_states * model.num_actions), model.next_states.shape[-1])
+    probabilities = model.probabilities.ravel()
+
+    iterations = 0
+    while True:
+        iterations += 1
+        num_blocks = int(blocks.max()) + 1
+
+        # Massa de probabilidade de cada par (s, a) indo para cada bloco, só nas entradas existentes
+        keys = pairs * num_blocks + blocks[model.next_states.ravel()]
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.append(True, keys[1:] != keys[:-1]))
+        keys = keys[starts]
+        mass = _discretize(np.add.reduceat(probabilities[order], starts), probability_tolerance)
+
+        # Entradas sem massa não distinguem estados (equivalem aos zeros do array denso)
+        nonzero = mass != 0
+        keys, mass = keys[nonzero], mass[nonzero]
+        states = keys // (model.num_actions * num_blocks)
+        entries = np.column_stack([keys % (model.num_actions * num_blocks), mass.astype(float)])
+        bounds = np.searchsorted(states, np.arange(model.num_states + 1))
+
+        # Assinatura de cada estado: bloco atual + entradas (ação, bloco, massa), em ordem
+        ids = {}
+        refined = np.empty(model.num_states, dtype=np.int64)
+        for state in range(model.num_states):
+            signature = (int(blocks[state]), entries[bounds[state] : bounds[state + 1]].tobytes())
+            refined[state] = ids.setdefault(signature, len(ids))
+
+        if len(ids) == num_blocks:
+            return refined, iterations
+        blocks = refined
+
+
+def lift_policy(policy, blocks):
+    """Leva uma política (ou função de valor) do quociente de volta aos estados originais."""
+    return np.asarray(policy)[blocks]
+
+
+def minimize_and_solve(
+    env,
+    solver=value_iteration,
+    probability_tolerance=0.0,
+    reward_tolerance=0.0,
+    **solver_params,
+):
+    """
+    Reduz o ambiente ao quociente de bisimulação, resolve o quociente e eleva a política.
+
+    Args:
+        env: Ambiente (APIEnv).
+        solver: Qualquer solver com a convenção (env, ...) -> (policy, V, rewards), ex.:
+            value_iteration ou policy_improvement.
+        probability_tolerance: Tolerância nas massas de probabilidade (0 = bisimulação exata).
+        reward_tolerance: Tolerância nas recompensas de chegada (0 = exata).
+        **solver_params: Parâmetros repassados ao solver (ex.: discount_factor).
+
+    Returns:
+        policy: Matriz (s, a) da política sobre os estados originais.
+        V: Função de valor sobre os estados originais.
+        report: Dicionário com os blocos, o número de estados antes e depois, as rodadas de
+            refinamento, o quociente e o terceiro retorno do solver.
+    """
+    model = TransitionModel.from_env(env)
+    terminal = np.isin(env.states, getattr(env, "terminal_states", []))
+    blocks, iterations = bisimulation_partition(model, terminal, probability_tolerance, reward_tolerance)
+
+    quotient = QuotientEnv(env, blocks)
+    policy, V, rewards = solver(quotient, **solver_params)
+
+    report = {
+        "blocks": blocks,
+        "num_states": model.num_states,
+        "num_blocks": quotient.state_space,
+        "iterations": iterations,
+        "quotient": quotient,
+        "solver_rewards": rewards,
+    }
+    return lift_policy(policy, blocks), lift_policy(V, blocks), report
+
+
+def _discretize(values, tolerance):
+    # Na comparação exata, arredonda para absorver erros de soma em ponto flutuante
+    if tolerance == 0:
+        return np.round(values, 9)
+    return np.floor(values / tolerance)
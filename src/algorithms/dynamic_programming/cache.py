@@ -0,0 +1,286 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.algorithms.dynamic_programming.policy_evaluation import policy_improvement
+from src.algorithms.dynamic_programming.value_iteration import value_iteration
+from src.state_transitions.model import TransitionModel
+
+# Solvers suportados: nome -> (função, argumento usado para warm start)
+SOLVERS = {
+    "value_iteration": (value_iteration, "V"),
+    "policy_improvement": (policy_improvement, "policy"),
+}
+
+
+class SolveCache:
+    """
+    Cache de soluções de DP: LRU em memória com um armazenamento opcional em disco.
+
+    Cada entrada guarda (policy, V, rewards, metadata) e é identificada pelo fingerprint
+    do modelo compilado, pelo nome do solver e pelos seus parâmetros. No disco, cada entrada
+    é um arquivo .npz; quando o diretório passa de 'max_disk_bytes', as entradas acessadas
+    há mais tempo são removidas.
+    """
+
+    def __init__(self, directory=None, max_entries=32, max_disk_bytes=256 * 2**20):
+        """
+        Args:
+            directory: Diretório do armazenamento em disco (None para usar apenas memória).
+            max_entries: Número máximo de entradas mantidas em memória.
+            max_disk_bytes: Tamanho máximo, em bytes, das entradas em disco.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.entries = OrderedDict()
+
+        # Metadados (solver, forma, fingerprint) por chave, para o warm start escolher o candidato
+        # sem carregar os arrays; das entradas em disco, só o membro metadata do .npz é lido
+        self.__metadata = {}
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(fingerprint, solver, params):
+        """Chave da entrada; arrays nos parâmetros (ex.: uma máscara própria) entram pelo hash do conteúdo."""
+        description = json.dumps(
+            {"model": fingerprint, "solver": solver, "params": params}, sort_keys=True, default=_describe
+        )
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def get(self, key):
+        """Devolve a entrada (memória ou disco) ou None. Entradas lidas do disco voltam para a memória."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key], "memory"
+
+        path = self.__path(key)
+        if path is None or not os.path.exists(path):
+            return None, None
+
+        entry = _load_entry(path)
+        os.utime(path)  # Marca o acesso para a política de remoção do disco
+        self.__remember(key, entry)
+        return entry, "disk"
+
+    def put(self, key, entry):
+        self.__remember(key, entry)
+
+        path = self.__path(key)
+        if path is not None:
+            _save_entry(path, entry)
+            self.__evict_disk()
+
+    def warm_start(self, fingerprint, solver, shape):
+        """
+        Procura a solução mais próxima já calculada pelo mesmo solver: primeiro para o mesmo
+        modelo (ex.: outro discount_factor/theta) e depois para qualquer modelo de mesma forma.
+
+        Returns:
+            Tupla (chave, entrada) ou (None, None).
+        """
+        candidates = list(reversed(self.entries))
+        candidates += [key for key in self.__disk_keys() if key not in self.entries]
+
+        # Descarta metadados de entradas que já saíram da memória e do disco
+        self.__metadata = {key: self.__metadata[key] for key in candidates if key in self.__metadata}
+
+        chosen = None
+        for key in candidates:
+            metadata = self.__metadata.get(key)
+            if metadata is None:
+                try:
+                    metadata = self.__metadata[key] = _load_metadata(self.__path(key))
+                except FileNotFoundError:
+                    continue
+            if metadata["solver"] != solver or tuple(metadata["shape"]) != tuple(shape):
+                continue
+            if metadata["fingerprint"] == fingerprint:
+                chosen = key
+                break
+            if chosen is None:
+                chosen = key
+
+        if chosen is None:
+            return None, None
+        if chosen in self.entries:
+            return chosen, self.entries[chosen]
+        return chosen, _load_entry(self.__path(chosen))
+
+    def clear(self):
+        self.entries.clear()
+        self.__metadata.clear()
+        for key in self.__disk_keys():
+            os.remove(self.__path(key))
+
+    def __remember(self, key, entry):
+        self.__metadata[key] = entry["metadata"]
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __path(self, key):
+        return None if self.directory is None else os.path.join(self.directory, f"{key}.npz")
+
+    def __disk_keys(self):
+        if self.directory is None:
+            return []
+        return [name[:-4] for name in os.listdir(self.directory) if name.endswith(".npz")]
+
+    def __evict_disk(self):
+        files = []
+        for key in self.__disk_keys():
+            stat = os.stat(self.__path(key))
+            files.append((stat.st_mtime, stat.st_size, key))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, key in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(self.__path(key))
+            total -= size
+
+
+default_cache = SolveCache()
+
+
+def cached_solve(env, solver="value_iteration", cache=None, warm_start=True, **params):
+    """
+    Resolve o ambiente com um solver de DP reaproveitando soluções anteriores.
+
+    Uma configuração idêntica (mesmo modelo compilado, solver e parâmetros) devolve uma cópia da
+    solução guardada sem recalcular; alterar os arrays devolvidos não afeta o cache. Caso
+    contrário, se 'warm_start' for True, o solver parte da solução mais próxima no cache (V para
+    value_iteration, a política para policy_improvement).
+
+    Args:
+        env: Ambiente (APIEnv).
+        solver: "value_iteration" ou "policy_improvement".
+        cache: SolveCache a ser usado (padrão: cache em memória do módulo).
+        warm_start: Se True, usa a solução mais próxima do cache como ponto de partida.
+        **params: Parâmetros do solver (ex.: discount_factor, theta).
+
+    Returns:
+        policy: A política encontrada.
+        V: A função de valor.
+        metadata: Dicionário com os parâmetros, o fingerprint do modelo, o tempo de solução,
+            as recompensas por iteração ('rewards') e a origem do resultado ('cache_hit').
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Solver desconhecido '{solver}'. Opções: {sorted(SOLVERS)}")
+
+    cache = default_cache if cache is None else cache
+    function, warm_start_arg = SOLVERS[solver]
+    params = _canonical_params(function, params, exclude=("env", warm_start_arg))
+
+    model = TransitionModel.from_env(env)
+    fingerprint = model.fingerprint()
+    key = cache.key(fingerprint, solver, params)
+
+    entry, source = cache.get(key)
+    if entry is not None:
+        metadata = {**entry["metadata"], "rewards": entry["rewards"].copy(), "cache_hit": source}
+        return entry["policy"].copy(), entry["V"].copy(), metadata
+
+    warm_key, warm_entry = (None, None)
+    if warm_start:
+        warm_key, warm_entry = cache.warm_start(fingerprint, solver, (model.num_states, model.num_actions))
+
+    initial = {}
+    if warm_entry is not None:
+        initial[warm_start_arg] = (warm_entry["V"] if warm_start_arg == "V" else warm_entry["policy"]).copy()
+
+    start = time.perf_counter()
+    policy, V, rewards = function(env, **params, **initial)[:3]
+    elapsed = time.perf_counter() - start
+
+    metadata = {
+        "solver": solver,
+        "params": params,
+        "fingerprint": fingerprint,
+        "shape": [model.num_states, model.num_actions],
+        "elapsed_seconds": elapsed,
+        "iterations": len(rewards),
+        "warm_start_from": warm_key,
+        "created": time.time(),
+    }
+    rewards = np.asarray(rewards, dtype=float)
+    entry = {"policy": policy.copy(), "V": V.copy(), "rewards": rewards.copy(), "metadata": metadata}
+    cache.put(key, entry)
+
+    return policy, V, {**metadata, "rewards": rewards, "cache_hit": None}
+
+
+def _canonical_params(function, params, exclude):
+    """Completa os parâmetros com os valores padrão do solver, para que chamadas equivalentes tenham a mesma chave."""
+    signature = inspect.signature(function)
+    unknown = set(params) - set(signature.parameters) | set(params) & set(exclude)
+    if unknown:
+        raise TypeError(f"Parâmetros inválidos para {function.__name__}: {sorted(unknown)}")
+
+    bound = signature.bind_partial(**params)
+    bound.apply_defaults()
+    return {name: value for name, value in bound.arguments.items() if name not in exclude}
+
+
+def _save_entry(path, entry):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                policy=entry["policy"],
+                V=entry["V"],
+                rewards=entry["rewards"],
+                metadata=np.array(json.dumps(entry["metadata"], default=_describe)),
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _load_metadata(path):
+    """Lê apenas os metadados de uma entrada em disco (os membros do .npz são carregados sob demanda)."""
+    with np.load(path) as data:
+        return json.loads(str(data["metadata"]))
+
+
+def _load_entry(path):
+    with np.load(path) as data:
+        return {
+            "policy": data["policy"],
+            "V": data["V"],
+            "rewards": data["rewards"],
+            "metadata": json.loads(str(data["metadata"])),
+        }
+
+
+def _describe(value):
+    """
+    Representação JSON de valores não serializáveis. Arrays são descritos pelo dtype, pela forma
+    e pelo hash do conteúdo, pois o repr abrevia arrays grandes (arrays diferentes teriam a
+    mesma descrição).
+    """
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        return {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "sha256": hashlib.sha256(array.tobytes()).hexdigest(),
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
@@ -0,0 +1,109 @@
+import numpy as np
+
+from src.dtypes import resolve_dtypes
+from src.state_transitions.model import TransitionModel
+
+
+def backward_induction(
+    env,
+    horizon,
+    discount_factor=1.0,
+    state_rewards=None,
+    action_penalties=None,
+    terminal_values=None,
+    dtypes=None,
+):
+    """
+    Indução reversa para horizonte finito: exatamente 'horizon' backups vetorizados, do último
+    passo para o primeiro, produzindo valores e políticas indexados pelo tempo.
+
+    Args:
+        env: Ambiente (APIEnv) ou TransitionModel.
+        horizon: Número de decisões H (ex.: passos de uma janela de manutenção).
+        discount_factor: Fator de desconto (1.0 = soma simples das recompensas da janela).
+        state_rewards: Cronograma opcional de recompensas de estado, array (H, s); a linha t
+            substitui as recompensas de chegada usadas na decisão do passo t.
+        action_penalties: Cronograma opcional de penalidades, array (H, a), análogo.
+        terminal_values: Array (s,) com o valor de terminar a janela em cada estado (padrão: zeros).
+        dtypes: DTypePolicy (ou "compact") para os valores e os índices de ação.
+
+    Returns:
+        actions: Array (H, s) com a ação ótima de cada estado em cada passo (ver compress_schedule).
+        V: Array (H + 1, s); V[t] é o valor ótimo com H - t decisões restantes e V[H] = terminal_values.
+        report: Dicionário com o número de backups e o número de passos iniciais em que a
+            política é igual à do passo 0 ("stationary_steps"); a partir daí a proximidade do fim
+            da janela muda as decisões.
+    """
+    model = env if isinstance(env, TransitionModel) else TransitionModel.from_env(env)
+    dtypes = resolve_dtypes(dtypes)
+    if horizon < 1:
+        raise ValueError(f"horizon deve ser pelo menos 1, recebido {horizon}.")
+
+    for name, schedule, size in (
+        ("state_rewards", state_rewards, model.num_states),
+        ("action_penalties", action_penalties, model.num_actions),
+    ):
+        if schedule is not None and np.shape(schedule) != (horizon, size):
+            raise ValueError(f"{name} deve ter forma {(horizon, size)}, recebido {np.shape(schedule)}.")
+
+    if state_rewards is None and action_penalties is None:
+        fixed_rewards = model.rewards()
+    elif model.transition_rewards is not None:
+        raise ValueError("Cronogramas de recompensa não se aplicam a modelos com transition_rewards.")
+
+    V = np.zeros((horizon + 1, model.num_states), dtype=dtypes.values)
+    if terminal_values is not None:
+        V[horizon] = terminal_values
+    actions = np.zeros((horizon, model.num_states), dtype=dtypes.actions)
+
+    for t in range(horizon - 1, -1, -1):
+        if state_rewards is None and action_penalties is None:
+            rewards = fixed_rewards
+        else:
+            step_states = model.state_rewards if state_rewards is None else np.asarray(state_rewards[t])
+            step_actions = model.action_penalties if action_penalties is None else np.asarray(action_penalties[t])
+            rewards = step_states[model.next_states] + step_actions[None, :, None]
+
+        Q = np.sum(model.probabilities * (rewards + discount_factor * V[t + 1][model.next_states]), axis=-1)
+        actions[t] = np.argmax(Q, axis=1)
+        V[t] = Q[np.arange(model.num_states), actions[t]]
+
+    changed = np.flatnonzero(np.any(actions != actions[0], axis=1))
+    report = {
+        "backups": horizon,
+        "stationary_steps": int(changed[0]) if changed.size else horizon,
+    }
+    return actions, V, report
+
+
+def compress_schedule(actions):
+    """
+    Forma compacta da tabela (H, s): linhas iguais consecutivas são guardadas uma única vez.
+
+    Longe do fim da janela a política ótima costuma ser estacionária, então a tabela se reduz a
+    poucos blocos.
+
+    Returns:
+        Um dicionário com "starts" (passo inicial de cada bloco), "rows" (array (m, s) com a ação
+        de cada bloco) e "horizon".
+    """
+    actions = np.asarray(actions)
+    starts = np.flatnonzero(np.append(True, np.any(actions[1:] != actions[:-1], axis=1)))
+    return {"starts": starts, "rows": actions[starts], "horizon": len(actions)}
+
+
+def expand_schedule(compressed):
+    """Reconstrói a tabela (H, s) a partir de compress_schedule."""
+    lengths = np.diff(np.append(compressed["starts"], compressed["horizon"]))
+    return np.repeat(compressed["rows"], lengths, axis=0)
+
+
+def schedule_action(compressed, t, state):
+    """Ação do estado 'state' no passo t, consultando diretamente a forma compacta."""
+    block = np.searchsorted(compressed["starts"], t, side="right") - 1
+    return int(compressed["rows"][block, state])
+
+
+def schedule_policy(actions, num_actions):
+    """Converte a tabela (H, s) em matrizes de política (H, s, a), como as dos demais solvers."""
+    return np.eye(num_actions)[actions]
@@ -0,0 +1,191 @@
+import numpy as np
+
+from src.state_transitions.model import TransitionModel
+from src.state_transitions.rules import FEATURE_LEVELS
+
+
+def aggregation_map(dropped_features, feature_levels=FEATURE_LEVELS):
+    """
+    Agrupa os estados ignorando as features em 'dropped_features'.
+
+    Returns:
+        Um array (s,) com o índice do grupo (estado agregado) de cada estado e o número de grupos.
+    """
+    unknown = set(dropped_features) - set(feature_levels)
+    if unknown:
+        raise ValueError(f"Features desconhecidas: {sorted(unknown)}. Opções: {list(feature_levels)}")
+
+    shape = tuple(len(levels) for levels in feature_levels.values())
+    kept = [i for i, feature in enumerate(feature_levels) if feature not in dropped_features]
+
+    coordinates = np.unravel_index(np.arange(np.prod(shape)), shape)
+    kept_shape = tuple(shape[i] for i in kept)
+    groups = np.ravel_multi_index(tuple(coordinates[i] for i in kept), kept_shape)
+    return groups, int(np.prod(kept_shape))
+
+
+def aggregate_model(model, groups, num_groups):
+    """
+    Constrói o MDP agregado: cada grupo se comporta como a média uniforme dos seus estados.
+
+    Returns:
+        P: Array denso (c, a, c') com as probabilidades de transição entre grupos.
+        R: Array (c, a) com a recompensa esperada de cada ação em cada grupo.
+    """
+    num_actions = model.num_actions
+    sizes = np.bincount(groups, minlength=num_groups)
+
+    P = np.zeros((num_groups, num_actions, num_groups))
+    s, a, _ = np.indices(model.next_states.shape)
+    np.add.at(P, (groups[s], a, groups[model.next_states]), model.probabilities)
+
+    R = np.zeros((num_groups, num_actions))
+    np.add.at(R, groups, np.sum(model.probabilities * model.rewards(), axis=-1))
+
+    return P / sizes[:, None, None], R / sizes[:, None]
+
+
+def multigrid_value_iteration(
+    env,
+    discount_factor=0.9,
+    theta=0.000001,
+    levels=(("capacity",), ("capacity", "speed")),
+    smoothing_sweeps=5,
+    max_cycles=100,
+    compare=False,
+):
+    """
+    Value iteration coarse-to-fine por agregação de estados.
+
+    Os MDPs agregados (por padrão sem a capacidade e depois também sem a velocidade) são
+    resolvidos do mais grosso para o mais fino, e cada solução é prolongada como ponto de
+    partida do nível seguinte. Em cada nível, um ciclo faz 'smoothing_sweeps' varreduras de
+    Bellman e então uma correção de agregação (Bertsekas & Castañon): o resíduo da política
+    gulosa atual é agregado no nível imediatamente mais grosso, a equação de correção é
+    resolvida exatamente nesse nível pequeno e prolongada de volta. No nível mais grosso a
+    correção usa um único grupo com todos os estados.
+
+    Args:
+        env: Ambiente (APIEnv).
+        discount_factor: Fator de desconto.
+        theta: Critério de parada: max |T V - V| < theta em cada nível.
+        levels: Features descartadas em cada nível agregado, do mais fino para o mais grosso.
+        smoothing_sweeps: Varreduras de Bellman entre correções de agregação.
+        max_cycles: Número máximo de ciclos por nível.
+        compare: Se True, roda também o value iteration sem agregação para reportar a economia
+            de varreduras ("flat_sweeps" e "sweep_savings"). Desligado por padrão, pois custa
+            uma solução completa a mais.
+
+    Returns:
+        policy: A política ótima (s, a).
+        V: A função de valor.
+        report: Dicionário com as varreduras e correções de cada nível, o trabalho equivalente
+            em varreduras do modelo completo e, com compare=True, a comparação com o value
+            iteration sem agregação.
+    """
+    model = TransitionModel.from_env(env)
+
+    # Cada nível: (número de estados, q_values(V), transições da política, grupo de cada estado no modelo completo)
+    hierarchy = [
+        (
+            model.num_states,
+            lambda V: model.q_values(V, discount_factor),
+            _sparse_policy_transitions(model),
+            np.arange(model.num_states),
+        )
+    ]
+    for dropped in levels:
+        groups, num_groups = aggregation_map(dropped)
+        P, R = aggregate_model(model, groups, num_groups)
+        hierarchy.append((num_groups, _dense_q_values(P, R, discount_factor), _dense_policy_transitions(P), groups))
+
+    report = {"levels": []}
+    work = 0.0
+    V = None
+
+    for i in reversed(range(len(hierarchy))):
+        num_states, q_values, policy_transitions, groups = hierarchy[i]
+
+        # Grupo de cada estado deste nível no nível imediatamente mais grosso (ou um grupo único)
+        parent = np.zeros(num_states, dtype=np.int64)
+        if i + 1 < len(hierarchy):
+            parent[groups] = hierarchy[i + 1][3]
+
+        # Prolonga a solução do nível mais grosso como ponto de partida
+        V = np.zeros(num_states) if V is None else V[parent]
+
+        V, sweeps, corrections = _solve_level(
+            q_values, policy_transitions, V, parent, discount_factor, theta, smoothing_sweeps, max_cycles
+        )
+        report["levels"].append({"states": num_states, "sweeps": sweeps, "corrections": corrections})
+        work += (sweeps + corrections) * num_states / model.num_states
+
+    Q = model.q_values(V, discount_factor)
+    policy = np.zeros((model.num_states, model.num_actions))
+    policy[np.arange(model.num_states), np.argmax(Q, axis=1)] = 1.0
+
+    report["fine_equivalent_sweeps"] = work
+    if compare:
+        _, flat_sweeps = model.value_iteration(discount_factor, theta)
+        report["flat_sweeps"] = flat_sweeps
+        report["sweep_savings"] = 1 - work / flat_sweeps if flat_sweeps else 0.0
+
+    return policy, V, report
+
+
+def _solve_level(q_values, policy_transitions, V, parent, discount_factor, theta, smoothing_sweeps, max_cycles):
+    sweeps = corrections = 0
+    num_groups = parent.max() + 1
+
+    for _ in range(max_cycles):
+        for _ in range(smoothing_sweeps):
+            V_new = q_values(V).max(axis=1)
+            sweeps += 1
+            converged = np.max(np.abs(V_new - V)) < theta
+            V = V_new
+            if converged:
+                return V, sweeps, corrections
+
+        # Correção de agregação para a política gulosa de V: resolve (I - γ P̄π) e = r̄ no nível
+        # mais grosso, onde r̄ é o resíduo de Bellman médio de cada grupo, e prolonga e
+        Q = q_values(V)
+        actions = np.argmax(Q, axis=1)
+        residual = Q[np.arange(len(V)), actions] - V
+
+        rows, cols, probabilities = policy_transitions(actions)
+        sizes = np.bincount(parent, minlength=num_groups)
+        P = np.zeros((num_groups, num_groups))
+        np.add.at(P, (parent[rows], parent[cols]), probabilities)
+        P /= sizes[:, None]
+        r = np.bincount(parent, weights=residual, minlength=num_groups) / sizes
+
+        V = V + np.linalg.solve(np.eye(num_groups) - discount_factor * P, r)[parent]
+        corrections += 1
+
+    return V, sweeps, corrections
+
+
+def _dense_q_values(P, R, discount_factor):
+    return lambda V: R + discount_factor * P @ V
+
+
+def _sparse_policy_transitions(model):
+    def transitions(actions):
+        rows = np.arange(model.num_states)
+        return (
+            np.repeat(rows, model.next_states.shape[-1]),
+            model.next_states[rows, actions].ravel(),
+            model.probabilities[rows, actions].ravel(),
+        )
+
+    return transitions
+
+
+def _dense_policy_transitions(P):
+    def transitions(actions):
+        P_policy = P[np.arange(P.shape[0]), actions]
+        rows, cols = np.nonzero(P_policy)
+        return rows, cols, P_policy[rows, cols]
+
+    return transitions
+
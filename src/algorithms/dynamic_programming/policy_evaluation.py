@@ -1,6 +1,9 @@
 import numpy as np
 
-def policy_evaluation(policy, env, discount_factor=0.9, theta=0.000001):
+from src.algorithms.action_mask import resolve_action_mask
+from src.dtypes import convergence_threshold, resolve_dtypes
+
+def policy_evaluation(policy, env, discount_factor=0.9, theta=0.000001, dtypes=None):
     """
     Avalia uma política, calculando a função de valor V(s) para cada estado e as recompensas totais por episódio.
 
@@ -9,12 +12,14 @@ def policy_evaluation(policy, env, discount_factor=0.9, theta=0.000001):
         env: Ambiente customizado com estados e ações.
         discount_factor: Fator de desconto para a função de valor.
         theta: Critério de parada baseado na convergência de V.
+        dtypes: DTypePolicy (ou "compact") usado para V (padrão: float64).
 
     Returns:
         V: Vetor contendo a função de valor para cada estado.
         total_rewards: Lista contendo a recompensa total acumulada para cada episódio.
     """
-    V = np.zeros(env.state_space)
+    V = np.zeros(env.state_space, dtype=resolve_dtypes(dtypes).values)
+    transition_rewards = getattr(env, "transition_rewards", None)
     total_rewards = []  # Lista para armazenar as recompensas acumuladas em cada episódio
 
     while True:
@@ -33,10 +38,14 @@ def policy_evaluation(policy, env, discount_factor=0.9, theta=0.000001):
                 )
 
                 # Calcula a soma ponderada para todos os estados de transição possíveis
-                for next_state_str, prob in transitions:
+                for k, (next_state_str, prob) in enumerate(transitions):
                     next_state = env.states.index(next_state_str)
-                    reward = env.states_rewards.get(next_state_str, 0)
-                    penalty = env.action_rewards.get(action_str, 0)
+                    if transition_rewards is not None:
+                        # Modelo estimado: a recompensa observada da transição já inclui a ação
+                        reward, penalty = transition_rewards[s, a, k], 0
+                    else:
+                        reward = env.states_rewards.get(next_state_str, 0)
+                        penalty = env.action_rewards.get(action_str, 0)
                     v += (
                         action_prob
                         * prob
@@ -52,24 +61,38 @@ def policy_evaluation(policy, env, discount_factor=0.9, theta=0.000001):
         # Armazena a recompensa total acumulada no episódio
         total_rewards.append(episode_reward)
 
-        if delta < theta:
+        if delta < convergence_threshold(theta, V):
             break
 
     return V, total_rewards
 
-def policy_improvement(env, discount_factor=0.9, theta=0.000001):
+def policy_improvement(env, discount_factor=0.9, theta=0.000001, policy=None, dtypes=None, mask_actions=False):
     """
     Algoritmo de Policy Improvement sem limite de iterações, baseado no critério de estabilidade da política.
-    """
 
-    # Inicializa a política como uniforme
-    policy = np.ones([env.state_space, env.action_space.n]) / env.action_space.n
+    Args:
+        policy: Política inicial (s, a) opcional, para partir de uma solução anterior (padrão: uniforme).
+        dtypes: DTypePolicy (ou "compact") usado para V e para a matriz de política (padrão: float64).
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na política
+            inicial e na melhoria. Também aceita uma máscara (s, a) própria.
+    """
+    dtypes = resolve_dtypes(dtypes)
+    mask = resolve_action_mask(env, mask_actions)
+    transition_rewards = getattr(env, "transition_rewards", None)
+
+    # Inicializa a política como uniforme, a menos que uma política inicial seja fornecida
+    if policy is None and mask is not None:
+        policy = (mask / mask.sum(axis=1, keepdims=True)).astype(dtypes.values)
+    elif policy is None:
+        policy = np.full([env.state_space, env.action_space.n], 1 / env.action_space.n, dtype=dtypes.values)
+    else:
+        policy = np.array(policy, dtype=dtypes.values)
 
     iteration = 0
     total_rewards = []  # Para armazenar as recompensas acumuladas por episódio
 
     while True:
-        V, rewards = policy_evaluation(policy, env, discount_factor, theta)
+        V, rewards = policy_evaluation(policy, env, discount_factor, theta, dtypes)
         total_rewards.append(np.sum(rewards))  # Armazena a soma das recompensas por episódio
 
         policy_stable = True
@@ -80,15 +103,22 @@ def policy_improvement(env, discount_factor=0.9, theta=0.000001):
             action_values = np.zeros(env.action_space.n)
             state_str = env.states[s]
             for a in range(env.action_space.n):
+                if mask is not None and not mask[s, a]:
+                    action_values[a] = -np.inf
+                    continue
+
                 action_str = env.actions[a]
                 transitions = env.transition_probabilities.get(
                     (state_str, action_str), [(state_str, 1.0)]
                 )
 
-                for next_state_str, prob in transitions:
+                for k, (next_state_str, prob) in enumerate(transitions):
                     next_state = env.states.index(next_state_str)
-                    reward = env.states_rewards.get(next_state_str, 0)
-                    penalty = env.action_rewards.get(action_str, 0)
+                    if transition_rewards is not None:
+                        reward, penalty = transition_rewards[s, a, k], 0
+                    else:
+                        reward = env.states_rewards.get(next_state_str, 0)
+                        penalty = env.action_rewards.get(action_str, 0)
                     action_values[a] += prob * (
                         reward + penalty + discount_factor * V[next_state]
                     )
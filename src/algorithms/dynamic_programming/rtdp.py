@@ -0,0 +1,201 @@
+import numpy as np
+
+from src.state_transitions.model import TransitionModel
+
+# Estado inicial de APIEnv.reset()
+RESET_STATE = "Offline_Slow_Error_Medium"
+
+
+def reachable_states(model, start, actions=None):
+    """
+    Estados alcançáveis a partir de 'start' com probabilidade positiva.
+
+    Args:
+        model: TransitionModel.
+        start: Índice do estado inicial (ou lista de índices).
+        actions: Array (s,) com a ação de cada estado. Se None, considera qualquer ação.
+
+    Returns:
+        Um array ordenado com os índices dos estados alcançáveis.
+    """
+    seen = np.zeros(model.num_states, dtype=bool)
+    frontier = np.unique(np.atleast_1d(start))
+    seen[frontier] = True
+
+    # Busca em largura, expandindo uma camada inteira por vez
+    while frontier.size:
+        if actions is None:
+            successors = model.next_states[frontier]
+            probabilities = model.probabilities[frontier]
+        else:
+            successors = model.next_states[frontier, actions[frontier]]
+            probabilities = model.probabilities[frontier, actions[frontier]]
+
+        successors = np.unique(successors[probabilities > 0])
+        frontier = successors[~seen[successors]]
+        seen[frontier] = True
+
+    return np.flatnonzero(seen)
+
+
+def restrict_model(model, states):
+    """
+    Restringe o modelo a um conjunto de estados fechado (ex.: o resultado de reachable_states).
+
+    Returns:
+        O TransitionModel reduzido, com os sucessores reindexados para 0..len(states)-1.
+    """
+    index = np.full(model.num_states, -1, dtype=np.int64)
+    index[states] = np.arange(len(states))
+
+    next_states = index[model.next_states[states]]
+    probabilities = model.probabilities[states]
+    if np.any((next_states < 0) & (probabilities > 0)):
+        raise ValueError("O conjunto de estados não é fechado: há transições para fora dele.")
+
+    # Sucessores com probabilidade 0 fora do conjunto apontam para o próprio estado
+    next_states = np.where(next_states < 0, np.arange(len(states))[:, None, None], next_states)
+    return TransitionModel(next_states, probabilities, model.state_rewards[states], model.action_penalties)
+
+
+def reachable_model(env, start=RESET_STATE):
+    """
+    Compila o modelo do ambiente mantendo apenas os estados alcançáveis a partir de 'start'.
+
+    Returns:
+        model: O TransitionModel reduzido.
+        states: Array com o índice original de cada estado do modelo reduzido.
+    """
+    model = TransitionModel.from_env(env)
+    states = reachable_states(model, env.states.index(start))
+    return restrict_model(model, states), states
+
+
+def rtdp(
+    env,
+    discount_factor=0.9,
+    theta=0.000001,
+    start=RESET_STATE,
+    trials_per_check=1,
+    max_trials=10000,
+    max_depth=20,
+    seed=None,
+    compare=False,
+):
+    """
+    Real-Time Dynamic Programming a partir do estado inicial.
+
+    Cada trial segue a política gulosa a partir de 'start', amostrando os sucessores, e faz o
+    backup apenas dos estados visitados. A cada 'trials_per_check' trials, o grafo de solução
+    gulosa (estados alcançáveis a partir de 'start' seguindo a política atual, como no LAO*)
+    recebe um backup completo; o algoritmo para quando o resíduo de Bellman nesse grafo fica
+    abaixo de theta. Os valores começam em um limite superior otimista (max recompensa / (1 - γ)),
+    então estados fora do grafo de solução nunca precisam ser resolvidos: recompensas, valores Q
+    e a política são calculados apenas para os estados visitados.
+
+    Args:
+        env: Ambiente (APIEnv).
+        discount_factor: Fator de desconto.
+        theta: Resíduo de Bellman máximo aceito no grafo de solução.
+        start: Estado inicial (padrão: o estado de APIEnv.reset()).
+        trials_per_check: Trials entre verificações de convergência.
+        max_trials: Número máximo de trials.
+        max_depth: Comprimento máximo de cada trial.
+        seed: Semente para a amostragem dos sucessores.
+        compare: Se True, também conta os estados alcançáveis e roda o value iteration sobre todos
+            os estados para reportar a economia de backups. Desligado por padrão, pois custa uma
+            solução completa a mais.
+
+    Returns:
+        policy: Matriz (s, a) com a ação gulosa de cada estado visitado; as linhas dos estados
+            nunca visitados ficam zeradas.
+        V: A função de valor (exata, a menos de theta, no grafo de solução; nos estados não
+            visitados permanece o limite otimista).
+        report: Dicionário com o número de backups, os estados visitados e os do grafo de
+            solução e, com compare=True, os estados alcançáveis e a comparação com o value
+            iteration sobre todos os estados.
+    """
+    if trials_per_check < 1:
+        raise ValueError("trials_per_check deve ser pelo menos 1.")
+
+    model = TransitionModel.from_env(env)
+    rng = np.random.default_rng(seed)
+    start = env.states.index(start)
+
+    def q_values(states):
+        visited[states] = True
+        return np.sum(
+            model.probabilities[states]
+            * (model.rewards(states) + discount_factor * V[model.next_states[states]]),
+            axis=-1,
+        )
+
+    if model.transition_rewards is not None:
+        max_reward = model.transition_rewards.max()
+    else:
+        max_reward = model.state_rewards.max() + model.action_penalties.max()
+    V = np.full(model.num_states, max_reward / (1 - discount_factor))
+    visited = np.zeros(model.num_states, dtype=bool)
+    backups = trials = 0
+    residual = np.inf
+
+    while trials < max_trials:
+        for _ in range(trials_per_check):
+            state = start
+            for _ in range(max_depth):
+                q = q_values(state)
+                action = np.argmax(q)
+                V[state] = q[action]
+                backups += 1
+                state = rng.choice(model.next_states[state, action], p=model.probabilities[state, action])
+            trials += 1
+
+        envelope, residual = _solution_graph_backup(model, V, q_values, start)
+        backups += len(envelope)
+        if residual < theta:
+            break
+
+    states = np.flatnonzero(visited)
+    policy = np.zeros((model.num_states, model.num_actions))
+    policy[states, np.argmax(q_values(states), axis=1)] = 1.0
+
+    report = {
+        "trials": trials,
+        "backups": backups,
+        "residual": float(residual),
+        "visited_states": states,
+        "solution_states": envelope,
+        "num_states": model.num_states,
+    }
+    if compare:
+        flat_backups = model.value_iteration(discount_factor, theta)[1] * model.num_states
+        report["reachable_states"] = len(reachable_states(model, start))
+        report["flat_backups"] = flat_backups
+        report["backup_savings"] = 1 - backups / flat_backups if flat_backups else 0.0
+    return policy, V, report
+
+
+def _solution_graph_backup(model, V, q_values, start):
+    """
+    Faz o backup de todos os estados do grafo de solução gulosa a partir de 'start',
+    expandindo-o camada por camada. Devolve os estados do grafo e o maior resíduo de Bellman.
+    """
+    seen = np.zeros(model.num_states, dtype=bool)
+    frontier = np.array([start])
+    seen[start] = True
+    residual = 0.0
+
+    while frontier.size:
+        q = q_values(frontier)
+        actions = np.argmax(q, axis=1)
+        best = q[np.arange(len(frontier)), actions]
+        residual = max(residual, float(np.max(np.abs(best - V[frontier]))))
+        V[frontier] = best
+
+        successors = model.next_states[frontier, actions]
+        successors = np.unique(successors[model.probabilities[frontier, actions] > 0])
+        frontier = successors[~seen[successors]]
+        seen[frontier] = True
+
+    return np.flatnonzero(seen), residual
+
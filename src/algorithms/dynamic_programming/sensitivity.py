@@ -0,0 +1,145 @@
+import copy
+
+import numpy as np
+
+from src.state_transitions.model import TransitionModel
+
+# Chaves de APIEnv(state_rewards=...) na ordem das componentes do nome do estado
+_REWARD_COMPONENTS = ("availability", "response_speed", "health", "request_capacity")
+
+
+def reward_arrays(env, configs):
+    """
+    Converte configurações de recompensa no formato do APIEnv em arrays empilhados.
+
+    Cada configuração é um dicionário com "state_rewards" e/ou "actions_penalties" no mesmo
+    formato dos argumentos do APIEnv; chaves ausentes herdam os valores do próprio ambiente.
+
+    Returns:
+        state_rewards: Array (k, s) com a recompensa de chegar em cada estado.
+        action_penalties: Array (k, a) com a penalidade de cada ação.
+    """
+    levels = np.array([state.split("_") for state in env.states])
+    state_rewards = np.zeros((len(configs), env.state_space))
+    action_penalties = np.zeros((len(configs), env.action_space.n))
+
+    for i, config in enumerate(configs):
+        components = _merge(env.state_reward_components, config.get("state_rewards", {}))
+        penalties = {**env.action_rewards, **config.get("actions_penalties", {})}
+
+        for j, component in enumerate(_REWARD_COMPONENTS):
+            state_rewards[i] += [components[component][level] for level in levels[:, j]]
+        action_penalties[i] = [penalties[action] for action in env.actions]
+
+    return state_rewards, action_penalties
+
+
+def batched_value_iteration(model, state_rewards, action_penalties, discount_factor=0.9, theta=0.000001):
+    """
+    Value iteration para k vetores de recompensa sobre o mesmo modelo de transição,
+    como uma única computação em lote.
+
+    Args:
+        model: TransitionModel (as recompensas do próprio modelo são ignoradas).
+        state_rewards: Array (k, s).
+        action_penalties: Array (k, a).
+        discount_factor: Fator de desconto.
+        theta: Critério de parada: max |T V - V| < theta em todas as configurações.
+
+    Returns:
+        actions: Array (k, s) com a ação ótima de cada estado em cada configuração.
+        V: Array (k, s) com a função de valor ótima de cada configuração.
+    """
+    probabilities = model.probabilities[None]
+    rewards = state_rewards[:, model.next_states] + action_penalties[:, None, :, None]  # (k, s, a, k')
+
+    V = np.zeros(state_rewards.shape)
+    while True:
+        Q = np.sum(probabilities * (rewards + discount_factor * V[:, model.next_states]), axis=-1)
+        V_new = Q.max(axis=-1)
+        if np.max(np.abs(V_new - V)) < theta:
+            return np.argmax(Q, axis=-1), V_new
+        V = V_new
+
+
+def sensitivity_analysis(env, configs, discount_factor=0.9, theta=0.000001):
+    """
+    Resolve o ambiente para várias configurações de recompensa mantendo as transições fixas.
+
+    Args:
+        env: Ambiente (APIEnv); o seu modelo de transição é usado para todas as configurações.
+        configs: Lista de configurações (ver reward_arrays).
+        discount_factor: Fator de desconto.
+        theta: Critério de parada.
+
+    Returns:
+        Um dicionário com:
+            "policies": Array (k, s, a) com as k políticas ótimas.
+            "actions": Array (k, s) com a ação ótima de cada estado.
+            "V": Array (k, s) com as funções de valor.
+            "flips": Lista, para cada estado cuja ação ótima muda entre configurações, de
+                dicionários com o estado e o nome da ação ótima em cada configuração.
+    """
+    model = TransitionModel.from_env(env)
+    state_rewards, action_penalties = reward_arrays(env, configs)
+    actions, V = batched_value_iteration(model, state_rewards, action_penalties, discount_factor, theta)
+
+    policies = np.zeros(actions.shape + (env.action_space.n,))
+    np.put_along_axis(policies, actions[..., None], 1.0, axis=-1)
+
+    flips = [
+        {"state": env.states[s], "actions": [env.actions[a] for a in actions[:, s]]}
+        for s in np.flatnonzero(np.any(actions != actions[:1], axis=0))
+    ]
+    return {"policies": policies, "actions": actions, "V": V, "flips": flips}
+
+
+def sweep_weight(env, path, values, discount_factor=0.9, theta=0.000001):
+    """
+    Varia um único peso e mostra em que valores a ação ótima de cada estado muda.
+
+    Args:
+        env: Ambiente (APIEnv).
+        path: Caminho do peso, ex.: ("actions_penalties", "Increase_CPU") ou
+            ("state_rewards", "health", "Error").
+        values: Valores testados, em ordem.
+        discount_factor: Fator de desconto.
+        theta: Critério de parada.
+
+    Returns:
+        result: O resultado de sensitivity_analysis para as configurações geradas.
+        changes: Lista de dicionários {"state", "value", "from", "to"} com cada troca de ação
+            entre valores consecutivos.
+    """
+    configs = []
+    for value in values:
+        config = {}
+        node = config
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+        configs.append(config)
+
+    result = sensitivity_analysis(env, configs, discount_factor, theta)
+    actions = result["actions"]
+
+    changes = [
+        {
+            "state": env.states[s],
+            "value": values[i + 1],
+            "from": env.actions[actions[i, s]],
+            "to": env.actions[actions[i + 1, s]],
+        }
+        for i, s in zip(*np.nonzero(actions[1:] != actions[:-1]))
+    ]
+    return result, changes
+
+
+def _merge(base, overrides):
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict):
+            merged[key] = {**merged.get(key, {}), **value}
+        else:
+            merged[key] = value
+    return merged
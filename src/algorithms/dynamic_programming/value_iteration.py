@@ -1,6 +1,9 @@
 import numpy as np
 
-def value_iteration(env, theta=0.000001, discount_factor=0.9):
+from src.algorithms.action_mask import resolve_action_mask
+from src.dtypes import convergence_threshold, resolve_dtypes
+
+def value_iteration(env, theta=0.000001, discount_factor=0.9, V=None, dtypes=None, mask_actions=False):
     """
     Value Iteration Algorithm adapted for custom environment with probabilistic transitions,
     and tracking of rewards per episode.
@@ -9,6 +12,10 @@ def value_iteration(env, theta=0.000001, discount_factor=0.9):
         env: Custom environment with defined states and actions.
         theta: Stop evaluation once value function change is less than theta for all states.
         discount_factor: Gamma discount factor.
+        V: Optional initial value function (warm start). Defaults to zeros.
+        dtypes: DTypePolicy (or "compact") for V and the policy matrix. Defaults to float64.
+        mask_actions: If True, skip each state's no-op actions (env.action_mask) in the backups and
+            in the policy. Also accepts a custom (s, a) mask.
 
     Returns:
         A tuple (policy, V, episode_rewards) of the optimal policy, the optimal value function, and rewards per episode.
@@ -22,21 +29,33 @@ def value_iteration(env, theta=0.000001, discount_factor=0.9):
         state_str = env.states[state]
 
         for a in range(env.action_space.n):
+            if mask is not None and not mask[state, a]:
+                A[a] = -np.inf
+                continue
+
             action_str = env.actions[a]
             transitions = env.transition_probabilities.get(
                 (state_str, action_str), [(state_str, 1.0)]
             )
 
-            for next_state_str, prob in transitions:
+            for k, (next_state_str, prob) in enumerate(transitions):
                 next_state = env.states.index(next_state_str)
-                reward = env.states_rewards.get(next_state_str, 0)
-                penalty = env.action_rewards.get(action_str, 0)
+                if transition_rewards is not None:
+                    # Modelo estimado: a recompensa observada da transição já inclui a ação
+                    reward, penalty = transition_rewards[state, a, k], 0
+                else:
+                    reward = env.states_rewards.get(next_state_str, 0)
+                    penalty = env.action_rewards.get(action_str, 0)
                 A[a] += prob * (reward + penalty + discount_factor * V[next_state])
 
         return A
 
+    dtypes = resolve_dtypes(dtypes)
+    mask = resolve_action_mask(env, mask_actions)
+    transition_rewards = getattr(env, "transition_rewards", None)
+
     # Initialize value function for all states
-    V = np.zeros(env.state_space)
+    V = np.zeros(env.state_space, dtype=dtypes.values) if V is None else np.array(V, dtype=dtypes.values)
     episode = 0
     episode_rewards = []
 
@@ -58,8 +77,11 @@ def value_iteration(env, theta=0.000001, discount_factor=0.9):
             )
 
             # Calculate the total reward for taking the best action
-            for next_state_str, prob in transitions:
-                reward = env.states_rewards.get(next_state_str, 0)
+            for k, (next_state_str, prob) in enumerate(transitions):
+                if transition_rewards is not None:
+                    reward = transition_rewards[s, best_action, k]
+                else:
+                    reward = env.states_rewards.get(next_state_str, 0)
                 total_episode_reward += prob * reward
 
             delta = max(delta, np.abs(best_action_value - V[s]))
@@ -67,11 +89,11 @@ def value_iteration(env, theta=0.000001, discount_factor=0.9):
 
         episode_rewards.append(total_episode_reward)  # Store reward of the episode
 
-        if delta < theta:
+        if delta < convergence_threshold(theta, V):
             break
 
     # Derive the policy from the optimal value function
-    policy = np.zeros([env.state_space, env.action_space.n])
+    policy = np.zeros([env.state_space, env.action_space.n], dtype=dtypes.values)
     for s in range(env.state_space):
         A = one_step_lookahead(s, V)
         best_action = np.argmax(A)
@@ -1,7 +1,16 @@
 from collections import defaultdict
 import numpy as np
 
-def epsilon_greedy_policy(Q, state, nA, epsilon):
+from src.algorithms.action_mask import epsilon_greedy_probabilities, masked_argmax, masked_max, resolve_action_mask
+from src.algorithms.checkpoint import (
+    arrays_to_table,
+    load_checkpoint,
+    save_checkpoint,
+    should_checkpoint,
+    table_to_arrays,
+)
+
+def epsilon_greedy_policy(Q, state, nA, epsilon, mask=None):
     """
     Cria uma política epsilon-greedy baseada na função Q (estado-ação).
 
@@ -10,16 +19,29 @@ def epsilon_greedy_policy(Q, state, nA, epsilon):
         state: Estado atual.
         nA: Número de ações disponíveis.
         epsilon: Parâmetro de exploração (probabilidade de escolher uma ação aleatória).
+        mask: Máscara (s, a) opcional de ações válidas; ações mascaradas recebem probabilidade 0.
 
     Returns:
         Uma política probabilística, representada por uma lista de probabilidades de escolha de cada ação.
     """
+    if mask is not None:
+        return epsilon_greedy_probabilities(Q[state], epsilon, mask[state])
+
     policy = np.ones(nA) * (epsilon / nA)
     best_action = np.argmax(Q[state])
     policy[best_action] += 1.0 - epsilon
     return policy
 
-def mc_control_epsilon_greedy(env, num_episodes, discount_factor=1.0, epsilon=0.1):
+def mc_control_epsilon_greedy(
+    env,
+    num_episodes,
+    discount_factor=1.0,
+    epsilon=0.1,
+    checkpoint_path=None,
+    checkpoint_every=1000,
+    early_stopping=None,
+    mask_actions=False,
+):
     """
     Monte Carlo Control usando uma política epsilon-greedy.
 
@@ -28,6 +50,12 @@ def mc_control_epsilon_greedy(env, num_episodes, discount_factor=1.0, epsilon=0.
         num_episodes: Número de episódios para treinar o agente.
         discount_factor: Fator de desconto para recompensas futuras.
         epsilon: Parâmetro de exploração para a política epsilon-greedy.
+        checkpoint_path: Arquivo de checkpoint. Se existir, o treinamento é retomado a partir dele.
+        checkpoint_every: Intervalo, em episódios, entre gravações do checkpoint.
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio;
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na política
+            epsilon-greedy e na política final. Também aceita uma máscara (s, a) própria.
 
     Returns:
         Q: A função valor-ação otimizada após o treinamento.
@@ -38,10 +66,30 @@ def mc_control_epsilon_greedy(env, num_episodes, discount_factor=1.0, epsilon=0.
     Q = defaultdict(lambda: np.zeros(env.action_space.n))
     returns_sum = defaultdict(float)
     returns_count = defaultdict(float)
+    mask = resolve_action_mask(env, mask_actions)
 
     total_rewards_per_episode = []
-
-    for i_episode in range(1, num_episodes + 1):
+    start_episode = 1
+
+    # Retoma o treinamento a partir do último checkpoint, se houver
+    checkpoint = load_checkpoint(checkpoint_path, "mc_control_epsilon_greedy")
+    if checkpoint is not None:
+        Q = arrays_to_table(
+            checkpoint["q_keys"], checkpoint["q_values"], lambda: np.zeros(env.action_space.n)
+        )
+        returns_sum = arrays_to_table(
+            checkpoint["returns_keys"], checkpoint["returns_sum"], float
+        )
+        returns_count = arrays_to_table(
+            checkpoint["returns_keys"], checkpoint["returns_count"], float
+        )
+        total_rewards_per_episode = checkpoint["total_rewards"].tolist()
+        start_episode = int(checkpoint["episode"]) + 1
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    for i_episode in range(start_episode, num_episodes + 1):
         # Mostra o progresso a cada 1000 episódios
         if i_episode % 1000 == 0:
             print(f"Episode {i_episode}/{num_episodes}")
@@ -50,16 +98,16 @@ def mc_control_epsilon_greedy(env, num_episodes, discount_factor=1.0, epsilon=0.
         episode = []
         state, _ = env.reset()
 
-        done = False
+        done = truncated = False
         episode_reward = 0  # Inicializa a recompensa total do episódio
 
-        while not done:
+        while not (done or truncated):
             # Seleciona uma ação usando a política epsilon-greedy
-            policy = epsilon_greedy_policy(Q, state, env.action_space.n, epsilon)
+            policy = epsilon_greedy_policy(Q, state, env.action_space.n, epsilon, mask)
             action = np.random.choice(np.arange(env.action_space.n), p=policy)
 
             # Executa a ação
-            next_state, reward, done, _, _ = env.step(action)
+            next_state, reward, done, truncated, _ = env.step(action)
             episode.append((state, action, reward))
             state = next_state
             episode_reward += reward  # Acumula a recompensa total
@@ -67,14 +115,23 @@ def mc_control_epsilon_greedy(env, num_episodes, discount_factor=1.0, epsilon=0.
         # Armazena a recompensa total do episódio
         total_rewards_per_episode.append(episode_reward)
 
-        # Calcula o retorno (G) para cada par estado-ação do episódio
+        # Índice da primeira visita de cada par estado-ação no episódio
+        first_visit = {}
+        for t, (visited_state, visited_action, _) in enumerate(episode):
+            first_visit.setdefault((visited_state, visited_action), t)
+
+        # Calcula o retorno (G) para cada par estado-ação do episódio;
+        # se o episódio foi truncado, a cauda do retorno é estimada por Q do último estado
+        # (sem desconto aqui: o laço abaixo já aplica γ ao somar a última recompensa)
         G = 0
+        if truncated and state in Q:
+            G = masked_max(Q[state], None if mask is None else mask[state])
         for t in range(len(episode) - 1, -1, -1):
             state, action, reward = episode[t]
             G = discount_factor * G + reward
 
             # Se o par estado-ação (state, action) não ocorreu antes no episódio
-            if (state, action) not in [(x[0], x[1]) for x in episode[:t]]:
+            if first_visit[(state, action)] == t:
                 # Atualiza as somas e contagens para calcular a média
                 returns_sum[(state, action)] += G
                 returns_count[(state, action)] += 1.0
@@ -82,10 +139,30 @@ def mc_control_epsilon_greedy(env, num_episodes, discount_factor=1.0, epsilon=0.
                     returns_sum[(state, action)] / returns_count[(state, action)]
                 )
 
+        if should_checkpoint(checkpoint_path, i_episode, checkpoint_every):
+            q_keys, q_arrays = table_to_arrays(Q)
+            returns_keys, returns_sum_array = table_to_arrays(returns_sum)
+            _, returns_count_array = table_to_arrays(returns_count)
+            save_checkpoint(
+                checkpoint_path,
+                "mc_control_epsilon_greedy",
+                episode=i_episode,
+                q_keys=q_keys,
+                q_values=q_arrays,
+                returns_keys=returns_keys.reshape(-1, 2),
+                returns_sum=returns_sum_array,
+                returns_count=returns_count_array,
+                epsilon=epsilon,
+                total_rewards=np.array(total_rewards_per_episode),
+            )
+
+        if early_stopping is not None and early_stopping.check(i_episode, episode_reward, Q):
+            break
+
     # Deriva a política final de Q
     policy = {}
     for state in Q:
-        best_action = np.argmax(Q[state])
+        best_action = masked_argmax(Q[state], None if mask is None else mask[state])
         policy[state] = np.eye(env.action_space.n)[best_action]
 
     return Q, policy, total_rewards_per_episode
\ No newline at end of file
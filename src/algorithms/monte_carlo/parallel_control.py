@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+from src.algorithms.action_mask import masked_argmax, masked_max, resolve_action_mask
+from src.algorithms.monte_carlo.epsilon_greedy_control import epsilon_greedy_policy
+
+# Ambiente de cada processo worker, definido uma única vez pelo initializer do Pool
+_worker_env = None
+
+
+def _init_worker(env):
+    global _worker_env
+    _worker_env = env
+
+
+def _run_inline(fn, tasks):
+    # As tarefas semeiam o gerador global do NumPy (usado também pelo APIEnv nas transições);
+    # sem processos separados, o estado do gerador do chamador é restaurado ao final
+    state = np.random.get_state()
+    try:
+        return [fn(*task) for task in tasks]
+    finally:
+        np.random.set_state(state)
+
+
+def generate_episode_statistics(Q, num_episodes, discount_factor, epsilon, seed, mask=None):
+    """
+    Gera episódios com uma política epsilon-greedy sobre um snapshot fixo de Q e
+    acumula os retornos de primeira visita em arrays compactos.
+
+    Args:
+        Q: Snapshot da função Q, array (s, a).
+        num_episodes: Número de episódios a serem gerados.
+        discount_factor: Fator de desconto para recompensas futuras.
+        epsilon: Parâmetro de exploração para a política epsilon-greedy.
+        seed: Semente do gerador aleatório do worker.
+        mask: Máscara (s, a) opcional de ações válidas, usada na política e no max da cauda.
+
+    Returns:
+        returns_sum: Array (s, a) com a soma dos retornos de cada par estado-ação.
+        returns_count: Array (s, a) com o número de retornos de cada par estado-ação.
+        episode_rewards: Lista com a recompensa total de cada episódio gerado.
+    """
+    env = _worker_env
+    np.random.seed(seed)
+
+    nA = env.action_space.n
+    returns_sum = np.zeros_like(Q)
+    returns_count = np.zeros_like(Q)
+    episode_rewards = []
+
+    for _ in range(num_episodes):
+        states, actions, rewards = [], [], []
+        state, _ = env.reset()
+        done = truncated = False
+
+        while not (done or truncated):
+            policy = epsilon_greedy_policy(Q, state, nA, epsilon, mask)
+            action = np.random.choice(nA, p=policy)
+            next_state, reward, done, truncated, _ = env.step(action)
+
+            states.append(state)
+            actions.append(action)
+            rewards.append(reward)
+            state = next_state
+
+        episode_rewards.append(sum(rewards))
+
+        # Índice da primeira visita de cada par estado-ação no episódio
+        first_visit = {}
+        for t, pair in enumerate(zip(states, actions)):
+            first_visit.setdefault(pair, t)
+
+        # Episódio truncado: o retorno da cauda é estimado pelo snapshot de Q
+        # (sem desconto aqui: o laço abaixo já aplica γ ao somar a última recompensa)
+        G = masked_max(Q[state], None if mask is None else mask[state]) if truncated else 0
+        for t in range(len(states) - 1, -1, -1):
+            G = discount_factor * G + rewards[t]
+            if first_visit[(states[t], actions[t])] == t:
+                returns_sum[states[t], actions[t]] += G
+                returns_count[states[t], actions[t]] += 1.0
+
+    return returns_sum, returns_count, episode_rewards
+
+
+def mc_control_parallel(
+    env,
+    num_episodes,
+    discount_factor=1.0,
+    epsilon=0.1,
+    num_workers=None,
+    sync_interval=100,
+    seed=None,
+    early_stopping=None,
+    mask_actions=False,
+):
+    """
+    Monte Carlo Control epsilon-greedy com geração de episódios em paralelo.
+
+    A cada rodada, cada worker gera 'sync_interval' episódios contra o mesmo snapshot
+    de Q e devolve somas e contagens de retornos por par estado-ação. O coordenador
+    soma as estatísticas, recalcula Q e envia o novo snapshot na rodada seguinte.
+    Com sync_interval=1 e num_workers=1 o algoritmo equivale ao MC sequencial.
+
+    Args:
+        env: Ambiente customizado (APIEnv).
+        num_episodes: Número total de episódios de treinamento.
+        discount_factor: Fator de desconto para recompensas futuras.
+        epsilon: Parâmetro de exploração para a política epsilon-greedy.
+        num_workers: Número de processos (padrão: os.cpu_count()).
+        sync_interval: Episódios gerados por worker entre sincronizações de Q.
+        seed: Semente do coordenador, usada para derivar as sementes dos workers.
+        early_stopping: EarlyStopping avaliado a cada sincronização, com a recompensa média da rodada;
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na política
+            epsilon-greedy e na política final. Também aceita uma máscara (s, a) própria.
+
+    Returns:
+        Q: A função valor-ação, array (s, a).
+        policy: A política determinística derivada de Q, matriz (s, a).
+        total_rewards_per_episode: Lista contendo a recompensa total de cada episódio.
+    """
+    num_workers = num_workers or os.cpu_count()
+    rng = np.random.default_rng(seed)
+    mask = resolve_action_mask(env, mask_actions)
+
+    Q = np.zeros((env.state_space, env.action_space.n))
+    returns_sum = np.zeros_like(Q)
+    returns_count = np.zeros_like(Q)
+    total_rewards_per_episode = []
+
+    if num_workers > 1:
+        pool = multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(env,))
+        map_tasks = pool.starmap
+    else:
+        pool = None
+        _init_worker(env)
+        map_tasks = _run_inline
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    try:
+        while len(total_rewards_per_episode) < num_episodes:
+            remaining = num_episodes - len(total_rewards_per_episode)
+            batch_size = min(remaining, sync_interval * num_workers)
+            episodes_per_worker = [
+                len(chunk) for chunk in np.array_split(np.arange(batch_size), num_workers)
+            ]
+            seeds = rng.integers(2**32, size=num_workers)
+
+            tasks = [
+                (Q, n, discount_factor, epsilon, int(worker_seed), mask)
+                for n, worker_seed in zip(episodes_per_worker, seeds)
+                if n > 0
+            ]
+
+            # Junta as estatísticas de todos os workers e atualiza Q
+            for worker_sum, worker_count, worker_rewards in map_tasks(
+                generate_episode_statistics, tasks
+            ):
+                returns_sum += worker_sum
+                returns_count += worker_count
+                total_rewards_per_episode.extend(worker_rewards)
+
+            Q = np.divide(returns_sum, returns_count, out=np.zeros_like(Q), where=returns_count > 0)
+
+            print(f"Episode {len(total_rewards_per_episode)}/{num_episodes}")
+
+            if early_stopping is not None and early_stopping.check(
+                len(total_rewards_per_episode),
+                np.mean(total_rewards_per_episode[-batch_size:]),
+                Q,
+            ):
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    policy = np.zeros_like(Q)
+    policy[np.arange(env.state_space), masked_argmax(Q, mask)] = 1.0
+
+    return Q, policy, total_rewards_per_episode
@@ -13,13 +13,13 @@ def run_monte_carlo_policy(env, policy, num_episodes=100, num_steps=100):
 
         for step in range(num_steps):
             action = np.argmax(policy[state])
-            next_state, reward, done, _, _ = env.step(action)
+            next_state, reward, done, truncated, _ = env.step(action)
             history.append((state, action, next_state, reward))  # Salvando a recompensa
             total_reward += reward
             rewards.append(reward)
             state = next_state
 
-            if done:
+            if done or truncated:
                 break
 
         total_rewards_per_episode.append(
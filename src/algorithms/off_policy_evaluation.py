@@ -0,0 +1,184 @@
+import numpy as np
+
+from src.algorithms.dynamic_programming.batched_evaluation import evaluate_policies
+from src.state_transitions.model import TransitionModel
+
+
+def log_trajectories(env, behavior_policy, num_episodes, max_steps=100):
+    """
+    Executa uma política estocástica e registra as decisões no formato usado pelos estimadores.
+
+    Args:
+        env: Ambiente (APIEnv).
+        behavior_policy: Matriz (s, a) com as probabilidades da política de comportamento.
+        num_episodes: Número de episódios.
+        max_steps: Número máximo de passos por episódio.
+
+    Returns:
+        Um dicionário com os arrays states, actions, rewards, behavior_probabilities e episodes.
+    """
+    logs = {key: [] for key in ("states", "actions", "rewards", "behavior_probabilities", "episodes")}
+
+    for episode in range(num_episodes):
+        state, _ = env.reset()
+        for _ in range(max_steps):
+            action = np.random.choice(env.action_space.n, p=behavior_policy[state])
+            next_state, reward, done, truncated, _ = env.step(action)
+
+            logs["states"].append(state)
+            logs["actions"].append(action)
+            logs["rewards"].append(reward)
+            logs["behavior_probabilities"].append(behavior_policy[state, action])
+            logs["episodes"].append(episode)
+
+            state = next_state
+            if done or truncated:
+                break
+
+    return {
+        "states": np.array(logs["states"], dtype=np.int64),
+        "actions": np.array(logs["actions"], dtype=np.int64),
+        "rewards": np.array(logs["rewards"], dtype=float),
+        "behavior_probabilities": np.array(logs["behavior_probabilities"], dtype=float),
+        "episodes": np.array(logs["episodes"], dtype=np.int64),
+    }
+
+
+def importance_weights(target_policies, states, actions, behavior_probabilities, episodes):
+    """
+    Razões de importância acumuladas por decisão, ρ_{0:t} = Π_{i<=t} π(a_i|s_i) / μ(a_i|s_i).
+
+    O produto é calculado em espaço logarítmico com uma soma acumulada segmentada por episódio,
+    sem laços em Python. Ações com π(a|s) = 0 zeram o peso do restante do episódio.
+
+    Args:
+        target_policies: Array (k, s, a) com as políticas avaliadas.
+        states, actions, behavior_probabilities, episodes: Arrays (n,) dos passos registrados,
+            com os passos de cada episódio contíguos e em ordem.
+
+    Returns:
+        weights: Array (k, n) com ρ_{0:t} de cada passo.
+        timesteps: Array (n,) com o índice t de cada passo dentro do episódio.
+        starts: Array (n,) com a posição do primeiro passo do episódio de cada passo.
+    """
+    n = len(states)
+    new_episode = np.ones(n, dtype=bool)
+    new_episode[1:] = episodes[1:] != episodes[:-1]
+    starts = np.maximum.accumulate(np.where(new_episode, np.arange(n), 0))
+    timesteps = np.arange(n) - starts
+
+    target = target_policies[:, states, actions]
+    zero = target == 0
+    log_ratios = np.log(np.where(zero, 1.0, target)) - np.log(behavior_probabilities)
+
+    weights = np.exp(_segmented_cumsum(log_ratios, starts))
+    weights[_segmented_cumsum(zero.astype(np.int64), starts) > 0] = 0.0
+    return weights, timesteps, starts
+
+
+def model_baseline(model, target_policies, discount_factor):
+    """
+    Q^π de cada política alvo sob o modelo de transição conhecido, por solução linear em lote.
+
+    Returns:
+        Array (k, s, a) com Q^π(s, a).
+    """
+    V = evaluate_policies(model, target_policies, discount_factor, method="solve")
+    return np.stack([model.q_values(values, discount_factor) for values in V])
+
+
+def evaluate_off_policy(
+    target_policies,
+    states,
+    actions,
+    rewards,
+    behavior_probabilities,
+    episodes,
+    discount_factor=0.9,
+    model=None,
+):
+    """
+    Estima o valor de uma ou mais políticas a partir de decisões registradas por outra política.
+
+    Estimadores:
+        - "pdis": importance sampling por decisão, (1/m) Σ_i Σ_t γ^t ρ_{0:t} r_t.
+        - "wis": IS ponderado por decisão, Σ_t γ^t Σ_i ρ_{i,t} r_{i,t} / Σ_i ρ_{i,t}.
+        - "dr": doubly robust (Jiang & Li, 2016), com Q^π do modelo como baseline:
+          (1/m) Σ_i Σ_t γ^t (ρ_{0:t} (r_t - Q̂(s_t, a_t)) + ρ_{0:t-1} V̂(s_t)). Só é calculado se
+          'model' for fornecido.
+
+    Args:
+        target_policies: Array (s, a) ou (k, s, a) com as políticas avaliadas.
+        states, actions, rewards, behavior_probabilities, episodes: Arrays (n,) dos passos
+            registrados (ver log_trajectories), com os passos de cada episódio contíguos.
+        discount_factor: Fator de desconto.
+        model: TransitionModel (ou APIEnv) usado no baseline do doubly robust.
+
+    Raises:
+        ValueError: Se alguma probabilidade da política de comportamento não for positiva.
+
+    Returns:
+        Um dicionário com um array (k,) por estimador e o tamanho efetivo da amostra
+        ("effective_sample_size") dos pesos no fim de cada episódio.
+    """
+    target_policies = np.asarray(target_policies, dtype=float)
+    if target_policies.ndim == 2:
+        target_policies = target_policies[None]
+
+    states = np.asarray(states)
+    actions = np.asarray(actions)
+    rewards = np.asarray(rewards, dtype=float)
+    episodes = np.asarray(episodes)
+    behavior_probabilities = np.asarray(behavior_probabilities, dtype=float)
+
+    # μ(a|s) = 0 tornaria a razão de importância infinita: a ação registrada não poderia ter sido escolhida
+    invalid = np.flatnonzero(~(behavior_probabilities > 0))
+    if invalid.size:
+        raise ValueError(
+            f"behavior_probabilities deve ser positiva em todos os passos; inválida nos passos {invalid.tolist()}."
+        )
+
+    weights, timesteps, starts = importance_weights(target_policies, states, actions, behavior_probabilities, episodes)
+    discounts = discount_factor**timesteps
+    num_episodes = int(np.count_nonzero(timesteps == 0))
+    num_policies = len(target_policies)
+
+    estimates = {"pdis": np.sum(weights * discounts * rewards, axis=1) / num_episodes}
+
+    # Para cada t, normaliza pelos pesos de todos os episódios que chegaram ao passo t
+    horizon = timesteps.max() + 1
+    bins = (np.arange(num_policies)[:, None] * horizon + timesteps).ravel()
+    weighted_rewards = np.bincount(bins, weights=(weights * rewards).ravel(), minlength=num_policies * horizon)
+    weight_sums = np.bincount(bins, weights=weights.ravel(), minlength=num_policies * horizon)
+    per_step = np.divide(weighted_rewards, weight_sums, out=np.zeros_like(weighted_rewards), where=weight_sums > 0)
+    estimates["wis"] = np.sum(per_step.reshape(num_policies, horizon) * discount_factor ** np.arange(horizon), axis=1)
+
+    if model is not None:
+        if not isinstance(model, TransitionModel):
+            model = TransitionModel.from_env(model)
+
+        Q = model_baseline(model, target_policies, discount_factor)
+        V = np.sum(target_policies * Q, axis=-1)
+        k = np.arange(num_policies)[:, None]
+
+        # ρ_{0:t-1}: 1 no primeiro passo de cada episódio, o peso do passo anterior nos demais
+        previous_weights = np.ones_like(weights)
+        previous_weights[:, 1:] = np.where(timesteps[1:] > 0, weights[:, :-1], 1.0)
+
+        corrections = weights * (rewards - Q[k, states, actions]) + previous_weights * V[k, states]
+        estimates["dr"] = np.sum(discounts * corrections, axis=1) / num_episodes
+
+    last_steps = np.flatnonzero(np.append(starts[1:] != starts[:-1], True))
+    final_weights = weights[:, last_steps]
+    estimates["effective_sample_size"] = final_weights.sum(axis=1) ** 2 / np.maximum(
+        np.sum(final_weights**2, axis=1), 1e-300
+    )
+
+    return estimates
+
+
+def _segmented_cumsum(values, starts):
+    """Soma acumulada ao longo do último eixo, reiniciada no início de cada episódio."""
+    cumulative = np.cumsum(values, axis=-1)
+    offset = np.where(starts > 0, cumulative[..., np.maximum(starts - 1, 0)], 0)
+    return cumulative - offset
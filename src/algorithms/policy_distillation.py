@@ -0,0 +1,179 @@
+import functools
+
+import numpy as np
+
+from src.algorithms.dynamic_programming.batched_evaluation import stack_policies
+from src.state_transitions.rules import FEATURE_LEVELS
+
+
+def distill_policy(env, policy, max_depth=None, state_weights=None):
+    """
+    Destila uma política tabular numa árvore de decisão mínima sobre as componentes do estado
+    (availability, speed, health, capacity) e numa lista ordenada de regras equivalente.
+
+    A árvore usa divisões multivia (um filho por nível da componente) e é ótima, não gulosa:
+    como cada subproblema é definido por quais componentes já foram fixadas e em que nível,
+    há poucos subproblemas e todos são resolvidos por programação dinâmica. Entre as árvores de
+    profundidade até max_depth, escolhe a de menor massa de discordância e, em empate, a de
+    menos folhas. Sem max_depth a concordância é sempre exata.
+
+    Args:
+        env: Ambiente (APIEnv).
+        policy: Matriz (s, a), vetor (s,) de ações ou dicionário {estado: probabilidades} (como os
+            devolvidos por SARSA e Monte Carlo). Estados ausentes do dicionário são livres.
+        max_depth: Profundidade máxima da árvore (None = até 4, o número de componentes).
+        state_weights: Peso (s,) de cada estado na massa de discordância, ex.: a frequência de
+            visita. Padrão: uniforme sobre os estados definidos na política.
+
+    Returns:
+        Um dicionário com:
+            "tree": A árvore ({"action"} nas folhas, {"feature", "children"} nos nós internos).
+            "rules": Lista de (condições, ação), testadas em ordem, e "default", a ação restante.
+            "actions": Array (s,) com a ação da política original (-1 nos estados livres).
+            "disagreement_mass": Massa (normalizada) dos estados em que a árvore discorda.
+            "disagreements": Estados em que a árvore discorda da política.
+            "num_leaves" e "depth".
+    """
+    features = list(FEATURE_LEVELS)
+    dims = tuple(len(levels) for levels in FEATURE_LEVELS.values())
+    num_actions = env.action_space.n
+
+    defined = np.ones(env.state_space, dtype=bool)
+    if isinstance(policy, dict):
+        defined[:] = False
+        defined[list(policy)] = True
+    actions = np.where(defined, np.argmax(stack_policies([policy], env.state_space, num_actions)[0], axis=1), -1)
+
+    weights = np.ones(env.state_space) if state_weights is None else np.asarray(state_weights, dtype=float)
+    weights = np.where(defined, weights, 0.0)
+    weights = weights / weights.sum()
+
+    # Massa (níveis..., a) de cada ação em cada estado, no formato fatorado
+    mass = np.zeros((env.state_space, num_actions))
+    mass[defined, actions[defined]] = weights[defined]
+    mass = mass.reshape(dims + (num_actions,))
+
+    # Ação usada em folhas sem nenhuma massa: a mais frequente na política
+    fallback = int(np.argmax(mass.reshape(-1, num_actions).sum(axis=0)))
+
+    @functools.lru_cache(maxsize=None)
+    def solve(fixed, depth):
+        """Melhor (erro, folhas, árvore) para os estados com as componentes 'fixed' fixadas."""
+        index = tuple(slice(None) if level is None else level for level in fixed)
+        action_mass = mass[index].reshape(-1, num_actions).sum(axis=0)
+        action = int(np.argmax(action_mass)) if action_mass.any() else fallback
+        best = (float(action_mass.sum() - action_mass[action]), 1, {"action": action})
+
+        if best[0] <= 1e-12 or (max_depth is not None and depth >= max_depth):
+            return best
+
+        for f, level in enumerate(fixed):
+            if level is not None:
+                continue
+            children = [solve(fixed[:f] + (l,) + fixed[f + 1 :], depth + 1) for l in range(dims[f])]
+            error = sum(child[0] for child in children)
+            leaves = sum(child[1] for child in children)
+            if (round(error, 12), leaves) < (round(best[0], 12), best[1]):
+                tree = {
+                    "feature": features[f],
+                    "children": {FEATURE_LEVELS[features[f]][l]: child[2] for l, child in enumerate(children)},
+                }
+                best = (error, leaves, tree)
+        return best
+
+    tree = _merge_leaves(solve((None,) * len(dims), 0)[2])
+    rules, default = rule_list(tree)
+
+    evaluate = compile_evaluator(tree, env.actions)
+    predicted = np.array([env.actions.index(evaluate(state)) for state in env.states])
+    disagree = defined & (predicted != actions)
+
+    return {
+        "tree": tree,
+        "rules": rules,
+        "default": default,
+        "actions": actions,
+        "disagreement_mass": float(weights[disagree].sum()),
+        "disagreements": [env.states[s] for s in np.flatnonzero(disagree)],
+        "num_leaves": len(list(_leaves(tree, {}))),
+        "depth": _depth(tree),
+    }
+
+
+def rule_list(tree):
+    """
+    Converte a árvore numa lista ordenada de regras.
+
+    As folhas da árvore são disjuntas, então a ação mais comum entre as folhas pode virar a
+    regra padrão e as folhas com essa ação são removidas da lista.
+
+    Returns:
+        rules: Lista de (condições {componente: nível}, ação).
+        default: Ação quando nenhuma regra se aplica.
+    """
+    leaves = list(_leaves(tree, {}))
+    counts = {}
+    for _, action in leaves:
+        counts[action] = counts.get(action, 0) + 1
+    default = max(counts, key=counts.get)
+    return [(conditions, action) for conditions, action in leaves if action != default], default
+
+
+def export_evaluator(tree, action_names, function_name="policy"):
+    """
+    Gera o código-fonte Python puro (sem NumPy) de uma função que recebe o nome do estado, ex.:
+    "Offline_Slow_Error_Medium", e devolve o nome da ação, com ifs aninhados espelhando a árvore.
+    """
+    lines = [
+        f"def {function_name}(state):",
+        "    availability, speed, health, capacity = state.split('_')",
+    ]
+    _emit(tree, action_names, lines, 1)
+    return "\n".join(lines) + "\n"
+
+
+def compile_evaluator(tree, action_names, function_name="policy"):
+    """Compila o código de export_evaluator e devolve a função."""
+    namespace = {}
+    exec(export_evaluator(tree, action_names, function_name), namespace)
+    return namespace[function_name]
+
+
+def _emit(node, action_names, lines, indent):
+    pad = "    " * indent
+    if "action" in node:
+        lines.append(f"{pad}return {action_names[node['action']]!r}")
+        return
+
+    children = list(node["children"].items())
+    for i, (level, child) in enumerate(children):
+        if i == len(children) - 1:
+            lines.append(f"{pad}else:")
+        else:
+            lines.append(f"{pad}{'if' if i == 0 else 'elif'} {node['feature']} == {level!r}:")
+        _emit(child, action_names, lines, indent + 1)
+
+
+def _merge_leaves(node):
+    """Troca nós cujos filhos são todos folhas com a mesma ação por uma única folha."""
+    if "action" in node:
+        return node
+    children = {level: _merge_leaves(child) for level, child in node["children"].items()}
+    actions = {child.get("action") for child in children.values()}
+    if len(actions) == 1 and None not in actions:
+        return {"action": actions.pop()}
+    return {"feature": node["feature"], "children": children}
+
+
+def _leaves(node, conditions):
+    if "action" in node:
+        yield conditions, node["action"]
+        return
+    for level, child in node["children"].items():
+        yield from _leaves(child, {**conditions, node["feature"]: level})
+
+
+def _depth(node):
+    if "action" in node:
+        return 0
+    return 1 + max(_depth(child) for child in node["children"].values())
@@ -0,0 +1,182 @@
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+
+class StoppingCriterion(ABC):
+    """Critério de parada avaliado ao final de cada episódio."""
+
+    reason = None
+
+    def start(self):
+        """Chamado pelo algoritmo antes do primeiro episódio."""
+        self.reason = None
+
+    @abstractmethod
+    def check(self, episode, episode_reward, Q):
+        """
+        Args:
+            episode: Número de episódios concluídos.
+            episode_reward: Recompensa total do último episódio.
+            Q: Função Q atual (array (s, a) ou dicionário estado -> valores de ação).
+
+        Returns:
+            True se o treinamento deve parar; nesse caso 'reason' descreve o motivo.
+        """
+
+
+class PolicyStability(StoppingCriterion):
+    """Para quando a política gulosa não muda por 'window' episódios seguidos."""
+
+    def __init__(self, window=100):
+        self.window = window
+
+    def start(self):
+        super().start()
+        self.__policy = None
+        self.__stable_episodes = 0
+
+    def check(self, episode, episode_reward, Q):
+        policy = greedy_actions(Q)
+        if self.__policy is not None and _same_policy(policy, self.__policy):
+            self.__stable_episodes += 1
+        else:
+            self.__stable_episodes = 0
+        self.__policy = policy
+
+        if self.__stable_episodes >= self.window:
+            self.reason = f"política gulosa estável por {self.window} episódios"
+            return True
+        return False
+
+
+class RewardPlateau(StoppingCriterion):
+    """Para quando a média móvel das recompensas em duas janelas consecutivas varia menos que 'tolerance'."""
+
+    def __init__(self, window=100, tolerance=1.0):
+        self.window = window
+        self.tolerance = tolerance
+
+    def start(self):
+        super().start()
+        self.__rewards = deque(maxlen=2 * self.window)
+
+    def check(self, episode, episode_reward, Q):
+        self.__rewards.append(episode_reward)
+        if len(self.__rewards) < 2 * self.window:
+            return False
+
+        rewards = np.array(self.__rewards)
+        previous, current = rewards[: self.window].mean(), rewards[self.window :].mean()
+        if abs(current - previous) < self.tolerance:
+            self.reason = (
+                f"média móvel das recompensas estabilizada em {current:.3f} "
+                f"(variação {abs(current - previous):.3f} < {self.tolerance})"
+            )
+            return True
+        return False
+
+
+class QDelta(StoppingCriterion):
+    """Para quando a norma da variação de Q entre episódios fica abaixo de 'threshold' por 'patience' episódios."""
+
+    def __init__(self, threshold=1e-3, patience=10, ord=np.inf):
+        self.threshold = threshold
+        self.patience = patience
+        self.ord = ord
+
+    def start(self):
+        super().start()
+        self.__previous = None
+        self.__small_deltas = 0
+
+    def check(self, episode, episode_reward, Q):
+        current = _q_snapshot(Q)
+        if self.__previous is not None:
+            delta = _q_delta_norm(current, self.__previous, self.ord)
+            self.__small_deltas = self.__small_deltas + 1 if delta < self.threshold else 0
+        self.__previous = current
+
+        if self.__small_deltas >= self.patience:
+            self.reason = f"variação de Q menor que {self.threshold} por {self.patience} episódios"
+            return True
+        return False
+
+
+class WallClock(StoppingCriterion):
+    """Para quando o tempo de treinamento excede 'seconds'."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def start(self):
+        super().start()
+        self.__start_time = time.perf_counter()
+
+    def check(self, episode, episode_reward, Q):
+        elapsed = time.perf_counter() - self.__start_time
+        if elapsed >= self.seconds:
+            self.reason = f"limite de tempo de {self.seconds}s atingido ({elapsed:.1f}s)"
+            return True
+        return False
+
+
+class EarlyStopping:
+    """
+    Combina critérios de parada: o treinamento para assim que qualquer um deles é satisfeito.
+    Após o treinamento, 'reason' e 'episode' indicam por que e quando o algoritmo parou
+    (ambos ficam None se todos os episódios foram executados).
+    """
+
+    def __init__(self, *criteria):
+        self.criteria = criteria
+        self.reason = None
+        self.episode = None
+
+    def start(self):
+        self.reason = None
+        self.episode = None
+        for criterion in self.criteria:
+            criterion.start()
+
+    def check(self, episode, episode_reward, Q):
+        for criterion in self.criteria:
+            if criterion.check(episode, episode_reward, Q):
+                self.reason = criterion.reason
+                self.episode = episode
+                print(f"Parada antecipada no episódio {episode}: {self.reason}")
+                return True
+        return False
+
+
+def greedy_actions(Q):
+    """
+    Ações gulosas de Q: array (s,) para Q matricial ou dicionário estado -> ação para Q em dicionário.
+    """
+    if isinstance(Q, dict):
+        return {state: int(np.argmax(values)) for state, values in Q.items()}
+    return np.argmax(Q, axis=1)
+
+
+def _same_policy(policy, other):
+    if isinstance(policy, dict):
+        return policy == other
+    return np.array_equal(policy, other)
+
+
+def _q_snapshot(Q):
+    if isinstance(Q, dict):
+        return {state: np.array(values) for state, values in Q.items()}
+    return np.array(Q)
+
+
+def _q_delta_norm(current, previous, ord):
+    if not isinstance(current, dict):
+        return np.linalg.norm((current - previous).ravel(), ord)
+
+    diffs = [
+        values - previous.get(state, np.zeros_like(values)) for state, values in current.items()
+    ]
+    return np.linalg.norm(np.concatenate(diffs), ord) if diffs else 0.0
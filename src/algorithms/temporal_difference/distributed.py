@@ -0,0 +1,576 @@
+import json
+import multiprocessing
+import os
+import select
+import selectors
+import socket
+import struct
+import time
+
+import numpy as np
+
+from src.algorithms.action_mask import masked_argmax, masked_max, resolve_action_mask
+from src.algorithms.temporal_difference.q_learning import epsilon_greedy
+
+# Tipos de mensagem do protocolo. Cada frame é: tipo (uint8) + tamanho do payload (uint32) + payload.
+HELLO, TRANSITIONS, Q_SNAPSHOT, CREDIT, STOP, METRICS = range(6)
+_FRAME_HEADER = struct.Struct("!BI")
+_TRANSITIONS_HEADER = struct.Struct("!II")
+_SNAPSHOT_HEADER = struct.Struct("!III")
+_UINT32 = struct.Struct("!I")
+
+# Campos de um lote de transições, na ordem em que são serializados
+_TRANSITION_FIELDS = (
+    ("states", "<i4"),
+    ("actions", "<i4"),
+    ("rewards", "<f8"),
+    ("next_states", "<i4"),
+    ("next_actions", "<i4"),
+    ("dones", "u1"),
+)
+
+
+def send_frame(sock, msg_type, payload=b""):
+    sock.sendall(_FRAME_HEADER.pack(msg_type, len(payload)) + payload)
+
+
+def recv_frame(sock):
+    """
+    Lê um frame completo. Devolve (None, b"") se a conexão foi encerrada.
+    """
+    header = _recv_exact(sock, _FRAME_HEADER.size)
+    if header is None:
+        return None, b""
+    msg_type, length = _FRAME_HEADER.unpack(header)
+    payload = _recv_exact(sock, length) if length else b""
+    if payload is None:
+        return None, b""
+    return msg_type, payload
+
+
+def _parse_frames(buffer):
+    """Remove e devolve os frames completos (tipo, payload) do início de um bytearray."""
+    frames = []
+    while len(buffer) >= _FRAME_HEADER.size:
+        msg_type, length = _FRAME_HEADER.unpack_from(buffer)
+        end = _FRAME_HEADER.size + length
+        if len(buffer) < end:
+            break
+        frames.append((msg_type, bytes(buffer[_FRAME_HEADER.size : end])))
+        del buffer[:end]
+    return frames
+
+
+def encode_transitions(version, batch):
+    n = len(batch["states"])
+    parts = [_TRANSITIONS_HEADER.pack(version, n)]
+    parts.extend(np.ascontiguousarray(batch[field], dtype=dtype).tobytes() for field, dtype in _TRANSITION_FIELDS)
+    return b"".join(parts)
+
+
+def decode_transitions(payload):
+    version, n = _TRANSITIONS_HEADER.unpack_from(payload)
+    offset = _TRANSITIONS_HEADER.size
+    batch = {}
+    for field, dtype in _TRANSITION_FIELDS:
+        batch[field] = np.frombuffer(payload, dtype=dtype, count=n, offset=offset)
+        offset += n * np.dtype(dtype).itemsize
+    return version, batch
+
+
+def encode_snapshot(version, Q):
+    return _SNAPSHOT_HEADER.pack(version, *Q.shape) + np.ascontiguousarray(Q, dtype="<f8").tobytes()
+
+
+def decode_snapshot(payload):
+    version, num_states, num_actions = _SNAPSHOT_HEADER.unpack_from(payload)
+    Q = np.frombuffer(payload, dtype="<f8", offset=_SNAPSHOT_HEADER.size).reshape(num_states, num_actions)
+    return version, Q.copy()
+
+
+class Learner:
+    """
+    Learner central: recebe lotes de transições dos atores, aplica atualizações TD em lote
+    e envia snapshots de Q de volta periodicamente.
+
+    O controle de fluxo é por créditos: cada ator pode ter no máximo 'max_inflight' lotes
+    não confirmados, e o learner devolve um crédito por lote processado. Lotes gerados com
+    uma política mais de 'max_staleness' versões atrás são descartados.
+    """
+
+    def __init__(
+        self,
+        num_states,
+        num_actions,
+        address=("127.0.0.1", 0),
+        method="q_learning",
+        alpha=0.1,
+        gamma=0.99,
+        sync_interval=10,
+        max_staleness=50,
+        mask=None,
+    ):
+        """
+        Args:
+            num_states: Número de estados.
+            num_actions: Número de ações.
+            address: Tupla (host, porta) para TCP ou caminho de arquivo para socket Unix.
+            method: "q_learning" ou "sarsa".
+            alpha: Taxa de aprendizado.
+            gamma: Fator de desconto.
+            sync_interval: Número de atualizações do learner entre snapshots enviados a cada ator.
+            max_staleness: Diferença máxima de versão aceita entre a política do ator e a do learner.
+            mask: Máscara (s, a) opcional de ações válidas, usada no max do alvo do Q-learning.
+        """
+        if method not in ("q_learning", "sarsa"):
+            raise ValueError(f"method deve ser 'q_learning' ou 'sarsa', recebido '{method}'.")
+
+        self.Q = np.zeros((num_states, num_actions))
+        self.version = 0
+        self.method = method
+        self.alpha = alpha
+        self.gamma = gamma
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.mask = mask
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(address)
+        self.sock.listen()
+        self.address = self.sock.getsockname()
+
+    def run(self, num_actors, total_transitions, hello_timeout=30.0, is_alive=None):
+        """
+        Atende os atores até processar 'total_transitions' transições e então os encerra.
+
+        O learner nunca bloqueia num ator: os sockets são não bloqueantes, cada conexão tem
+        buffers de entrada e de saída, e os frames de saída são enviados conforme o socket aceita.
+
+        Args:
+            num_actors: Número de atores esperados (identificados por 0..num_actors-1 no HELLO).
+            total_transitions: Número de transições aceitas antes de encerrar.
+            hello_timeout: Segundos de espera pelos HELLOs; depois disso o learner segue apenas
+                com os atores já conectados.
+            is_alive: Função opcional actor_id -> bool (ex.: Process.is_alive); atores mortos antes
+                do HELLO deixam de ser esperados sem aguardar o hello_timeout.
+
+        Returns:
+            Um dicionário com as métricas de cada ator e os totais do learner.
+
+        Raises:
+            RuntimeError: Se nenhum ator se conectar.
+        """
+        self.sock.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        actors = {}
+        processed = 0
+        start = time.perf_counter()
+
+        def waiting_for_hello():
+            missing = [actor_id for actor_id in range(num_actors) if actor_id not in actors]
+            if not missing or time.perf_counter() - start > hello_timeout:
+                return False
+            return is_alive is None or any(is_alive(actor_id) for actor_id in missing)
+
+        while processed < total_transitions and (
+            waiting_for_hello() or any(not a["closed"] for a in actors.values())
+        ):
+            for conn, msg_type, payload in self.__poll(selector, timeout=1.0):
+                connection = selector.get_key(conn).data
+                actor = connection["actor"]
+
+                if msg_type is None:
+                    self.__disconnect(selector, conn)
+                    if actor is not None:
+                        actor["closed"] = True
+                elif msg_type == HELLO:
+                    actor_id = _UINT32.unpack(payload)[0]
+                    actors[actor_id] = connection["actor"] = _new_actor_metrics(conn)
+                    self.__send(selector, conn, Q_SNAPSHOT, encode_snapshot(self.version, self.Q))
+                elif msg_type == TRANSITIONS and actor is not None:
+                    accepted = self.__handle_transitions(actor, payload)
+                    processed += accepted or 0
+
+                    # Envia um snapshot novo quando a política do ator ficou 'sync_interval' versões para trás
+                    # ou quando o lote foi descartado por estar desatualizado
+                    if accepted is None or self.version - actor["snapshot_version"] >= self.sync_interval:
+                        self.__send(selector, conn, Q_SNAPSHOT, encode_snapshot(self.version, self.Q))
+                        actor["snapshot_version"] = self.version
+                    self.__send(selector, conn, CREDIT, _UINT32.pack(1))
+
+        elapsed = time.perf_counter() - start
+        self.__stop_actors(selector, actors)
+        selector.close()
+
+        if not actors:
+            raise RuntimeError(f"Nenhum ator se conectou ao learner em {hello_timeout}s.")
+
+        return {
+            "elapsed_seconds": elapsed,
+            "processed_transitions": processed,
+            "transitions_per_second": processed / elapsed if elapsed > 0 else 0.0,
+            "learner_version": self.version,
+            "missing_actors": [actor_id for actor_id in range(num_actors) if actor_id not in actors],
+            "actors": {actor_id: _actor_summary(actor) for actor_id, actor in actors.items()},
+        }
+
+    def close(self):
+        self.sock.close()
+        if self.sock.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def __handle_transitions(self, actor, payload):
+        version, batch = decode_transitions(payload)
+        n = len(batch["states"])
+        now = time.perf_counter()
+
+        actor["first_batch"] = actor["first_batch"] or now
+        actor["last_batch"] = now
+        actor["bytes"] += len(payload)
+        actor["received"] += n
+
+        staleness = self.version - version
+        if staleness > self.max_staleness:
+            actor["dropped_batches"] += 1
+            return None
+
+        actor["accepted"] += n
+        actor["batches"] += 1
+        actor["staleness_sum"] += staleness
+        self.__update(batch)
+        return n
+
+    def __update(self, batch):
+        states, actions = batch["states"], batch["actions"]
+        if self.method == "q_learning":
+            next_states = batch["next_states"]
+            bootstrap = masked_max(self.Q[next_states], None if self.mask is None else self.mask[next_states])
+        else:
+            bootstrap = self.Q[batch["next_states"], batch["next_actions"]]
+
+        # Só estados terminais não têm bootstrap; episódios truncados continuam com Q(s')
+        target = batch["rewards"] + self.gamma * bootstrap * (batch["dones"] == 0)
+        delta = target - self.Q[states, actions]
+
+        # Pares (s, a) repetidos no lote recebem a média dos seus erros TD em vez da soma
+        pairs = states * self.Q.shape[1] + actions
+        counts = np.bincount(pairs, minlength=self.Q.size)[pairs]
+        np.add.at(self.Q, (states, actions), self.alpha * delta / counts)
+        self.version += 1
+
+    def __stop_actors(self, selector, actors, timeout=10.0):
+        for actor in actors.values():
+            if not actor["closed"]:
+                self.__send(selector, actor["conn"], STOP)
+
+        # Lê os frames restantes até cada ator enviar suas métricas e fechar a conexão
+        deadline = time.perf_counter() + timeout
+        while any(not actor["closed"] for actor in actors.values()) and time.perf_counter() < deadline:
+            for conn, msg_type, payload in self.__poll(selector, timeout=0.1):
+                actor = selector.get_key(conn).data["actor"]
+                if msg_type is None:
+                    self.__disconnect(selector, conn)
+                    if actor is not None:
+                        actor["closed"] = True
+                elif msg_type == METRICS and actor is not None:
+                    actor["reported"] = json.loads(payload.decode())
+
+        for key in list(selector.get_map().values()):
+            if key.fileobj is not self.sock:
+                self.__disconnect(selector, key.fileobj)
+
+    def __poll(self, selector, timeout):
+        """
+        Espera eventos dos sockets: aceita conexões, envia o que cabe dos buffers de saída e lê
+        o que chegou. Devolve a lista de frames completos (conn, tipo, payload); tipo None indica
+        que a conexão foi encerrada.
+        """
+        frames = []
+        for key, events in selector.select(timeout=timeout):
+            if key.fileobj is self.sock:
+                try:
+                    conn, _ = self.sock.accept()
+                except BlockingIOError:
+                    continue
+                conn.setblocking(False)
+                selector.register(conn, selectors.EVENT_READ, {"in": bytearray(), "out": bytearray(), "actor": None})
+                continue
+
+            conn, connection = key.fileobj, key.data
+            if events & selectors.EVENT_WRITE and not self.__flush(selector, conn):
+                frames.append((conn, None, b""))
+                continue
+            if events & selectors.EVENT_READ:
+                try:
+                    chunk = conn.recv(1 << 16)
+                except BlockingIOError:
+                    continue
+                except ConnectionError:
+                    chunk = b""
+                if not chunk:
+                    frames.append((conn, None, b""))
+                    continue
+                connection["in"] += chunk
+                frames.extend((conn, msg_type, payload) for msg_type, payload in _parse_frames(connection["in"]))
+        return frames
+
+    def __send(self, selector, conn, msg_type, payload=b""):
+        """Enfileira um frame no buffer de saída da conexão e envia o que o socket aceitar agora."""
+        selector.get_key(conn).data["out"] += _FRAME_HEADER.pack(msg_type, len(payload)) + payload
+        self.__flush(selector, conn)
+
+    def __flush(self, selector, conn):
+        """Envia o buffer de saída sem bloquear. Devolve False se a conexão caiu."""
+        out = selector.get_key(conn).data["out"]
+        try:
+            sent = conn.send(out) if out else 0
+        except BlockingIOError:
+            sent = 0
+        except ConnectionError:
+            out.clear()
+            return False
+        del out[:sent]
+
+        # Só pede eventos de escrita enquanto houver dados pendentes
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if out else 0)
+        if selector.get_key(conn).events != events:
+            selector.modify(conn, events, selector.get_key(conn).data)
+        return True
+
+    def __disconnect(self, selector, conn):
+        if conn in selector.get_map():
+            selector.unregister(conn)
+        conn.close()
+
+
+class Actor:
+    """Ator: executa episódios com a política epsilon-greedy do último snapshot de Q e envia lotes ao learner."""
+
+    def __init__(self, address, env, actor_id, epsilon=0.1, batch_size=256, max_inflight=4, mask=None):
+        """
+        Args:
+            address: Endereço do learner (tupla (host, porta) ou caminho de socket Unix).
+            env: Ambiente (APIEnv).
+            actor_id: Identificador do ator.
+            epsilon: Probabilidade de exploração da política epsilon-greedy.
+            batch_size: Número de transições por lote enviado.
+            max_inflight: Número máximo de lotes enviados e ainda não confirmados pelo learner.
+            mask: Máscara (s, a) opcional de ações válidas para a política epsilon-greedy.
+        """
+        self.env = env
+        self.mask = mask
+        self.actor_id = actor_id
+        self.epsilon = epsilon
+        self.batch_size = batch_size
+        self.credits = max_inflight
+
+        self.Q = None
+        self.version = 0
+        self.running = True
+
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.connect(address)
+
+    def run(self):
+        nA = self.env.action_space.n
+        send_frame(self.sock, HELLO, _UINT32.pack(self.actor_id))
+        while self.Q is None and self.running:
+            self.__handle(*recv_frame(self.sock))
+
+        batch = {field: np.zeros(self.batch_size, dtype=dtype) for field, dtype in _TRANSITION_FIELDS}
+        episode_rewards = []
+        episode_reward = 0
+        credit_wait = 0.0
+        steps = 0
+
+        state, _ = self.env.reset()
+        action = epsilon_greedy(self.Q, state, nA, self.epsilon, self.mask)
+
+        while self.running:
+            for i in range(self.batch_size):
+                next_state, reward, done, truncated, _ = self.env.step(action)
+                next_action = epsilon_greedy(self.Q, next_state, nA, self.epsilon, self.mask)
+
+                batch["states"][i], batch["actions"][i], batch["rewards"][i] = state, action, reward
+                batch["next_states"][i], batch["next_actions"][i], batch["dones"][i] = (
+                    next_state,
+                    next_action,
+                    done,
+                )
+                episode_reward += reward
+
+                if done or truncated:
+                    episode_rewards.append(episode_reward)
+                    episode_reward = 0
+                    state, _ = self.env.reset()
+                    action = epsilon_greedy(self.Q, state, nA, self.epsilon, self.mask)
+                else:
+                    state, action = next_state, next_action
+            steps += self.batch_size
+
+            # Backpressure: espera o learner liberar créditos antes de enviar mais um lote
+            wait_start = time.perf_counter()
+            while self.credits == 0 and self.running:
+                self.__handle(*recv_frame(self.sock))
+            credit_wait += time.perf_counter() - wait_start
+
+            if not self.running:
+                break
+
+            send_frame(self.sock, TRANSITIONS, encode_transitions(self.version, batch))
+            self.credits -= 1
+
+            # Processa snapshots e créditos já recebidos sem bloquear
+            while self.running and select.select([self.sock], [], [], 0)[0]:
+                self.__handle(*recv_frame(self.sock))
+
+        metrics = {
+            "steps": steps,
+            "episodes": len(episode_rewards),
+            "mean_episode_reward": float(np.mean(episode_rewards)) if episode_rewards else None,
+            "credit_wait_seconds": credit_wait,
+            "final_policy_version": self.version,
+        }
+        try:
+            send_frame(self.sock, METRICS, json.dumps(metrics).encode())
+        finally:
+            self.sock.close()
+        return metrics
+
+    def __handle(self, msg_type, payload):
+        if msg_type == Q_SNAPSHOT:
+            self.version, self.Q = decode_snapshot(payload)
+        elif msg_type == CREDIT:
+            self.credits += _UINT32.unpack(payload)[0]
+        elif msg_type in (STOP, None):
+            self.running = False
+
+
+def run_actor(address, env, actor_id, epsilon=0.1, batch_size=256, max_inflight=4, seed=None, mask=None):
+    """
+    Ponto de entrada de um processo ator.
+    """
+    np.random.seed(seed)
+    return Actor(address, env, actor_id, epsilon, batch_size, max_inflight, mask).run()
+
+
+def distributed_td_learning(
+    env,
+    total_transitions,
+    num_actors=4,
+    method="q_learning",
+    alpha=0.1,
+    gamma=0.99,
+    epsilon=0.1,
+    batch_size=256,
+    max_inflight=4,
+    sync_interval=10,
+    max_staleness=50,
+    address=("127.0.0.1", 0),
+    seed=None,
+    mask_actions=False,
+):
+    """
+    Treinamento TD ator-learner: 'num_actors' processos executam episódios do ambiente e
+    enviam lotes de transições por socket a um learner central neste processo.
+
+    Args:
+        env: Ambiente (APIEnv), copiado para cada processo ator.
+        total_transitions: Número de transições aceitas pelo learner antes de encerrar.
+        num_actors: Número de processos atores.
+        method: "q_learning" ou "sarsa".
+        alpha: Taxa de aprendizado.
+        gamma: Fator de desconto.
+        epsilon: Probabilidade de exploração dos atores.
+        batch_size: Número de transições por lote.
+        max_inflight: Lotes não confirmados permitidos por ator (backpressure).
+        sync_interval: Atualizações do learner entre snapshots de Q enviados a cada ator.
+        max_staleness: Lotes gerados com política mais antiga que isso (em versões) são descartados.
+        address: Tupla (host, porta) para TCP ou caminho de arquivo para socket Unix.
+        seed: Semente usada para derivar as sementes dos atores.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na
+            exploração dos atores, no max do alvo e na política final. Também aceita uma máscara
+            (s, a) própria.
+
+    Returns:
+        Q: A função valor-ação aprendida.
+        policy: A política determinística derivada de Q.
+        metrics: Dicionário com a vazão e as métricas de cada ator.
+    """
+    mask = resolve_action_mask(env, mask_actions)
+    learner = Learner(
+        env.state_space, env.action_space.n, address, method, alpha, gamma, sync_interval, max_staleness, mask
+    )
+    seeds = np.random.default_rng(seed).integers(2**32, size=num_actors)
+
+    processes = [
+        multiprocessing.Process(
+            target=run_actor,
+            args=(learner.address, env, actor_id, epsilon, batch_size, max_inflight, int(actor_seed), mask),
+        )
+        for actor_id, actor_seed in enumerate(seeds)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        metrics = learner.run(num_actors, total_transitions, is_alive=lambda actor_id: processes[actor_id].is_alive())
+    finally:
+        learner.close()
+        for process in processes:
+            process.join()
+
+    Q = learner.Q
+    policy = np.zeros_like(Q)
+    policy[np.arange(Q.shape[0]), masked_argmax(Q, mask)] = 1.0
+
+    return Q, policy, metrics
+
+
+def _recv_exact(sock, n):
+    chunks = []
+    while n > 0:
+        chunk = sock.recv(n)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _new_actor_metrics(conn):
+    return {
+        "conn": conn,
+        "closed": False,
+        "snapshot_version": 0,
+        "received": 0,
+        "accepted": 0,
+        "batches": 0,
+        "dropped_batches": 0,
+        "staleness_sum": 0,
+        "bytes": 0,
+        "first_batch": None,
+        "last_batch": None,
+        "reported": {},
+    }
+
+
+def _actor_summary(actor):
+    duration = (actor["last_batch"] or 0) - (actor["first_batch"] or 0)
+    return {
+        "received_transitions": actor["received"],
+        "accepted_transitions": actor["accepted"],
+        "dropped_batches": actor["dropped_batches"],
+        "mean_staleness": actor["staleness_sum"] / actor["batches"] if actor["batches"] else 0.0,
+        "bytes_received": actor["bytes"],
+        "transitions_per_second": actor["received"] / duration if duration > 0 else 0.0,
+        **actor["reported"],
+    }
@@ -0,0 +1,281 @@
+import numpy as np
+
+from src.algorithms.action_mask import masked_argmax, resolve_action_mask
+from src.algorithms.temporal_difference.q_learning import epsilon_greedy
+
+
+class SparseTraces:
+    """
+    Traços de elegibilidade esparsos: guarda apenas as entradas visitadas recentemente,
+    descartando as que decaem abaixo de 'cutoff'. Cada atualização custa O(traços ativos).
+    """
+
+    TRACE_TYPES = ("accumulating", "replacing", "dutch")
+
+    def __init__(self, trace_type, decay, cutoff, alpha):
+        """
+        Args:
+            trace_type: "accumulating" (e += 1), "replacing" (e = 1) ou "dutch" (e = (1 - alpha) * e + 1).
+            decay: Fator de decaimento aplicado após cada atualização (gamma * lambda).
+            cutoff: Traços menores que este valor são removidos.
+            alpha: Taxa de aprendizado (usada pelos traços dutch).
+        """
+        if trace_type not in self.TRACE_TYPES:
+            raise ValueError(f"trace_type deve ser um de {self.TRACE_TYPES}, recebido '{trace_type}'.")
+
+        self.trace_type = trace_type
+        self.decay = decay
+        self.cutoff = cutoff
+        self.alpha = alpha
+        self.traces = {}
+
+    def __len__(self):
+        return len(self.traces)
+
+    def visit(self, key):
+        e = self.traces.get(key, 0.0)
+        if self.trace_type == "accumulating":
+            self.traces[key] = e + 1.0
+        elif self.trace_type == "replacing":
+            self.traces[key] = 1.0
+        else:
+            self.traces[key] = (1.0 - self.alpha) * e + 1.0
+
+    def update(self, table, step):
+        """
+        Aplica table[key] += step * e para cada traço ativo e em seguida decai os traços.
+        """
+        decayed = {}
+        for key, e in self.traces.items():
+            table[key] += step * e
+            e *= self.decay
+            if e >= self.cutoff:
+                decayed[key] = e
+        self.traces = decayed
+
+    def clear(self):
+        self.traces = {}
+
+
+def sarsa_lambda(
+    env,
+    num_episodes,
+    gamma=1.0,
+    alpha=0.5,
+    epsilon=0.1,
+    lambda_=0.9,
+    trace_type="accumulating",
+    trace_cutoff=1e-3,
+    early_stopping=None,
+    mask_actions=False,
+):
+    """
+    Algoritmo SARSA(λ) com traços de elegibilidade esparsos.
+
+    Args:
+        env: Ambiente (APIEnv).
+        num_episodes: Número de episódios de treinamento.
+        gamma: Fator de desconto.
+        alpha: Taxa de aprendizado.
+        epsilon: Probabilidade de exploração da política epsilon-greedy.
+        lambda_: Parâmetro λ dos traços de elegibilidade.
+        trace_type: "accumulating", "replacing" ou "dutch".
+        trace_cutoff: Traços menores que este valor são descartados.
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio;
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na
+            política epsilon-greedy e na política final. Também aceita uma máscara (s, a) própria.
+
+    Returns:
+        Q: A função valor-ação aprendida.
+        policy: A política determinística derivada de Q.
+        total_rewards: Lista com as recompensas totais de cada episódio.
+    """
+    nA = env.action_space.n
+    Q = np.zeros((env.state_space, nA))
+    mask = resolve_action_mask(env, mask_actions)
+    total_rewards = []
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    for episode in range(num_episodes):
+        traces = SparseTraces(trace_type, gamma * lambda_, trace_cutoff, alpha)
+        state, _ = env.reset()
+        action = epsilon_greedy(Q, state, nA, epsilon, mask)
+        done = truncated = False
+        episode_reward = 0
+
+        while not (done or truncated):
+            next_state, reward, done, truncated, _ = env.step(action)
+            next_action = epsilon_greedy(Q, next_state, nA, epsilon, mask)
+
+            delta = reward + gamma * Q[next_state, next_action] * (not done) - Q[state, action]
+            traces.visit((state, action))
+            traces.update(Q, alpha * delta)
+
+            state, action = next_state, next_action
+            episode_reward += reward
+
+        total_rewards.append(episode_reward)
+
+        if episode % 100 == 0:
+            print(f"Episode {episode}/{num_episodes} completed. Total reward: {episode_reward}")
+
+        if early_stopping is not None and early_stopping.check(episode + 1, episode_reward, Q):
+            break
+
+    return Q, _greedy_policy(Q, mask), total_rewards
+
+
+def q_lambda(
+    env,
+    num_episodes,
+    gamma=0.99,
+    alpha=0.1,
+    epsilon=0.1,
+    lambda_=0.9,
+    trace_type="replacing",
+    trace_cutoff=1e-3,
+    early_stopping=None,
+    mask_actions=False,
+):
+    """
+    Algoritmo Q(λ) de Watkins com traços de elegibilidade esparsos.
+    Os traços são zerados sempre que uma ação exploratória (não gulosa) é escolhida.
+
+    Args:
+        env: Ambiente (APIEnv).
+        num_episodes: Número de episódios de treinamento.
+        gamma: Fator de desconto.
+        alpha: Taxa de aprendizado.
+        epsilon: Probabilidade de exploração da política epsilon-greedy.
+        lambda_: Parâmetro λ dos traços de elegibilidade.
+        trace_type: "accumulating", "replacing" ou "dutch".
+        trace_cutoff: Traços menores que este valor são descartados.
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio;
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na
+            exploração, no max do alvo e na política final. Também aceita uma máscara (s, a) própria.
+
+    Returns:
+        Q: A função valor-ação aprendida.
+        policy: A política determinística derivada de Q.
+        total_rewards: Lista com as recompensas totais de cada episódio.
+    """
+    nA = env.action_space.n
+    Q = np.zeros((env.state_space, nA))
+    mask = resolve_action_mask(env, mask_actions)
+    total_rewards = []
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    for episode in range(num_episodes):
+        traces = SparseTraces(trace_type, gamma * lambda_, trace_cutoff, alpha)
+        state, _ = env.reset()
+        action = epsilon_greedy(Q, state, nA, epsilon, mask)
+        done = truncated = False
+        episode_reward = 0
+
+        while not (done or truncated):
+            next_state, reward, done, truncated, _ = env.step(action)
+            next_action = epsilon_greedy(Q, next_state, nA, epsilon, mask)
+            best_next_action = masked_argmax(Q[next_state], None if mask is None else mask[next_state])
+
+            # Ação exploratória: o retorno seguinte não segue mais a política gulosa. A comparação é
+            # feita antes da atualização, que pode alterar Q[next_state] (ex.: quando next_state == state)
+            exploratory = Q[next_state, next_action] != Q[next_state, best_next_action]
+
+            delta = reward + gamma * Q[next_state, best_next_action] * (not done) - Q[state, action]
+            traces.visit((state, action))
+            traces.update(Q, alpha * delta)
+
+            if exploratory:
+                traces.clear()
+
+            state, action = next_state, next_action
+            episode_reward += reward
+
+        total_rewards.append(episode_reward)
+
+        if episode % 100 == 0:
+            print(f"Episode {episode}/{num_episodes} completed. Total reward: {episode_reward}")
+
+        if early_stopping is not None and early_stopping.check(episode + 1, episode_reward, Q):
+            break
+
+    return Q, _greedy_policy(Q, mask), total_rewards
+
+
+def td_lambda(
+    policy,
+    env,
+    num_episodes,
+    gamma=0.9,
+    alpha=0.1,
+    lambda_=0.9,
+    trace_type="accumulating",
+    trace_cutoff=1e-3,
+    mask_actions=False,
+):
+    """
+    Avalia uma política com TD(λ), estimando V(s) a partir de episódios amostrados.
+
+    Args:
+        policy: Matriz (s, a) ou dicionário estado -> probabilidades de cada ação.
+        env: Ambiente (APIEnv).
+        num_episodes: Número de episódios de avaliação.
+        gamma: Fator de desconto.
+        alpha: Taxa de aprendizado.
+        lambda_: Parâmetro λ dos traços de elegibilidade.
+        trace_type: "accumulating", "replacing" ou "dutch".
+        trace_cutoff: Traços menores que este valor são descartados.
+        mask_actions: Se True, a política é restrita às ações válidas de cada estado
+            (env.action_mask) e renormalizada. Também aceita uma máscara (s, a) própria.
+
+    Returns:
+        V: Vetor contendo a função de valor estimada para cada estado.
+        total_rewards: Lista com as recompensas totais de cada episódio.
+    """
+    nA = env.action_space.n
+    V = np.zeros(env.state_space)
+    mask = resolve_action_mask(env, mask_actions)
+    total_rewards = []
+
+    for episode in range(num_episodes):
+        traces = SparseTraces(trace_type, gamma * lambda_, trace_cutoff, alpha)
+        state, _ = env.reset()
+        done = truncated = False
+        episode_reward = 0
+
+        while not (done or truncated):
+            probabilities = _masked_probabilities(policy[state], None if mask is None else mask[state])
+            action = np.random.choice(nA, p=probabilities)
+            next_state, reward, done, truncated, _ = env.step(action)
+
+            delta = reward + gamma * V[next_state] * (not done) - V[state]
+            traces.visit(state)
+            traces.update(V, alpha * delta)
+
+            state = next_state
+            episode_reward += reward
+
+        total_rewards.append(episode_reward)
+
+    return V, total_rewards
+
+
+def _greedy_policy(Q, mask=None):
+    policy = np.zeros_like(Q)
+    policy[np.arange(Q.shape[0]), masked_argmax(Q, mask)] = 1.0
+    return policy
+
+
+def _masked_probabilities(probabilities, mask=None):
+    """Restringe as probabilidades às ações válidas; sem massa nelas, usa a uniforme sobre as válidas."""
+    if mask is None:
+        return probabilities
+    probabilities = np.where(mask, probabilities, 0.0)
+    total = probabilities.sum()
+    return probabilities / total if total > 0 else mask / np.count_nonzero(mask)
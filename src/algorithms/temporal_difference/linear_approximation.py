@@ -0,0 +1,224 @@
+import itertools
+
+import numpy as np
+
+from src.algorithms.action_mask import masked_argmax, masked_max, random_action, resolve_action_mask
+from src.state_transitions.rules import FEATURE_LEVELS
+
+
+def active_features(levels, interactions=True):
+    """
+    Índices das features binárias ativas de estados fatorados, calculados direto das componentes.
+
+    Cada estado ativa exatamente uma feature por bloco (bias, cada componente e cada par de
+    componentes), então φ(s) fica representado pelos seus índices ativos, sem uma matriz (s, d).
+
+    Args:
+        levels: Array (n, 4) com o índice do nível de cada componente (ver FEATURE_LEVELS).
+        interactions: Se True, inclui o one-hot de cada par de componentes (ex.: speed x health).
+
+    Returns:
+        Array (n, m) com os índices ativos, m = 1 + 4 (+ 6 com interações), e o número total de features d.
+    """
+    levels = np.atleast_2d(levels)
+    sizes = [len(component_levels) for component_levels in FEATURE_LEVELS.values()]
+
+    columns = [np.zeros(len(levels), dtype=np.int64)]
+    offset = 1
+    for i, size in enumerate(sizes):
+        columns.append(offset + levels[:, i])
+        offset += size
+
+    if interactions:
+        for i, j in itertools.combinations(range(len(sizes)), 2):
+            columns.append(offset + levels[:, i] * sizes[j] + levels[:, j])
+            offset += sizes[i] * sizes[j]
+
+    return np.column_stack(columns), offset
+
+
+def state_levels(state):
+    """Índices dos níveis das componentes de um estado "Availability_Speed_Health_Capacity"."""
+    return [
+        component_levels.index(level)
+        for component_levels, level in zip(FEATURE_LEVELS.values(), state.split("_"))
+    ]
+
+
+def state_features(states, interactions=True):
+    """
+    Codifica os estados fatorados (disponibilidade, velocidade, saúde, capacidade) em features binárias.
+
+    Args:
+        states: Lista com os nomes dos estados, no formato "Availability_Speed_Health_Capacity".
+        interactions: Se True, inclui o one-hot de cada par de componentes (ex.: speed x health).
+
+    Returns:
+        Matriz (s, d) com um termo de bias, o one-hot de cada componente e, opcionalmente,
+        as interações entre pares de componentes.
+    """
+    indices, num_features = active_features(np.array([state_levels(state) for state in states]), interactions)
+    features = np.zeros((len(states), num_features))
+    features[np.arange(len(states))[:, None], indices] = 1.0
+    return features
+
+
+def linear_td_learning(
+    env,
+    num_episodes,
+    method="q_learning",
+    alpha=0.1,
+    gamma=0.99,
+    epsilon=0.1,
+    epsilon_decay=0.99,
+    batch_size=32,
+    interactions=True,
+    early_stopping=None,
+    mask_actions=False,
+):
+    """
+    Controle TD semi-gradiente com aproximação linear Q(s, a) = w[a] · φ(s).
+
+    As features de cada estado são calculadas das suas componentes na primeira visita, e durante
+    o treinamento Q é avaliado apenas nos estados visitados: nada é pré-calculado sobre todo o
+    espaço de estados. A política final é derivada ao fim para todos os estados.
+    As transições são acumuladas em lotes de 'batch_size' e os gradientes do lote são somados e
+    aplicados de uma só vez (o lote controla apenas a frequência das atualizações). Os pesos têm
+    tamanho fixo (ações x features), independente do número de estados.
+
+    Args:
+        env: Ambiente (APIEnv).
+        num_episodes: Número de episódios de treinamento.
+        method: "q_learning" (alvo com max) ou "sarsa" (alvo com a próxima ação escolhida).
+        alpha: Taxa de aprendizado por transição. É dividida pelo número de features ativas, de
+            modo que cada transição move Q(s, a) em alpha * δ, como no caso tabular.
+        gamma: Fator de desconto.
+        epsilon: Probabilidade inicial de exploração para política epsilon-greedy.
+        epsilon_decay: Fator de decaimento para epsilon em cada episódio.
+        batch_size: Número de transições por atualização.
+        interactions: Se True, usa também as features de interação entre componentes.
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio sobre Q = φ(s) · w[a] nos
+            estados visitados (dicionário estado -> valores de ação);
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na
+            exploração, no max do alvo e na política final. Também aceita uma máscara (s, a) própria.
+
+    Returns:
+        weights: Matriz de pesos (a, d).
+        policy: A política determinística derivada dos pesos, matriz (s, a), em todos os estados.
+        total_rewards: Lista com as recompensas totais de cada episódio.
+    """
+    if method not in ("q_learning", "sarsa"):
+        raise ValueError(f"method deve ser 'q_learning' ou 'sarsa', recebido '{method}'.")
+
+    nA = env.action_space.n
+    mask = resolve_action_mask(env, mask_actions)
+    example, num_features = active_features(np.zeros((1, len(FEATURE_LEVELS)), dtype=np.int64), interactions)
+    num_active = example.shape[1]
+    weights = np.zeros((nA, num_features))
+    step_size = alpha / num_active
+
+    # Features ativas dos estados já visitados, calculadas sob demanda
+    feature_cache = {}
+
+    def features(state):
+        if state not in feature_cache:
+            feature_cache[state] = active_features(state_levels(env.states[state]), interactions)[0][0]
+        return feature_cache[state]
+
+    def q_values(state):
+        return weights[:, features(state)].sum(axis=1)
+
+    # Buffer do lote de transições (features ativas em vez dos índices dos estados)
+    state_features_batch = np.zeros((batch_size, num_active), dtype=np.int64)
+    next_features_batch = np.zeros((batch_size, num_active), dtype=np.int64)
+    next_states = np.zeros(batch_size, dtype=np.int64)
+    actions = np.zeros(batch_size, dtype=np.int64)
+    rewards = np.zeros(batch_size)
+    next_actions = np.zeros(batch_size, dtype=np.int64)
+    dones = np.zeros(batch_size, dtype=bool)
+    size = 0
+
+    def select_action(state):
+        state_mask = None if mask is None else mask[state]
+        if np.random.rand() < epsilon:
+            return random_action(nA, state_mask)
+        return masked_argmax(q_values(state), state_mask)
+
+    def update(n):
+        phi, phi_next = state_features_batch[:n], next_features_batch[:n]
+        q_next = weights[:, phi_next].sum(axis=-1).T
+        if method == "q_learning":
+            bootstrap = masked_max(q_next, None if mask is None else mask[next_states[:n]])
+        else:
+            bootstrap = q_next[np.arange(n), next_actions[:n]]
+
+        q = weights[actions[:n, None], phi].sum(axis=1)
+        delta = rewards[:n] + gamma * bootstrap * ~dones[:n] - q
+        np.add.at(weights, (actions[:n, None], phi), step_size * delta[:, None])
+
+    total_rewards = []
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    for episode in range(num_episodes):
+        state, _ = env.reset()
+        action = select_action(state)
+        done = truncated = False
+        episode_reward = 0
+
+        while not (done or truncated):
+            next_state, reward, done, truncated, _ = env.step(action)
+            next_action = select_action(next_state)
+
+            state_features_batch[size], next_features_batch[size] = features(state), features(next_state)
+            next_states[size], actions[size], rewards[size] = next_state, action, reward
+            next_actions[size], dones[size] = next_action, done
+            size += 1
+
+            if size == batch_size:
+                update(size)
+                size = 0
+
+            state, action = next_state, next_action
+            episode_reward += reward
+
+        total_rewards.append(episode_reward)
+
+        # Reduz epsilon (exploração) ao longo do tempo
+        epsilon *= epsilon_decay
+
+        if episode % 100 == 0:
+            print(f"Episode {episode}/{num_episodes} completed. Total reward: {episode_reward}")
+
+        if early_stopping is not None and early_stopping.check(
+            episode + 1, episode_reward, {state: q_values(state) for state in feature_cache}
+        ):
+            break
+
+    if size > 0:
+        update(size)
+
+    # A política cobre todos os estados, inclusive os nunca visitados: a generalização vem das features
+    policy = np.zeros((env.state_space, nA))
+    policy[np.arange(env.state_space), greedy_actions(weights, env.states, interactions, mask)] = 1.0
+
+    return weights, policy, total_rewards
+
+
+def greedy_actions(weights, states, interactions=True, mask=None):
+    """
+    Ações gulosas dos pesos para qualquer lista de estados, com as features calculadas sob demanda.
+
+    Args:
+        weights: Matriz de pesos (a, d) de linear_td_learning.
+        states: Nomes dos estados.
+        interactions: O mesmo valor usado no treinamento.
+        mask: Máscara (n, a) opcional de ações válidas desses estados.
+
+    Returns:
+        Array (n,) com a ação gulosa de cada estado.
+    """
+    indices, _ = active_features(np.array([state_levels(state) for state in states]), interactions)
+    return masked_argmax(weights[:, indices].sum(axis=-1).T, mask)
@@ -0,0 +1,243 @@
+import numpy as np
+
+from src.algorithms.action_mask import masked_argmax, masked_max, resolve_action_mask
+from src.algorithms.temporal_difference.q_learning import epsilon_greedy
+
+
+class SumTree:
+    """
+    Árvore de somas em array: as folhas guardam as prioridades e cada nó interno a soma dos
+    filhos, permitindo amostragem proporcional e atualização em O(log n), vetorizadas por lote.
+    """
+
+    def __init__(self, capacity):
+        # A árvore usa a próxima potência de 2 para que todas as folhas fiquem no mesmo nível
+        self.capacity = 1 << max(capacity - 1, 0).bit_length()
+        self.depth = self.capacity.bit_length() - 1
+        self.tree = np.zeros(2 * self.capacity)
+
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        """Atualiza as prioridades das folhas 'indices' e recalcula os ancestrais, um nível por vez."""
+        nodes = np.asarray(indices) + self.capacity
+        self.tree[nodes] = priorities
+
+        nodes = np.unique(nodes // 2)
+        while nodes.size and nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes[nodes > 1] // 2)
+
+    def find(self, values):
+        """Desce a árvore para cada valor em [0, total) e devolve os índices das folhas correspondentes."""
+        values = np.array(values, dtype=float)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.tree[2 * nodes]
+            go_right = values >= left
+            values -= left * go_right
+            nodes = 2 * nodes + go_right
+        return nodes - self.capacity
+
+    def priorities(self, indices):
+        return self.tree[np.asarray(indices) + self.capacity]
+
+
+class PrioritizedReplayBuffer:
+    """
+    Buffer circular de capacidade fixa com amostragem proporcional ao erro TD (Schaul et al., 2016).
+
+    As transições ficam em arrays pré-alocados; quando o buffer enche, as mais antigas são
+    sobrescritas. Novas transições recebem a maior prioridade vista até então, para serem
+    amostradas pelo menos uma vez.
+    """
+
+    def __init__(self, capacity, alpha=0.6, epsilon=1e-6):
+        """
+        Args:
+            capacity: Número máximo de transições armazenadas.
+            alpha: Expoente da prioridade (0 = amostragem uniforme, 1 = proporcional ao erro TD).
+            epsilon: Constante somada ao |erro TD| para que nenhuma transição tenha prioridade 0.
+        """
+        self.capacity = capacity
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.tree = SumTree(capacity)
+
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+        self.position = 0
+        self.size = 0
+        self.max_priority = 1.0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        i = self.position
+        self.states[i], self.actions[i], self.rewards[i] = state, action, reward
+        self.next_states[i], self.dones[i] = next_state, done
+        self.tree.update([i], self.max_priority)
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size, beta=0.4):
+        """
+        Amostra um lote estratificado proporcional às prioridades.
+
+        Args:
+            batch_size: Número de transições.
+            beta: Expoente da correção por importance sampling (1 = correção completa).
+
+        Returns:
+            indices: Posições das transições no buffer (para update_priorities).
+            batch: Dicionário com states, actions, rewards, next_states e dones.
+            weights: Pesos de importance sampling normalizados pelo maior peso do lote.
+        """
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.rand(batch_size)) * segment
+
+        # Erros de arredondamento podem levar a folhas vazias além de 'size'
+        indices = np.minimum(self.tree.find(np.minimum(values, np.nextafter(total, 0))), self.size - 1)
+
+        probabilities = self.tree.priorities(indices) / total
+        weights = (self.size * probabilities) ** -beta
+        weights /= weights.max()
+
+        batch = {
+            "states": self.states[indices],
+            "actions": self.actions[indices],
+            "rewards": self.rewards[indices],
+            "next_states": self.next_states[indices],
+            "dones": self.dones[indices],
+        }
+        return indices, batch, weights
+
+    def update_priorities(self, indices, td_errors):
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+
+def prioritized_q_learning(
+    env,
+    num_episodes,
+    method="q_learning",
+    alpha=0.1,
+    gamma=0.99,
+    epsilon=0.1,
+    epsilon_decay=0.99,
+    buffer_size=10000,
+    batch_size=32,
+    replay_every=1,
+    priority_alpha=0.6,
+    beta=0.4,
+    beta_increment=0.001,
+    early_stopping=None,
+    mask_actions=False,
+):
+    """
+    Q-learning (ou Expected SARSA) com replay priorizado.
+
+    Cada transição observada vai para um PrioritizedReplayBuffer e, a cada 'replay_every'
+    passos, um lote amostrado proporcionalmente ao erro TD é usado numa atualização vetorizada
+    de Q, ponderada pelos pesos de importance sampling. As prioridades do lote são então
+    atualizadas com os novos erros TD.
+
+    Args:
+        env: Ambiente (APIEnv).
+        num_episodes: Número de episódios de treinamento.
+        method: "q_learning" (alvo com max) ou "expected_sarsa" (alvo com a esperança da política epsilon-greedy).
+        alpha: Taxa de aprendizado.
+        gamma: Fator de desconto.
+        epsilon: Probabilidade inicial de exploração para política epsilon-greedy.
+        epsilon_decay: Fator de decaimento para epsilon em cada episódio.
+        buffer_size: Capacidade do buffer de replay.
+        batch_size: Número de transições por atualização.
+        replay_every: Passos do ambiente entre atualizações.
+        priority_alpha: Expoente da prioridade no buffer.
+        beta: Expoente inicial da correção por importance sampling.
+        beta_increment: Aumento de beta por episódio, até 1.
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio;
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na exploração,
+            nos alvos e na política final. Também aceita uma máscara (s, a) própria.
+
+    Returns:
+        Q: A função valor-ação aprendida.
+        policy: A política derivada da função Q aprendida.
+        total_rewards: Lista com as recompensas totais de cada episódio.
+    """
+    if method not in ("q_learning", "expected_sarsa"):
+        raise ValueError(f"method deve ser 'q_learning' ou 'expected_sarsa', recebido '{method}'.")
+
+    nA = env.action_space.n
+    mask = resolve_action_mask(env, mask_actions)
+    Q = np.zeros((env.state_space, nA))
+    buffer = PrioritizedReplayBuffer(buffer_size, priority_alpha)
+    total_rewards = []
+    steps = 0
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    for episode in range(num_episodes):
+        state, _ = env.reset()
+        done = truncated = False
+        episode_reward = 0
+
+        while not (done or truncated):
+            action = epsilon_greedy(Q, state, nA, epsilon, mask)
+            next_state, reward, done, truncated, _ = env.step(action)
+            buffer.add(state, action, reward, next_state, done)
+            steps += 1
+
+            if steps % replay_every == 0 and len(buffer) >= batch_size:
+                indices, batch, weights = buffer.sample(batch_size, beta)
+                td_errors = _td_errors(Q, batch, gamma, method, epsilon, mask)
+
+                # Pares (s, a) repetidos no lote acumulam suas atualizações
+                np.add.at(Q, (batch["states"], batch["actions"]), alpha * weights * td_errors)
+                buffer.update_priorities(indices, td_errors)
+
+            state = next_state
+            episode_reward += reward
+
+        total_rewards.append(episode_reward)
+        epsilon *= epsilon_decay
+        beta = min(1.0, beta + beta_increment)
+
+        if episode % 100 == 0:
+            print(f"Episode {episode}/{num_episodes} completed. Total reward: {episode_reward}")
+
+        if early_stopping is not None and early_stopping.check(episode + 1, episode_reward, Q):
+            break
+
+    policy = np.zeros_like(Q)
+    policy[np.arange(env.state_space), masked_argmax(Q, mask)] = 1.0
+
+    return Q, policy, total_rewards
+
+
+def _td_errors(Q, batch, gamma, method, epsilon, mask=None):
+    next_values = Q[batch["next_states"]]
+    next_mask = None if mask is None else mask[batch["next_states"]]
+    best = masked_max(next_values, next_mask)
+    if method == "q_learning":
+        bootstrap = best
+    elif next_mask is None:
+        bootstrap = (1 - epsilon) * best + epsilon * next_values.mean(axis=1)
+    else:
+        mean = np.sum(next_values * next_mask, axis=1) / next_mask.sum(axis=1)
+        bootstrap = (1 - epsilon) * best + epsilon * mean
+
+    # Só estados terminais não têm bootstrap; episódios truncados continuam com Q(s')
+    target = batch["rewards"] + gamma * bootstrap * ~batch["dones"]
+    return target - Q[batch["states"], batch["actions"]]
@@ -1,15 +1,34 @@
 import numpy as np
 
-def epsilon_greedy(Q, state, nA, epsilon):
+from src.algorithms.action_mask import masked_argmax, random_action, resolve_action_mask
+from src.algorithms.checkpoint import load_checkpoint, save_checkpoint, should_checkpoint
+from src.dtypes import resolve_dtypes
+
+def epsilon_greedy(Q, state, nA, epsilon, mask=None):
     """
     Escolhe uma ação usando a política epsilon-greedy.
+
+    Se 'mask' (s, a) for fornecida, apenas as ações válidas do estado são consideradas.
     """
+    state_mask = None if mask is None else mask[state]
     if np.random.rand() < epsilon:
-        return np.random.randint(nA)
+        return random_action(nA, state_mask)
     else:
-        return np.argmax(Q[state])
+        return masked_argmax(Q[state], state_mask)
 
-def q_learning(env, num_episodes, alpha=0.1, gamma=0.99, epsilon=0.1, epsilon_decay=0.99):
+def q_learning(
+    env,
+    num_episodes,
+    alpha=0.1,
+    gamma=0.99,
+    epsilon=0.1,
+    epsilon_decay=0.99,
+    checkpoint_path=None,
+    checkpoint_every=1000,
+    early_stopping=None,
+    dtypes=None,
+    mask_actions=False,
+):
     """
     Algoritmo de Q-learning.
 
@@ -20,28 +39,50 @@ def q_learning(env, num_episodes, alpha=0.1, gamma=0.99, epsilon=0.1, epsilon_de
         gamma: Fator de desconto.
         epsilon: Probabilidade inicial de exploração para política epsilon-greedy.
         epsilon_decay: Fator de decaimento para epsilon em cada episódio.
+        checkpoint_path: Arquivo de checkpoint. Se existir, o treinamento é retomado a partir dele.
+        checkpoint_every: Intervalo, em episódios, entre gravações do checkpoint.
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio;
+            early_stopping.reason indica o motivo da parada.
+        dtypes: DTypePolicy (ou "compact") usado para Q e para a matriz de política (padrão: float64).
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na exploração,
+            no max do alvo e na política final. Também aceita uma máscara (s, a) própria.
 
     Returns:
         Q: A função valor-ação aprendida.
         policy: A política derivada da função Q aprendida.
         total_rewards: Lista com as recompensas totais de cada episódio.
     """
-    Q = np.zeros((env.state_space, env.action_space.n))  # Inicializa a função Q
+    dtypes = resolve_dtypes(dtypes)
+    mask = resolve_action_mask(env, mask_actions)
+    Q = np.zeros((env.state_space, env.action_space.n), dtype=dtypes.values)  # Inicializa a função Q
     total_rewards = []  # Lista para armazenar as recompensas acumuladas em cada episódio
+    start_episode = 0
+
+    # Retoma o treinamento a partir do último checkpoint, se houver
+    checkpoint = load_checkpoint(checkpoint_path, "q_learning")
+    if checkpoint is not None:
+        Q = checkpoint["Q"].astype(dtypes.values)
+        epsilon = float(checkpoint["epsilon"])
+        total_rewards = checkpoint["total_rewards"].tolist()
+        start_episode = int(checkpoint["episode"])
+
+    if early_stopping is not None:
+        early_stopping.start()
 
-    for episode in range(num_episodes):
+    for episode in range(start_episode, num_episodes):
         state, _ = env.reset()
-        done = False
+        done = truncated = False
         episode_reward = 0  # Inicializa a recompensa do episódio
 
-        while not done:
-            action = epsilon_greedy(Q, state, env.action_space.n, epsilon)
+        while not (done or truncated):
+            action = epsilon_greedy(Q, state, env.action_space.n, epsilon, mask)
             next_state, reward, done, truncated, _ = env.step(action)
-            best_next_action = np.argmax(Q[next_state])
+            best_next_action = masked_argmax(Q[next_state], None if mask is None else mask[next_state])
 
             # Atualiza a função Q usando a fórmula de Q-learning
+            # (em truncamento o episódio é cortado, então ainda há bootstrap do próximo estado)
             Q[state, action] += alpha * (
-                reward + gamma * Q[next_state, best_next_action] - Q[state, action]
+                reward + gamma * Q[next_state, best_next_action] * (not done) - Q[state, action]
             )
 
             state = next_state
@@ -55,10 +96,23 @@ def q_learning(env, num_episodes, alpha=0.1, gamma=0.99, epsilon=0.1, epsilon_de
         if episode % 100 == 0:
             print(f"Episode {episode}/{num_episodes} completed. Total reward: {episode_reward}")
 
+        if should_checkpoint(checkpoint_path, episode + 1, checkpoint_every):
+            save_checkpoint(
+                checkpoint_path,
+                "q_learning",
+                episode=episode + 1,
+                Q=Q,
+                epsilon=epsilon,
+                total_rewards=np.array(total_rewards),
+            )
+
+        if early_stopping is not None and early_stopping.check(episode + 1, episode_reward, Q):
+            break
+
     # Deriva a política da função Q aprendida
-    policy = np.zeros([env.state_space, env.action_space.n])
+    policy = np.zeros([env.state_space, env.action_space.n], dtype=dtypes.values)
     for s in range(env.state_space):
-        best_action = np.argmax(Q[s])
+        best_action = masked_argmax(Q[s], None if mask is None else mask[s])
         policy[s, best_action] = 1.0
 
     return Q, policy, total_rewards
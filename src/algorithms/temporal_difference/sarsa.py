@@ -2,7 +2,16 @@ import itertools
 from collections import defaultdict
 import numpy as np
 
-def epsilon_greedy(q_values, epsilon: float, num_actions: int):
+from src.algorithms.action_mask import epsilon_greedy_probabilities, masked_argmax, resolve_action_mask
+from src.algorithms.checkpoint import (
+    arrays_to_table,
+    load_checkpoint,
+    save_checkpoint,
+    should_checkpoint,
+    table_to_arrays,
+)
+
+def epsilon_greedy(q_values, epsilon: float, num_actions: int, mask=None):
     """
     Cria uma política epsilon-greedy com base nos valores Q e epsilon fornecidos.
 
@@ -11,6 +20,7 @@ def epsilon_greedy(q_values, epsilon: float, num_actions: int):
            Cada valor é um array numpy de comprimento num_actions.
         epsilon: Probabilidade de selecionar uma ação aleatória, float entre 0 e 1.
         num_actions: Número de ações no ambiente.
+        mask: Máscara (s, a) opcional de ações válidas; ações mascaradas recebem probabilidade 0.
 
     Retorno:
         Uma função que recebe o estado como entrada e retorna as probabilidades para cada ação
@@ -18,6 +28,9 @@ def epsilon_greedy(q_values, epsilon: float, num_actions: int):
     """
 
     def epsilon_greedy_policy(observation):
+        if mask is not None:
+            return epsilon_greedy_probabilities(q_values[observation], epsilon, mask[observation])
+
         # Inicializa todas as probabilidades de ação com epsilon / num_actions
         action_probabilities = np.ones(num_actions, dtype=float) * epsilon / num_actions
 
@@ -34,6 +47,10 @@ def sarsa_learning(
     gamma: float = 1.0,  # Melhor usar 1.0 como valor padrão
     alpha: float = 0.5,
     epsilon: float = 0.1,
+    checkpoint_path=None,
+    checkpoint_every: int = 1000,
+    early_stopping=None,
+    mask_actions=False,
 ):
     """
     Algoritmo SARSA: Aprendizado de Diferença Temporal On-policy. Encontra a política epsilon-greedy ótima.
@@ -44,6 +61,12 @@ def sarsa_learning(
         gamma: Fator de desconto para recompensas futuras (padrão: 1.0).
         alpha: Taxa de aprendizado para a atualização TD (padrão: 0.5).
         epsilon: Probabilidade de escolher uma ação aleatória. Float entre 0 e 1 (padrão: 0.1).
+        checkpoint_path: Arquivo de checkpoint. Se existir, o treinamento é retomado a partir dele.
+        checkpoint_every: Intervalo, em episódios, entre gravações do checkpoint (padrão: 1000).
+        early_stopping: EarlyStopping avaliado ao fim de cada episódio;
+            early_stopping.reason indica o motivo da parada.
+        mask_actions: Se True, ignora as ações no-op de cada estado (env.action_mask) na política
+            epsilon-greedy e na política final. Também aceita uma máscara (s, a) própria.
 
     Retorno:
         q_values: A função de valor de ação ótima, um dicionário que mapeia estado -> valores de ação.
@@ -55,11 +78,26 @@ def sarsa_learning(
     q_values = defaultdict(lambda: np.zeros(env.action_space.n))
 
     # A política epsilon-greedy a ser seguida
-    policy = epsilon_greedy(q_values, epsilon, env.action_space.n)
+    mask = resolve_action_mask(env, mask_actions)
+    policy = epsilon_greedy(q_values, epsilon, env.action_space.n, mask)
 
     total_rewards = []  # Lista para armazenar a recompensa total por episódio
-
-    for episode in range(num_episodes):
+    start_episode = 0
+
+    # Retoma o treinamento a partir do último checkpoint, se houver
+    checkpoint = load_checkpoint(checkpoint_path, "sarsa_learning")
+    if checkpoint is not None:
+        q_values = arrays_to_table(
+            checkpoint["q_keys"], checkpoint["q_values"], lambda: np.zeros(env.action_space.n)
+        )
+        policy = epsilon_greedy(q_values, epsilon, env.action_space.n, mask)
+        total_rewards = checkpoint["total_rewards"].tolist()
+        start_episode = int(checkpoint["episode"])
+
+    if early_stopping is not None:
+        early_stopping.start()
+
+    for episode in range(start_episode, num_episodes):
         # Reinicia o ambiente e escolhe a primeira ação
         state, _ = env.reset()
         action_probabilities = policy(state)
@@ -82,12 +120,13 @@ def sarsa_learning(
             )
 
             # Atualização TD
-            temporal_difference_target = reward + gamma * q_values[next_state][next_action]
+            # Em truncamento ainda há bootstrap do próximo estado; só o estado terminal vale zero
+            temporal_difference_target = reward + gamma * q_values[next_state][next_action] * (not done)
             temporal_difference_delta = temporal_difference_target - q_values[state][action]
             q_values[state][action] += alpha * temporal_difference_delta
 
-            # Se o episódio terminar, sair do loop
-            if done:
+            # Se o episódio terminar ou for truncado, sair do loop
+            if done or truncated:
                 break
 
             # Atualiza o estado e a ação para o próximo passo
@@ -101,10 +140,25 @@ def sarsa_learning(
         if episode % 100 == 0:
             print(f"Episódio {episode}/{num_episodes} concluído. Total reward: {episode_reward}")
 
+        if should_checkpoint(checkpoint_path, episode + 1, checkpoint_every):
+            q_keys, q_arrays = table_to_arrays(q_values)
+            save_checkpoint(
+                checkpoint_path,
+                "sarsa_learning",
+                episode=episode + 1,
+                q_keys=q_keys,
+                q_values=q_arrays,
+                epsilon=epsilon,
+                total_rewards=np.array(total_rewards),
+            )
+
+        if early_stopping is not None and early_stopping.check(episode + 1, episode_reward, q_values):
+            break
+
     # Gera a política final determinística (greedy)
     policy = {}
     for state in q_values:
-        best_action = np.argmax(q_values[state])
+        best_action = masked_argmax(q_values[state], None if mask is None else mask[state])
         policy[state] = np.eye(env.action_space.n)[best_action]
 
     return q_values, policy, total_rewards
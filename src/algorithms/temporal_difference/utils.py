@@ -10,14 +10,14 @@ def run_q_learning_policy(env, policy, num_steps=100):
 
     for step in range(num_steps):
         action = np.argmax(policy[state])
-        next_state, reward, done, _, _ = env.step(action)
+        next_state, reward, done, truncated, _ = env.step(action)
         env.render()
 
         history.append((state, action, next_state))
         rewards.append(reward)
 
         state = next_state
-        if done:
+        if done or truncated:
             break
     return history, rewards
 
@@ -90,13 +90,13 @@ def run_sarsa_policy(env, policy, num_episodes=100, num_steps=100):
 
         for step in range(num_steps):
             action = np.argmax(policy[state])
-            next_state, reward, done, _, _ = env.step(action)
+            next_state, reward, done, truncated, _ = env.step(action)
             history.append((state, action, next_state, reward))  # Salvando a recompensa
             total_reward += reward
             rewards.append(reward)
             state = next_state
 
-            if done:
+            if done or truncated:
                 break
 
         total_rewards_per_episode.append(
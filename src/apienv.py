@@ -1,16 +1,17 @@
+import copy
 import itertools
-import random
 
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
 
-from src.state_transitions.state_action import (
-    Availability,
-    Capacity,
-    Health,
-    Maintenance,
-    Speed,
+from src.dtypes import resolve_dtypes
+from src.state_transitions.model import valid_action_mask
+from src.state_transitions.rules import (
+    DEFAULT_RULES,
+    FEATURE_LEVELS,
+    compile_rules,
+    generate_successors,
 )
 
 
@@ -38,24 +39,31 @@ class APIEnv(gym.Env):
             "Add_Memory": -20,
             "Remove_Memory": -2,
         },
+        transition_rules=DEFAULT_RULES,
+        seed=None,
+        max_episode_steps=None,
+        model=None,
+        dtypes=None,
     ):
         super(APIEnv, self).__init__()
 
         # Definindo os estados (S)
         self.states = [
-            f"{avail}_{speed}_{health}_{capacity}"
-            for avail in ["Offline", "Available"]
-            for speed in ["Slow", "Medium", "Fast"]
-            for health in ["Healthy", "Overloaded", "Error"]
-            for capacity in ["Low", "Medium", "High"]
+            "_".join(levels) for levels in itertools.product(*FEATURE_LEVELS.values())
         ]
 
         self.state_space = len(self.states)
 
+        # Estados em que o episódio termina
+        self.terminal_states = ["Available_Fast_Healthy_High"]
+
         # Definindo as ações (A)
         self.actions = list(actions_penalties.keys())
         self.action_space = spaces.Discrete(len(self.actions))
 
+        # Recompensas por componente do estado, como recebidas (usadas em análises de sensibilidade)
+        self.state_reward_components = state_rewards
+
         self.__availability_rewards = state_rewards["availability"]
 
         self.__response_speed_rewards = state_rewards["response_speed"]
@@ -70,44 +78,106 @@ class APIEnv(gym.Env):
         # Penalidades para ações que consomem muitos recursos
         self.action_rewards = actions_penalties
 
-        # Definindo a função de recompensas (R) para todos os estados
-        self.transition_probabilities = self.generate_transitions()
+        # Compila as regras de transição e gera a tabela de sucessores (s, a, 3) para todos os pares,
+        # a menos que um modelo já compilado (ex.: em memória compartilhada) seja fornecido
+        if model is None:
+            self.transition_rules = compile_rules(transition_rules, self.actions)
+            self.next_state_indices, self.next_state_probabilities = generate_successors(
+                self.transition_rules, np.random.default_rng(seed)
+            )
+        else:
+            self.next_state_indices = model.next_states
+            self.next_state_probabilities = model.probabilities
+
+        # Recompensas por transição (s, a, k) de um modelo estimado, se houver (ver TransitionModel)
+        self.transition_rewards = None if model is None else model.transition_rewards
+
+        # Tipos numéricos da tabela de sucessores e das probabilidades (ver src/dtypes.py)
+        self.dtypes = resolve_dtypes(dtypes)
+        self.next_state_indices, self.next_state_probabilities = self.dtypes.cast_model(
+            self.next_state_indices, self.next_state_probabilities
+        )
+
+        # Ações válidas (s, a): exclui as que mantêm o estado no sucessor principal
+        self.action_mask = valid_action_mask(
+            self.next_state_indices, [self.states.index(state) for state in self.terminal_states]
+        )
+
+        self.__state_index = {state: s for s, state in enumerate(self.states)}
+
+        # Dicionário de probabilidades de transição (P), construído sob demanda
+        self.__transition_probabilities = None
+
+        # Limite de passos por episódio; ao atingi-lo o episódio é truncado (não terminado)
+        self.max_episode_steps = max_episode_steps
+        self.elapsed_steps = 0
 
         self.state = None
 
     def reset(self):
         self.state = "Offline_Slow_Error_Medium"
-        return self.states.index(self.state), {}
+        self.elapsed_steps = 0
+        state = self.states.index(self.state)
+        return state, {"action_mask": self.action_mask[state]}
+
+    @property
+    def transition_probabilities(self):
+        if self.__transition_probabilities is None:
+            self.__transition_probabilities = self.generate_transitions()
+        return self.__transition_probabilities
+
+    def astype(self, dtypes):
+        """Devolve uma cópia do ambiente com o mesmo modelo convertido para outro DTypePolicy."""
+        env = copy.copy(self)
+        env.dtypes = resolve_dtypes(dtypes)
+        env.next_state_indices, env.next_state_probabilities = env.dtypes.cast_model(
+            self.next_state_indices, self.next_state_probabilities
+        )
+        env.__transition_probabilities = None
+        return env
 
     def step(self, action):
         action_str = self.actions[action]
-        state_str = self.state
-
-        # Verifica se há uma transição válida e calcula a probabilidade
-        possible_transitions = self.transition_probabilities.get(
-            (state_str, action_str), [(state_str, 1.0)]
-        )
+        state = self.__state_index[self.state]
 
         # Escolhe o próximo estado com base nas probabilidades
-        next_states, probs = zip(*possible_transitions)
-        new_state = np.random.choice(next_states, p=probs)
+        successor = np.random.choice(
+            self.next_state_indices.shape[-1], p=self.next_state_probabilities[state, action]
+        )
+        next_state = self.next_state_indices[state, action, successor]
+        new_state = self.states[next_state]
 
-        # Definindo a recompensa com base no novo estado
-        reward_state = self.states_rewards.get(
-            new_state, 0
-        )  # Recompensa baseada no estado
-        reward_action = self.action_rewards.get(
-            action_str, 0
-        )  # Penalidade baseada na ação
+        if self.transition_rewards is not None:
+            # Modelo estimado: a recompensa observada de cada transição
+            total_reward = float(self.transition_rewards[state, action, successor])
+        else:
+            # Definindo a recompensa com base no novo estado
+            reward_state = self.states_rewards.get(
+                new_state, 0
+            )  # Recompensa baseada no estado
+            reward_action = self.action_rewards.get(
+                action_str, 0
+            )  # Penalidade baseada na ação
 
-        # Aplicando penalidade da ação no total da recompensa
-        total_reward = reward_state + reward_action
+            # Aplicando penalidade da ação no total da recompensa
+            total_reward = reward_state + reward_action
 
         self.state = new_state
 
-        done = new_state in ["Available_Fast_Healthy_High"]
+        done = new_state in self.terminal_states
 
-        return self.states.index(new_state), total_reward, done, False, {}
+        self.elapsed_steps += 1
+        truncated = self.is_truncated(done)
+
+        return int(next_state), total_reward, done, truncated, {"action_mask": self.action_mask[next_state]}
+
+    def is_truncated(self, done):
+        """Indica se o episódio atingiu max_episode_steps sem chegar a um estado terminal."""
+        return (
+            not done
+            and self.max_episode_steps is not None
+            and self.elapsed_steps >= self.max_episode_steps
+        )
 
     def render(self, mode="human"):
         if mode == "human":
@@ -141,69 +211,17 @@ class APIEnv(gym.Env):
     def generate_transitions(self):
         transitions = {}
 
-        for state in self.states:
-            for action in self.actions:
-                next_states = []
-
-                next_state_main = self.__adjust_state_component(state, action)
-
-                # Definir uma probabilidade para a transição principal
-                if action in ["Increase_CPU", "Decrease_CPU"]:
-                    main_prob = random.uniform(0.8, 0.9)
-                elif action in ["Corrective_Maintenance", "Preventive_Maintenance"]:
-                    main_prob = random.uniform(0.7, 0.8)
-                elif action in ["Restart_Components"]:
-                    main_prob = random.uniform(0.9, 0.95)
-                elif action in ["Add_Memory", "Remove_Memory"]:
-                    main_prob = random.uniform(0.8, 0.85)
-                else:
-                    main_prob = random.uniform(0.7, 0.85)
-
-                next_states.append((next_state_main, main_prob))
-
-                next_state_secondary = self.__adjust_secondary_state(state, action)
-                secondary_prob = random.uniform(0.05, 0.2)
-
-                if main_prob + secondary_prob > 1:
-                    secondary_prob = 1 - main_prob
-
-                next_states.append((next_state_secondary, secondary_prob))
-
-                remain_prob = 1 - (main_prob + secondary_prob)
-                if remain_prob < 0:
-                    remain_prob = 0
-
-                next_states.append((state, remain_prob))
-
-                transitions[(state, action)] = next_states
+        for s, state in enumerate(self.states):
+            for a, action in enumerate(self.actions):
+                transitions[(state, action)] = [
+                    (self.states[next_state], prob)
+                    for next_state, prob in zip(
+                        self.next_state_indices[s, a].tolist(),
+                        self.next_state_probabilities[s, a].tolist(),
+                    )
+                ]
 
         return transitions
 
-    def __adjust_state_component(self, state, action):
-        avail, speed, health, capacity = state.split("_")
-
-        avail = Availability(avail, health).get_next_most_likely_state(action)
-        speed = Speed(speed).get_next_most_likely_state(action)
-        health = Health(health).get_next_most_likely_state(action)
-        capacity = Capacity(capacity).get_next_most_likely_state(action)
-
-        if action in ["Corrective_Maintenance", "Preventive_Maintenance", "Restart_Components"]:
-            speed, capacity, health = Maintenance(speed, capacity, health).get_next_most_likely_state(action)
-
-        return f"{avail}_{speed}_{health}_{capacity}"
-
-    def __adjust_secondary_state(self, state, action):
-        avail, speed, health, capacity = state.split("_")
-
-        avail = Availability(avail, health).get_next_second_likely_state(action)
-        speed = Speed(speed).get_next_second_likely_state(action)
-        health = Health(health).get_next_second_likely_state(action)
-        capacity = Capacity(capacity).get_next_second_likely_state(action)
-
-        if action in ["Corrective_Maintenance", "Preventive_Maintenance", "Restart_Components"]:
-            speed, capacity, health = Maintenance(speed, capacity, health).get_next_second_likely_state(action)
-
-        return f"{avail}_{speed}_{health}_{capacity}"
-
 
 env = APIEnv()
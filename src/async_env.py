@@ -0,0 +1,515 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from src.apienv import APIEnv
+
+# Limiares que convertem as medições do serviço nas componentes do estado
+DEFAULT_THRESHOLDS = {
+    "latency_ms": (60.0, 150.0),  # Fast abaixo do primeiro, Medium abaixo do segundo, senão Slow
+    "error_rate": 0.2,  # Fração de respostas 500 a partir da qual a saúde é Error
+    "overload_rate": 0.2,  # Fração de respostas 429 a partir da qual a saúde é Overloaded
+    "capacity": (0.33, 0.66),  # Folga de capacidade: Low abaixo do primeiro, Medium abaixo do segundo
+}
+
+
+class SimulatedAPI:
+    """
+    Estado interno de uma instância da API simulada pelo MockAPIService.
+
+    A instância tem CPU, memória, uma probabilidade de falha ('faults') e uma carga que varia
+    ao longo do tempo. As ações de remediação alteram esses recursos, e cada sondagem responde
+    com latência, erros (500), sobrecarga (429) ou indisponibilidade (503) derivados deles.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.reset()
+
+    def reset(self):
+        # Próximo de Offline_Slow_Error_Medium, o estado inicial do APIEnv
+        self.up = False
+        self.cpu = 0.5
+        self.memory = 3.0
+        self.faults = 0.6
+        self.load = 1.2
+
+    def latency_ms(self):
+        return 40.0 * self.load / self.cpu * (1 + self.faults)
+
+    def headroom(self):
+        return float(np.clip(1 - self.load / self.memory, 0, 1))
+
+    def probe(self):
+        """Devolve (status, latência simulada em ms) de uma sondagem."""
+        if not self.up:
+            return 503, 5.0
+
+        utilization = self.load / self.cpu
+        if utilization > 1 and self.rng.random() < min(utilization - 1, 1):
+            return 429, self.latency_ms()
+        if self.rng.random() < self.faults:
+            return 500, self.latency_ms()
+        return 200, self.latency_ms()
+
+    def apply(self, action):
+        """Aplica uma ação de remediação e avança a deriva da instância."""
+        if action == "Increase_CPU":
+            self.cpu += 1.0
+        elif action == "Increase_CPU_Slightly":
+            self.cpu += 0.5
+        elif action == "Decrease_CPU":
+            self.cpu -= 1.0
+        elif action == "Decrease_CPU_Slightly":
+            self.cpu -= 0.5
+        elif action == "Add_Memory":
+            self.memory += 2.0
+        elif action == "Remove_Memory":
+            self.memory -= 1.0
+        elif action == "Corrective_Maintenance":
+            self.faults *= 0.2
+            self.up = self.up or self.rng.random() < 0.5
+        elif action == "Preventive_Maintenance":
+            self.faults *= 0.7
+        elif action == "Restart_Components":
+            self.up = True
+            self.faults *= 0.5
+            self.load *= 0.8
+        elif action == "Update_Version":
+            self.faults = self.faults * 0.3 if self.rng.random() < 0.7 else self.faults + 0.2
+        elif action == "Rollback_Version":
+            self.faults = 0.1
+        else:
+            raise KeyError(action)
+
+        # Deriva: a carga oscila, falhas se acumulam e a instância pode cair
+        self.load = float(np.clip(self.load * np.exp(self.rng.normal(0, 0.1)), 0.3, 3.0))
+        self.faults = float(np.clip(self.faults + 0.01, 0, 1))
+        if self.up and self.rng.random() < 0.02 + 0.05 * self.faults:
+            self.up = False
+
+        self.cpu = float(np.clip(self.cpu, 0.5, 4.0))
+        self.memory = float(np.clip(self.memory, 1.0, 8.0))
+
+
+class MockAPIService:
+    """
+    Servidor HTTP/1.1 local (asyncio, sem dependências externas) que simula várias instâncias
+    de uma API. A latência das sondagens é um asyncio.sleep real, escalado por 'time_scale'.
+
+    Rotas:
+        POST /instances/<id>/reset              Reinicia a instância.
+        POST /instances/<id>/actions/<ação>     Aplica uma ação de remediação.
+        GET  /instances/<id>/probe              Sondagem: status 200/429/500/503 e {"capacity", "latency_ms"},
+                                                com a latência simulada (sem a escala de tempo).
+
+    Example:
+        async with MockAPIService(seed=0) as service:
+            async with HTTPPool(service.host, service.port, size=64) as pool:
+                ...
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, time_scale=0.1, seed=None):
+        """
+        Args:
+            host, port: Endereço do servidor (porta 0 = escolhida pelo sistema).
+            time_scale: Segundos reais por segundo simulado (0.1 = 10x mais rápido).
+            seed: Semente das instâncias simuladas.
+        """
+        self.host = host
+        self.port = port
+        self.time_scale = time_scale
+        self.seed = seed
+        self.instances = {}
+        self.requests = 0
+        self.server = None
+        self.__handlers = {}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.__handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        for writer in self.__handlers.values():
+            writer.close()
+        await asyncio.gather(*self.__handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def instance(self, instance_id):
+        if instance_id not in self.instances:
+            seed = None if self.seed is None else [self.seed, instance_id]
+            self.instances[instance_id] = SimulatedAPI(np.random.default_rng(seed))
+        return self.instances[instance_id]
+
+    async def __handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.__handlers[task] = writer
+        try:
+            while True:
+                request = await _read_message(reader)
+                if request is None:
+                    break
+                method, path, _ = request
+                status, payload = await self.__route(method, path)
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.__handlers[task]
+            writer.close()
+
+    async def __route(self, method, path):
+        self.requests += 1
+        parts = path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "instances" or not parts[1].isdigit():
+            return 404, {"error": "not found"}
+        instance = self.instance(int(parts[1]))
+
+        if method == "POST" and parts[2] == "reset":
+            instance.reset()
+            return 200, {}
+        if method == "POST" and parts[2] == "actions" and len(parts) == 4:
+            try:
+                instance.apply(parts[3])
+            except KeyError:
+                return 404, {"error": f"unknown action {parts[3]}"}
+            return 200, {}
+        if method == "GET" and parts[2] == "probe":
+            status, latency_ms = instance.probe()
+            await asyncio.sleep(latency_ms / 1000 * self.time_scale)
+            return status, {"capacity": instance.headroom() if instance.up else 0.0, "latency_ms": latency_ms}
+        return 404, {"error": "not found"}
+
+
+class HTTPPool:
+    """
+    Cliente HTTP/1.1 assíncrono com um pool de conexões keep-alive de tamanho fixo.
+
+    No máximo 'size' requisições ficam em voo ao mesmo tempo; as demais esperam uma conexão livre.
+    Se uma conexão reaproveitada do pool tiver sido fechada pelo servidor, ela é descartada e a
+    requisição é reenviada; uma falha numa conexão nova gera ConnectionError.
+    """
+
+    def __init__(self, host, port, size=64):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.__idle = asyncio.Queue()
+        self.__slots = asyncio.Semaphore(size)
+        self.__connections = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        for _, writer in self.__connections:
+            writer.close()
+        await asyncio.gather(*(writer.wait_closed() for _, writer in self.__connections), return_exceptions=True)
+        self.__connections.clear()
+
+    async def request(self, method, path):
+        """
+        Envia uma requisição e devolve (status, payload JSON, latência em segundos). A latência é
+        medida depois de obter uma conexão, então não inclui a espera pelo pool.
+
+        Raises:
+            ConnectionError: Se o servidor encerrar uma conexão nova sem responder.
+        """
+        async with self.__slots:
+            while True:
+                reused = not self.__idle.empty()
+                if reused:
+                    connection = self.__idle.get_nowait()
+                else:
+                    connection = await asyncio.open_connection(self.host, self.port)
+                    self.__connections.append(connection)
+
+                reader, writer = connection
+                start = time.perf_counter()
+                try:
+                    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: 0\r\n\r\n".encode())
+                    await writer.drain()
+                    response = await _read_message(reader)
+                    error = None
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    response, error = None, e
+                latency = time.perf_counter() - start
+
+                if response is not None:
+                    self.__idle.put_nowait(connection)
+                    _, status, body = response
+                    return int(status), json.loads(body) if body else {}, latency
+
+                # Conexão perdida: é descartada. Uma conexão keep-alive ociosa pode ter sido
+                # fechada pelo servidor, então a requisição é reenviada; numa conexão nova, a
+                # falha é do transporte e não uma resposta do serviço (não deve virar um 503)
+                self.__connections.remove(connection)
+                writer.close()
+                if not reused:
+                    raise ConnectionError(f"{method} {path}: conexão encerrada sem resposta") from error
+
+
+class AsyncAPIEnv:
+    """
+    Ambiente assíncrono com a mesma interface do APIEnv (estados, ações, recompensas), mas cujas
+    transições vêm de um serviço HTTP real (tipicamente o MockAPIService).
+
+    Cada passo envia a ação de remediação, faz 'num_probes' sondagens concorrentes e converte a
+    latência, as taxas de erro e de sobrecarga e a folga de capacidade observadas nas componentes
+    do estado (ver DEFAULT_THRESHOLDS). As recompensas são as do ambiente de referência.
+
+    A latência usada é a que o serviço informa no campo "latency_ms" da sondagem; o tempo medido
+    no cliente inclui a disputa pelo event loop entre os ambientes e só é usado (dividido por
+    time_scale) quando o serviço não informa a latência.
+
+    Example:
+        state, info = await env.reset()
+        next_state, reward, done, truncated, info = await env.step(action)
+    """
+
+    def __init__(
+        self,
+        pool,
+        instance_id,
+        env=None,
+        num_probes=5,
+        time_scale=0.1,
+        thresholds=DEFAULT_THRESHOLDS,
+        max_episode_steps=100,
+    ):
+        """
+        Args:
+            pool: HTTPPool conectado ao serviço.
+            instance_id: Instância do serviço controlada por este ambiente.
+            env: APIEnv de referência para estados, ações, recompensas e estados terminais.
+            num_probes: Sondagens por passo.
+            time_scale: Escala de tempo do serviço, para converter a latência medida no cliente em
+                ms simulados quando o serviço não informa "latency_ms".
+            thresholds: Limiares de conversão das medições em componentes do estado.
+            max_episode_steps: Limite de passos por episódio (truncamento).
+        """
+        env = APIEnv() if env is None else env
+        self.pool = pool
+        self.instance_id = instance_id
+        self.num_probes = num_probes
+        self.time_scale = time_scale
+        self.thresholds = thresholds
+        self.max_episode_steps = max_episode_steps
+
+        self.states = env.states
+        self.state_space = env.state_space
+        self.actions = env.actions
+        self.action_space = env.action_space
+        self.states_rewards = env.states_rewards
+        self.action_rewards = env.action_rewards
+        self.terminal_states = getattr(env, "terminal_states", ["Available_Fast_Healthy_High"])
+
+        self.__state_index = {state: s for s, state in enumerate(self.states)}
+        self.elapsed_steps = 0
+        self.state = None
+
+    async def reset(self):
+        await self.pool.request("POST", f"/instances/{self.instance_id}/reset")
+        self.elapsed_steps = 0
+        self.state, measurements = await self.observe()
+        return self.__state_index[self.state], {"measurements": measurements}
+
+    async def step(self, action):
+        action_str = self.actions[action]
+        await self.pool.request("POST", f"/instances/{self.instance_id}/actions/{action_str}")
+        self.state, measurements = await self.observe()
+
+        reward = self.states_rewards.get(self.state, 0) + self.action_rewards.get(action_str, 0)
+        done = self.state in self.terminal_states
+        self.elapsed_steps += 1
+        truncated = not done and self.max_episode_steps is not None and self.elapsed_steps >= self.max_episode_steps
+
+        return self.__state_index[self.state], reward, done, truncated, {"measurements": measurements}
+
+    async def observe(self):
+        """Sonda o serviço e devolve (nome do estado, medições)."""
+        responses = await asyncio.gather(
+            *(self.pool.request("GET", f"/instances/{self.instance_id}/probe") for _ in range(self.num_probes))
+        )
+        statuses = np.array([status for status, _, _ in responses])
+        answered = statuses != 503
+
+        measurements = {
+            "latency_ms": float(
+                np.median(
+                    [
+                        payload.get("latency_ms", latency * 1000 / self.time_scale)
+                        for _, payload, latency in responses
+                    ]
+                )
+            ),
+            "error_rate": float(np.mean(statuses == 500)),
+            "overload_rate": float(np.mean(statuses == 429)),
+            "capacity": float(np.mean([payload.get("capacity", 0.0) for _, payload, _ in responses])),
+            "available": bool(answered.any()),
+        }
+        return self.features(measurements), measurements
+
+    def features(self, measurements):
+        """Converte as medições no nome do estado, ex.: "Available_Fast_Healthy_High"."""
+        fast, medium = self.thresholds["latency_ms"]
+        low, mid = self.thresholds["capacity"]
+
+        availability = "Available" if measurements["available"] else "Offline"
+        if not measurements["available"]:
+            speed = "Slow"
+        elif measurements["latency_ms"] < fast:
+            speed = "Fast"
+        elif measurements["latency_ms"] < medium:
+            speed = "Medium"
+        else:
+            speed = "Slow"
+
+        if not measurements["available"] or measurements["error_rate"] >= self.thresholds["error_rate"]:
+            health = "Error"
+        elif measurements["overload_rate"] >= self.thresholds["overload_rate"]:
+            health = "Overloaded"
+        else:
+            health = "Healthy"
+
+        capacity = measurements["capacity"]
+        capacity = "Low" if capacity < low else "Medium" if capacity < mid else "High"
+        return f"{availability}_{speed}_{health}_{capacity}"
+
+
+async def async_q_learning(envs, num_episodes, alpha=0.1, gamma=0.99, epsilon=0.1, epsilon_decay=0.99):
+    """
+    Q-learning com vários AsyncAPIEnv concorrentes no mesmo event loop, compartilhando uma
+    única tabela Q. Enquanto um ambiente espera o serviço, os outros continuam; como todos rodam
+    na mesma thread, as atualizações de Q não precisam de lock.
+
+    Args:
+        envs: Lista de AsyncAPIEnv.
+        num_episodes: Episódios por ambiente.
+        alpha, gamma, epsilon, epsilon_decay: Como em q_learning (epsilon decai por episódio de cada ambiente).
+
+    Returns:
+        Q: A função valor-ação aprendida.
+        policy: A política derivada da função Q aprendida.
+        total_rewards: Lista com as recompensas totais de cada episódio, na ordem de término.
+    """
+    nA = envs[0].action_space.n
+    Q = np.zeros((envs[0].state_space, nA))
+    total_rewards = []
+
+    async def worker(env):
+        worker_epsilon = epsilon
+        for _ in range(num_episodes):
+            state, _ = await env.reset()
+            done = truncated = False
+            episode_reward = 0
+
+            while not (done or truncated):
+                if np.random.rand() < worker_epsilon:
+                    action = np.random.randint(nA)
+                else:
+                    action = int(np.argmax(Q[state]))
+                next_state, reward, done, truncated, _ = await env.step(action)
+
+                Q[state, action] += alpha * (reward + gamma * np.max(Q[next_state]) * (not done) - Q[state, action])
+                state = next_state
+                episode_reward += reward
+
+            total_rewards.append(episode_reward)
+            worker_epsilon *= epsilon_decay
+
+    await asyncio.gather(*(worker(env) for env in envs))
+
+    policy = np.zeros_like(Q)
+    policy[np.arange(Q.shape[0]), np.argmax(Q, axis=1)] = 1.0
+    return Q, policy, total_rewards
+
+
+async def async_evaluate_policy(envs, policy, num_episodes=1):
+    """Executa uma política (s, a) gulosamente em todos os ambientes e devolve as recompensas por episódio."""
+
+    async def worker(env):
+        rewards = []
+        for _ in range(num_episodes):
+            state, _ = await env.reset()
+            done = truncated = False
+            episode_reward = 0
+            while not (done or truncated):
+                state, reward, done, truncated, _ = await env.step(int(np.argmax(policy[state])))
+                episode_reward += reward
+            rewards.append(episode_reward)
+        return rewards
+
+    results = await asyncio.gather(*(worker(env) for env in envs))
+    return [reward for rewards in results for reward in rewards]
+
+
+def train_against_mock_service(num_envs=200, num_episodes=5, pool_size=64, time_scale=0.1, seed=None, **params):
+    """
+    Sobe um MockAPIService local, cria 'num_envs' AsyncAPIEnv sobre um único pool e treina
+    com async_q_learning num único event loop.
+
+    Returns:
+        Q, policy, total_rewards como em async_q_learning, e um dicionário de métricas com o
+        tempo total, o número de requisições atendidas e a vazão.
+    """
+
+    async def main():
+        async with MockAPIService(time_scale=time_scale, seed=seed) as service:
+            async with HTTPPool(service.host, service.port, pool_size) as pool:
+                envs = [AsyncAPIEnv(pool, i, time_scale=time_scale) for i in range(num_envs)]
+                start = time.perf_counter()
+                Q, policy, total_rewards = await async_q_learning(envs, num_episodes, **params)
+                elapsed = time.perf_counter() - start
+                metrics = {
+                    "elapsed": elapsed,
+                    "requests": service.requests,
+                    "requests_per_second": service.requests / elapsed,
+                }
+                return Q, policy, total_rewards, metrics
+
+    return asyncio.run(main())
+
+
+async def _read_message(reader):
+    """
+    Lê uma requisição ou resposta HTTP/1.1 com Content-Length. Devolve (método ou versão,
+    caminho ou status, corpo), ou None se a conexão foi encerrada.
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    first, second, _ = (start_line.decode().rstrip("\r\n") + "  ").split(" ", 2)
+
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+
+    body = await reader.readexactly(length) if length else b""
+    return first, second, body
+
+
+_REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
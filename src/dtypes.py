@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class DTypePolicy:
+    """
+    Tipos numéricos usados pelo modelo do ambiente e pelos algoritmos.
+
+    REFERENCE mantém o comportamento original (float64/int64). COMPACT usa float32 para
+    valores e probabilidades, o menor inteiro que comporta os índices de estado e uint8
+    para ações, reduzindo pela metade (ou mais) a memória das tabelas.
+    """
+
+    def __init__(self, values=np.float64, probabilities=np.float64, states=np.int64, actions=np.int64):
+        """
+        Args:
+            values: Tipo de V, Q e das matrizes de política.
+            probabilities: Tipo das probabilidades de transição.
+            states: Tipo dos índices de estado (tabela de sucessores).
+            actions: Tipo dos índices de ação (políticas compactas).
+        """
+        self.values = np.dtype(values)
+        self.probabilities = np.dtype(probabilities)
+        self.states = np.dtype(states)
+        self.actions = np.dtype(actions)
+
+    @classmethod
+    def compact(cls, num_states=2**15 - 1, num_actions=255):
+        """Política compacta: float32 e os menores inteiros que comportam num_states/num_actions."""
+        return cls(
+            values=np.float32,
+            probabilities=np.float32,
+            states=np.min_scalar_type(-num_states),
+            actions=np.min_scalar_type(num_actions),
+        )
+
+    def cast_model(self, next_states, probabilities):
+        """Converte a tabela de sucessores e as probabilidades (sem copiar se já estiverem no tipo certo)."""
+        if next_states.max(initial=0) > np.iinfo(self.states).max:
+            raise ValueError(f"Índices de estado não cabem em {self.states}.")
+        return next_states.astype(self.states, copy=False), probabilities.astype(self.probabilities, copy=False)
+
+    def compact_policy(self, policy):
+        """Converte uma matriz de política (s, a) em um vetor (s,) com a ação gulosa de cada estado."""
+        return np.argmax(policy, axis=1).astype(self.actions)
+
+    def __repr__(self):
+        return (
+            f"DTypePolicy(values={self.values}, probabilities={self.probabilities}, "
+            f"states={self.states}, actions={self.actions})"
+        )
+
+
+REFERENCE = DTypePolicy()
+COMPACT = DTypePolicy.compact()
+
+
+def resolve_dtypes(dtypes):
+    """Aceita None (REFERENCE), "reference", "compact" ou um DTypePolicy."""
+    if dtypes is None or dtypes == "reference":
+        return REFERENCE
+    if dtypes == "compact":
+        return COMPACT
+    if isinstance(dtypes, DTypePolicy):
+        return dtypes
+    raise ValueError(f"dtypes inválido: {dtypes!r}. Use None, 'reference', 'compact' ou um DTypePolicy.")
+
+
+def convergence_threshold(theta, V):
+    """
+    Limiar de convergência efetivo para V. Em float32 a variação entre varreduras não fica
+    abaixo de alguns ULPs de max|V|, então theta é elevado até essa resolução para que a
+    iteração termine; em float64 o limiar continua sendo theta.
+    """
+    if not np.issubdtype(V.dtype, np.floating):
+        return theta
+    return max(theta, 4 * np.finfo(V.dtype).eps * float(np.max(np.abs(V), initial=0.0)))
+
+
+def validate_dtypes(env, dtypes=COMPACT, discount_factor=0.9, theta=0.000001, rtol=1e-4, atol=1e-2):
+    """
+    Compara a solução do value_iteration com 'dtypes' contra a referência float64.
+
+    Returns:
+        Um dicionário com o erro máximo (absoluto e relativo) de V, a fração de estados com a
+        mesma ação gulosa, a memória do modelo em cada configuração e 'within_tolerance'.
+    """
+    from src.algorithms.dynamic_programming.value_iteration import value_iteration
+
+    dtypes = resolve_dtypes(dtypes)
+    reference_env = env.astype(REFERENCE)
+    compact_env = env.astype(dtypes)
+
+    reference_policy, reference_V, _ = value_iteration(reference_env, theta, discount_factor, dtypes=REFERENCE)
+    policy, V, _ = value_iteration(compact_env, theta, discount_factor, dtypes=dtypes)
+
+    error = np.abs(V.astype(np.float64) - reference_V)
+    return {
+        "dtypes": repr(dtypes),
+        "max_abs_error": float(error.max()),
+        "max_rel_error": float(np.max(error / np.maximum(np.abs(reference_V), 1e-12))),
+        "policy_agreement": float(np.mean(np.argmax(policy, axis=1) == np.argmax(reference_policy, axis=1))),
+        "reference_model_bytes": reference_env.next_state_indices.nbytes + reference_env.next_state_probabilities.nbytes,
+        "model_bytes": compact_env.next_state_indices.nbytes + compact_env.next_state_probabilities.nbytes,
+        "reference_value_bytes": reference_V.nbytes,
+        "value_bytes": V.nbytes,
+        "within_tolerance": bool(np.allclose(V, reference_V, rtol=rtol, atol=atol)),
+    }
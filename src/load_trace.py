@@ -0,0 +1,172 @@
+import numpy as np
+
+from src.apienv import APIEnv
+
+
+class LoadTrace:
+    """Streams an on-disk request-rate trace through a memory-mapped array, one chunk at a time."""
+
+    def __init__(self, path, nominal_rate=None, dtype=np.float32, chunk_size=65536, offset=0):
+        """
+        Args:
+            path: Arquivo .npy ou binário bruto (ex.: gerado com ndarray.tofile) com a taxa de requisições.
+            nominal_rate: Taxa considerada normal. Se None, o trace já contém o fator de carga (1.0 = nominal).
+            dtype: Tipo dos valores quando o arquivo é binário bruto.
+            chunk_size: Número de amostras copiadas para memória por leitura.
+            offset: Posição inicial no trace.
+        """
+        if str(path).endswith(".npy"):
+            self.data = np.load(path, mmap_mode="r")
+        else:
+            self.data = np.memmap(path, dtype=dtype, mode="r")
+
+        if len(self.data) == 0:
+            raise ValueError(f"O trace '{path}' está vazio.")
+
+        self.nominal_rate = nominal_rate or 1.0
+        self.chunk_size = chunk_size
+        self.position = offset % len(self.data)
+
+        self.__chunk = np.empty(0, dtype=np.float64)
+        self.__chunk_position = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def window(self, start, length):
+        """
+        Lê 'length' fatores de carga a partir de 'start', voltando ao início do trace quando necessário.
+        Somente as páginas tocadas do arquivo são carregadas.
+        """
+        indices = (start + np.arange(length)) % len(self.data)
+        return np.asarray(self.data[indices], dtype=np.float64) / self.nominal_rate
+
+    def next(self, n=1):
+        """
+        Avança o trace em 'n' amostras e devolve os fatores de carga correspondentes.
+        """
+        loads = np.empty(n, dtype=np.float64)
+        filled = 0
+
+        while filled < n:
+            if self.__chunk_position == len(self.__chunk):
+                self.__chunk = self.window(self.position, self.chunk_size)
+                self.__chunk_position = 0
+                self.position = (self.position + self.chunk_size) % len(self.data)
+
+            taken = min(n - filled, len(self.__chunk) - self.__chunk_position)
+            loads[filled : filled + taken] = self.__chunk[
+                self.__chunk_position : self.__chunk_position + taken
+            ]
+            self.__chunk_position += taken
+            filled += taken
+
+        return loads
+
+
+class LoadTraceAPIEnv(APIEnv):
+    """APIEnv whose transitions and rewards are modulated by an exogenous load trace."""
+
+    def __init__(self, trace, load_sensitivity=0.5, reward_sensitivity=1.0, **kwargs):
+        """
+        Args:
+            trace: LoadTrace que fornece o fator de carga de cada passo.
+            load_sensitivity: Fração da probabilidade da transição principal desviada para a
+                transição secundária por unidade de carga acima do nominal.
+            reward_sensitivity: Amplificação das recompensas negativas dos estados por unidade
+                de carga acima do nominal.
+            **kwargs: Argumentos repassados para o APIEnv.
+        """
+        super(LoadTraceAPIEnv, self).__init__(**kwargs)
+
+        self.trace = trace
+        self.load_sensitivity = load_sensitivity
+        self.reward_sensitivity = reward_sensitivity
+        self.load = 1.0
+
+        self.__state_index = {state: s for s, state in enumerate(self.states)}
+        self.__state_rewards = np.array([self.states_rewards[state] for state in self.states])
+        self.__action_penalties = np.array([self.action_rewards.get(a, 0) for a in self.actions])
+        self.__terminal_states = np.array([self.states.index(state) for state in self.terminal_states])
+
+    def reset(self):
+        state, info = super(LoadTraceAPIEnv, self).reset()
+        return state, {**info, "load": self.load}
+
+    def step(self, action):
+        state = self.__state_index[self.state]
+        self.load = self.trace.next()[0]
+
+        next_states, rewards, done = self.step_batch(
+            np.array([state]), np.array([action]), np.array([self.load])
+        )
+        next_state = int(next_states[0])
+        self.state = self.states[next_state]
+        self.elapsed_steps += 1
+
+        done = bool(done[0])
+        info = {"action_mask": self.action_mask[next_state], "load": self.load}
+        return next_state, rewards[0].item(), done, self.is_truncated(done), info
+
+    def step_batch(self, states, actions, loads=None):
+        """
+        Executa um passo vetorizado para N instâncias independentes do ambiente.
+
+        Args:
+            states: Array (n,) com os índices dos estados atuais.
+            actions: Array (n,) com os índices das ações.
+            loads: Array (n,) com o fator de carga de cada instância. Se None, o trace avança
+                um passo e todas as instâncias compartilham a mesma carga.
+
+        Returns:
+            next_states: Array (n,) com os índices dos próximos estados.
+            rewards: Array (n,) com as recompensas.
+            done: Array (n,) booleano indicando estados terminais (self.terminal_states).
+
+        Com um modelo estimado (transition_rewards), a recompensa de cada transição é a observada,
+        que já inclui a ação, e a carga amplifica as negativas como nas recompensas de estado.
+        """
+        if loads is None:
+            loads = np.full(len(states), self.trace.next()[0])
+
+        probabilities = self.modulate_probabilities(
+            self.next_state_probabilities[states, actions], loads
+        )
+
+        # Amostragem inversa da distribuição acumulada de cada instância
+        cumulative = np.cumsum(probabilities, axis=-1)
+        u = np.random.random(len(states))[:, None] * cumulative[:, -1:]
+        outcome = np.minimum((u >= cumulative).sum(axis=-1), probabilities.shape[-1] - 1)
+        next_states = self.next_state_indices[states, actions, outcome]
+
+        if self.transition_rewards is not None:
+            rewards = self.modulate_rewards(self.transition_rewards[states, actions, outcome], loads)
+        else:
+            rewards = self.modulate_rewards(self.__state_rewards[next_states], loads)
+            rewards = rewards + self.__action_penalties[actions]
+
+        return next_states, rewards, np.isin(next_states, self.__terminal_states)
+
+    def modulate_probabilities(self, probabilities, loads):
+        """
+        Desvia parte da probabilidade da transição principal para a secundária conforme a carga.
+
+        Args:
+            probabilities: Array (..., 3) com as probabilidades (principal, secundária, permanência).
+            loads: Array com o fator de carga, broadcastável para probabilities[..., 0].
+        """
+        pressure = np.maximum(np.asarray(loads, dtype=float) - 1.0, 0.0)
+        shift = probabilities[..., 0] * np.minimum(self.load_sensitivity * pressure, 1.0)
+
+        modulated = probabilities.copy()
+        modulated[..., 0] -= shift
+        modulated[..., 1] += shift
+        return modulated
+
+    def modulate_rewards(self, state_rewards, loads):
+        """
+        Amplifica as recompensas negativas dos estados quando a carga está acima do nominal.
+        """
+        pressure = np.maximum(np.asarray(loads, dtype=float) - 1.0, 0.0)
+        scale = np.where(state_rewards < 0, 1.0 + self.reward_sensitivity * pressure, 1.0)
+        return state_rewards * scale
@@ -0,0 +1,294 @@
+"""
+Headless experiment runner.
+
+Usage:
+    python -m src.runner experiment.yaml --output results --workers 4 [--timing] [--profile]
+
+The spec (YAML or JSON) describes the environment and one or more runs:
+
+    env:
+      seed: 0
+      max_episode_steps: 200
+    evaluation:
+      episodes: 100
+    runs:
+      - algorithm: q_learning
+        params: {num_episodes: 2000, alpha: 0.1}
+        seeds: [0, 1, 2]
+      - algorithm: value_iteration
+        params: {discount_factor: 0.9}
+
+Each (run, seed) pair is executed in its own process and writes metrics.json, artifacts.npz
+and the algorithm log to <output>/<run name>/seed_<seed>/. A summary of all runs is written
+to <output>/summary.json.
+"""
+import argparse
+import contextlib
+import cProfile
+import importlib
+import json
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Algoritmos disponíveis: nome -> (módulo, função, recebe num_episodes)
+ALGORITHMS = {
+    "value_iteration": ("src.algorithms.dynamic_programming.value_iteration", "value_iteration", False),
+    "policy_improvement": ("src.algorithms.dynamic_programming.policy_evaluation", "policy_improvement", False),
+    "q_learning": ("src.algorithms.temporal_difference.q_learning", "q_learning", True),
+    "sarsa": ("src.algorithms.temporal_difference.sarsa", "sarsa_learning", True),
+    "expected_sarsa": ("src.algorithms.temporal_difference.expected_sarsa", "expected_sarsa_learning", True),
+    "sarsa_lambda": ("src.algorithms.temporal_difference.eligibility_traces", "sarsa_lambda", True),
+    "q_lambda": ("src.algorithms.temporal_difference.eligibility_traces", "q_lambda", True),
+    "prioritized_q_learning": (
+        "src.algorithms.temporal_difference.prioritized_replay",
+        "prioritized_q_learning",
+        True,
+    ),
+    "linear_td": ("src.algorithms.temporal_difference.linear_approximation", "linear_td_learning", True),
+    "mc_control": ("src.algorithms.monte_carlo.epsilon_greedy_control", "mc_control_epsilon_greedy", True),
+    "mc_control_parallel": ("src.algorithms.monte_carlo.parallel_control", "mc_control_parallel", True),
+}
+
+
+def load_spec(path):
+    """
+    Lê a especificação do experimento em YAML (requer PyYAML) ou JSON.
+    """
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("PyYAML é necessário para specs YAML: pip install pyyaml") from e
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+
+    if "runs" not in spec:
+        spec["runs"] = [{key: spec[key] for key in ("algorithm", "params", "seeds", "name") if key in spec}]
+
+    return spec
+
+
+def build_jobs(spec, output_dir, timing=False, profile=False):
+    """
+    Expande a especificação em uma lista de jobs independentes, um por (run, seed).
+    """
+    jobs = []
+    for i, run in enumerate(spec["runs"]):
+        if run["algorithm"] not in ALGORITHMS:
+            raise ValueError(f"Algoritmo desconhecido '{run['algorithm']}'. Opções: {sorted(ALGORITHMS)}")
+
+        name = run.get("name", f"{i:02d}_{run['algorithm']}")
+        for seed in run.get("seeds", [0]):
+            jobs.append(
+                {
+                    "name": name,
+                    "algorithm": run["algorithm"],
+                    "params": run.get("params", {}),
+                    "seed": seed,
+                    "env": spec.get("env", {}),
+                    "evaluation": spec.get("evaluation", {}),
+                    "output_dir": os.path.join(output_dir, name, f"seed_{seed}"),
+                    "timing": timing,
+                    "profile": profile,
+                }
+            )
+    return jobs
+
+
+def run_job(job):
+    """
+    Executa um job: constrói o ambiente, treina/resolve, avalia a política e grava métricas e artefatos.
+    """
+    from src.apienv import APIEnv
+
+    os.makedirs(job["output_dir"], exist_ok=True)
+    random.seed(job["seed"])
+    np.random.seed(job["seed"])
+
+    env_config = dict(job["env"])
+    env_config.setdefault("seed", job["seed"])
+    env = APIEnv(**env_config)
+
+    module_name, function_name, episodic = ALGORITHMS[job["algorithm"]]
+    algorithm = getattr(importlib.import_module(module_name), function_name)
+
+    step_timer = _instrument_env(env) if job["timing"] else None
+    profiler = cProfile.Profile() if job["profile"] else None
+    if job["profile"]:
+        tracemalloc.start()
+
+    log_path = os.path.join(job["output_dir"], "log.txt")
+    with open(log_path, "w") as log, contextlib.redirect_stdout(log):
+        start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+
+        result = algorithm(env, **job["params"])
+
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+    # Algoritmos de DP devolvem (policy, V, ...); os de aprendizado devolvem (Q, policy, ...)
+    if episodic:
+        values, policy, training_rewards = result[:3]
+    else:
+        policy, values, training_rewards = result[:3]
+
+    metrics = {
+        "name": job["name"],
+        "algorithm": job["algorithm"],
+        "seed": job["seed"],
+        "params": job["params"],
+        "elapsed_seconds": elapsed,
+        "training_iterations": len(training_rewards),
+    }
+
+    if step_timer is not None:
+        metrics["timing"] = step_timer.summary(elapsed)
+        step_timer.restore()
+
+    if job["profile"]:
+        metrics["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        _write_profile(job["output_dir"], profiler, tracemalloc.take_snapshot())
+        tracemalloc.stop()
+
+    policy_matrix = _policy_matrix(policy, env.state_space, env.action_space.n)
+    evaluation = job["evaluation"]
+    eval_rewards = evaluate_policy(
+        env, policy_matrix, evaluation.get("episodes", 100), evaluation.get("max_steps", 100)
+    )
+    metrics["eval_mean_reward"] = float(np.mean(eval_rewards))
+    metrics["eval_std_reward"] = float(np.std(eval_rewards))
+
+    np.savez(
+        os.path.join(job["output_dir"], "artifacts.npz"),
+        policy=policy_matrix,
+        training_rewards=np.asarray(training_rewards, dtype=float),
+        eval_rewards=np.asarray(eval_rewards, dtype=float),
+        **({"values": values} if isinstance(values, np.ndarray) else {}),
+    )
+    with open(os.path.join(job["output_dir"], "metrics.json"), "w") as f:
+        json.dump(metrics, f, indent=2, default=float)
+
+    return metrics
+
+
+def evaluate_policy(env, policy, num_episodes=100, max_steps=100):
+    """
+    Executa a política gulosa sem renderização e devolve a recompensa total de cada episódio.
+    """
+    totals = []
+    for _ in range(num_episodes):
+        state, _ = env.reset()
+        total_reward = 0
+        for _ in range(max_steps):
+            state, reward, done, truncated, _ = env.step(np.argmax(policy[state]))
+            total_reward += reward
+            if done or truncated:
+                break
+        totals.append(total_reward)
+    return totals
+
+
+class _StepTimer:
+    """Mede o tempo gasto em env.step/env.reset para separá-lo do tempo do próprio algoritmo."""
+
+    def __init__(self, env):
+        self.env = env
+        self.calls = {"step": 0, "reset": 0}
+        self.seconds = {"step": 0.0, "reset": 0.0}
+
+    def wrap(self, name):
+        method = getattr(self.env, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+
+        setattr(self.env, name, timed)
+
+    def restore(self):
+        for name in self.calls:
+            self.env.__dict__.pop(name, None)
+
+    def summary(self, elapsed):
+        env_seconds = sum(self.seconds.values())
+        return {
+            "env_steps": self.calls["step"],
+            "env_resets": self.calls["reset"],
+            "env_step_seconds": self.seconds["step"],
+            "env_reset_seconds": self.seconds["reset"],
+            "algorithm_seconds": elapsed - env_seconds,
+            "steps_per_second": self.calls["step"] / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def _instrument_env(env):
+    timer = _StepTimer(env)
+    timer.wrap("step")
+    timer.wrap("reset")
+    return timer
+
+
+def _write_profile(output_dir, profiler, snapshot, limit=30):
+    profiler.dump_stats(os.path.join(output_dir, "profile.prof"))
+    with open(os.path.join(output_dir, "profile.txt"), "w") as f:
+        pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(limit)
+
+    with open(os.path.join(output_dir, "memory.txt"), "w") as f:
+        for stat in snapshot.statistics("lineno")[:limit]:
+            f.write(f"{stat}\n")
+
+
+def _policy_matrix(policy, num_states, num_actions):
+    if isinstance(policy, dict):
+        # Estados nunca visitados recebem política uniforme
+        matrix = np.full((num_states, num_actions), 1.0 / num_actions)
+        for state, probabilities in policy.items():
+            matrix[state] = probabilities
+        return matrix
+    return np.asarray(policy, dtype=float)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa experimentos do APIEnv sem interface gráfica.")
+    parser.add_argument("spec", help="Arquivo YAML/JSON com a especificação do experimento.")
+    parser.add_argument("--output", default="results", help="Diretório de saída (padrão: results).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Número de processos.")
+    parser.add_argument("--timing", action="store_true", help="Mede o tempo gasto no ambiente vs. no algoritmo.")
+    parser.add_argument("--profile", action="store_true", help="Grava perfis cProfile e tracemalloc por run.")
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    jobs = build_jobs(spec, args.output, timing=args.timing, profile=args.profile)
+    os.makedirs(args.output, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = []
+        for metrics in executor.map(run_job, jobs):
+            print(
+                f"{metrics['name']} seed={metrics['seed']}: "
+                f"eval {metrics['eval_mean_reward']:.3f} ± {metrics['eval_std_reward']:.3f} "
+                f"({metrics['elapsed_seconds']:.2f}s)"
+            )
+            results.append(metrics)
+
+    with open(os.path.join(args.output, "summary.json"), "w") as f:
+        json.dump(results, f, indent=2, default=float)
+
+
+if __name__ == "__main__":
+    main()
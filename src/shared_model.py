@@ -0,0 +1,158 @@
+import gc
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src.apienv import APIEnv
+from src.state_transitions.model import TransitionModel
+
+_FIELDS = ("next_states", "probabilities", "state_rewards", "action_penalties")
+_OPTIONAL_FIELDS = ("transition_rewards",)
+_ALIGNMENT = 64
+
+
+class SharedModel:
+    """
+    TransitionModel published once into multiprocessing.shared_memory.
+
+    The publishing process calls SharedModel.publish(model) and sends the small, picklable
+    'descriptor' to the workers, which call SharedModel.attach(descriptor) to get read-only
+    NumPy views over the same memory, with no copying or pickling of the arrays.
+
+    Example:
+        with SharedModel.publish(TransitionModel.from_env(env)) as shared:
+            with multiprocessing.Pool(64, initializer=worker_init, initargs=(shared.descriptor,)) as pool:
+                ...
+    """
+
+    def __init__(self, shm, layout, owner):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.__unlinked = False
+
+        # Referências ao mmap antes de criar as views: cada array sobre o bloco acrescenta uma
+        self.__baseline_references = sys.getrefcount(shm.buf.obj)
+
+        arrays = {
+            field: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for field, dtype, shape, offset in layout
+        }
+        if not owner:
+            for array in arrays.values():
+                array.flags.writeable = False
+
+        self.model = TransitionModel(
+            *(arrays[field] for field in _FIELDS),
+            **{field: arrays.get(field) for field in _OPTIONAL_FIELDS},
+        )
+
+    @classmethod
+    def publish(cls, model, name=None):
+        """
+        Copia o modelo uma única vez para um novo bloco de memória compartilhada.
+
+        Args:
+            model: TransitionModel a ser publicado. transition_rewards (modelos estimados) é
+                publicado junto quando não for None.
+            name: Nome do bloco de memória compartilhada (padrão: gerado pelo sistema).
+        """
+        fields = _FIELDS + tuple(field for field in _OPTIONAL_FIELDS if getattr(model, field) is not None)
+
+        layout = []
+        offset = 0
+        for field in fields:
+            array = np.ascontiguousarray(getattr(model, field))
+            layout.append((field, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+        shared = cls(shm, layout, owner=True)
+        for field in fields:
+            getattr(shared.model, field)[...] = getattr(model, field)
+
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """
+        Anexa um modelo publicado, devolvendo views somente leitura.
+
+        Args:
+            descriptor: Tupla (nome, layout) obtida de SharedModel.descriptor.
+        """
+        name, layout = descriptor
+
+        # Somente o processo que publicou é responsável por remover o bloco. Antes do Python 3.13
+        # não há track=False, mas processos filhos compartilham o resource_tracker do processo
+        # que publicou, então o novo registro não remove o bloco quando o worker encerra.
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+
+        return cls(shm, layout, owner=False)
+
+    @property
+    def descriptor(self):
+        return self.shm.name, self.layout
+
+    def close(self):
+        """
+        Libera as views deste processo e, se for o dono, remove o bloco de memória compartilhada.
+
+        Os ambientes criados por attach_env (e qualquer array obtido de self.model) apontam para o
+        bloco sem cópia e devem ser descartados antes: enquanto existirem, o bloco não pode ser
+        fechado. Nesse caso o dono ainda remove o nome do bloco (a memória é liberada quando as
+        últimas views deixarem de existir) e close() pode ser chamado de novo depois.
+
+        Raises:
+            BufferError: Se ainda houver views do bloco neste processo.
+        """
+        self.model = None
+        try:
+            # O NumPy não mantém o buffer exportado, então o mmap fecharia sob as views e o próximo
+            # acesso a elas derrubaria o processo; as views vivas são detectadas pelas referências
+            if self.shm.buf is not None and sys.getrefcount(self.shm.buf.obj) > self.__baseline_references:
+                gc.collect()
+                if sys.getrefcount(self.shm.buf.obj) > self.__baseline_references:
+                    raise BufferError
+            self.shm.close()
+        except BufferError as error:
+            raise BufferError(
+                f"O bloco '{self.shm.name}' ainda tem views neste processo (ambientes de attach_env ou "
+                "arrays do modelo); descarte-as antes de chamar close()."
+            ) from error
+        finally:
+            if self.owner and not self.__unlinked:
+                self.shm.unlink()
+                self.__unlinked = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            self.close()
+        except BufferError:
+            # Não esconde a exceção que já está encerrando o bloco 'with'
+            if exc_type is None:
+                raise
+
+
+def attach_env(descriptor, **env_kwargs):
+    """
+    Cria um APIEnv que usa o modelo publicado em memória compartilhada em vez de gerar o seu.
+
+    Args:
+        descriptor: Tupla (nome, layout) obtida de SharedModel.descriptor.
+        **env_kwargs: Argumentos repassados para o APIEnv (ex.: max_episode_steps). As recompensas
+            e penalidades devem ser as mesmas usadas pelo ambiente que publicou o modelo.
+    """
+    shared = SharedModel.attach(descriptor)
+    env = APIEnv(model=shared.model, **env_kwargs)
+
+    # Mantém o bloco anexado enquanto o ambiente existir
+    env.shared_model = shared
+    return env
@@ -0,0 +1,231 @@
+import numpy as np
+
+from src.state_transitions.model import TransitionModel
+
+
+class EmpiricalModel:
+    """
+    Modelo de transição estimado incrementalmente a partir de transições observadas.
+
+    Mantém, apenas para as transições (s, a, s') já observadas, contagens e somas de
+    recompensa num formato esparso (as células ordenadas e os valores alinhados), atualizados
+    em lote por ingest(); a memória cresce com o número de transições distintas, não com
+    s * a * s'. Com decay < 1, as contagens antigas são multiplicadas por 'decay' a cada
+    lote, de modo que o modelo acompanha mudanças na dinâmica. to_model() emite um
+    TransitionModel com as recompensas observadas (transition_rewards), recalculando apenas
+    os pares (s, a) que receberam dados desde a última chamada.
+
+    Example:
+        estimator = EmpiricalModel.for_env(env, decay=0.999)
+        for chunk in logs:
+            estimator.ingest(chunk["states"], chunk["actions"], chunk["rewards"], chunk["next_states"])
+        env = APIEnv(model=estimator.to_model(fallback=TransitionModel.from_env(env)))
+    """
+
+    def __init__(self, num_states, num_actions, decay=1.0, dtype=np.float64):
+        """
+        Args:
+            num_states: Número de estados.
+            num_actions: Número de ações.
+            decay: Fator aplicado às contagens antes de cada lote (1.0 = sem esquecimento).
+            dtype: Tipo das contagens e das somas de recompensa (padrão: float64). float32 economiza
+                memória, mas uma contagem para de crescer em 2**24 (16.777.216) observações por
+                célula e a variância das recompensas perde precisão; use-o apenas com decay < 1 ou
+                fluxos curtos.
+        """
+        if not 0 < decay <= 1:
+            raise ValueError(f"decay deve estar em (0, 1], recebido {decay}.")
+
+        self.num_states = num_states
+        self.num_actions = num_actions
+        self.decay = decay
+
+        # Células observadas, (s * a_total + a) * s_total + s', em ordem crescente, e os
+        # valores acumulados de cada uma
+        self.cells = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=dtype)
+        self.reward_sums = np.zeros(0, dtype=dtype)
+        self.reward_squares = np.zeros(0, dtype=dtype)
+
+        # Pares (s, a) alterados desde o último to_model()
+        self.dirty = np.ones((num_states, num_actions), dtype=bool)
+        self.__model = None
+
+    @classmethod
+    def for_env(cls, env, decay=1.0, dtype=np.float64):
+        return cls(env.state_space, env.action_space.n, decay, dtype)
+
+    def ingest(self, states, actions, rewards, next_states):
+        """
+        Acumula um lote de transições observadas.
+
+        Args:
+            states, actions, rewards, next_states: Arrays (n,) com as transições do lote.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=float)
+        next_states = np.asarray(next_states, dtype=np.int64)
+
+        # O esquecimento escala todas as contagens igualmente, então não altera as
+        # probabilidades nem as médias já emitidas: nenhum par fica "sujo" por causa dele
+        if self.decay < 1:
+            self.counts *= self.decay
+            self.reward_sums *= self.decay
+            self.reward_squares *= self.decay
+
+        cells = (states * self.num_actions + actions) * self.num_states + next_states
+        cells, inverse = np.unique(cells, return_inverse=True)
+        inverse = inverse.ravel()
+        batch = (
+            np.bincount(inverse, minlength=len(cells)),
+            np.bincount(inverse, weights=rewards, minlength=len(cells)),
+            np.bincount(inverse, weights=rewards**2, minlength=len(cells)),
+        )
+
+        # Soma nas células já conhecidas e insere as novas mantendo a ordem
+        position = np.searchsorted(self.cells, cells)
+        known = position < len(self.cells)
+        known[known] = self.cells[position[known]] == cells[known]
+
+        for name, values in zip(("counts", "reward_sums", "reward_squares"), batch):
+            stored = getattr(self, name)
+            stored[position[known]] += values[known].astype(stored.dtype)
+            setattr(self, name, np.insert(stored, position[~known], values[~known].astype(stored.dtype)))
+        self.cells = np.insert(self.cells, position[~known], cells[~known])
+
+        self.dirty[states, actions] = True
+
+    def update(self, state, action, reward, next_state):
+        """Acumula uma única transição."""
+        self.ingest([state], [action], [reward], [next_state])
+
+    def ingest_chunks(self, chunks):
+        """
+        Consome um iterável de lotes (ex.: leitura de um log em blocos), cada um um dicionário
+        com states, actions, rewards e next_states.
+        """
+        for chunk in chunks:
+            self.ingest(chunk["states"], chunk["actions"], chunk["rewards"], chunk["next_states"])
+        return self
+
+    def visits(self):
+        """Contagem (efetiva, com decaimento) de cada par (s, a)."""
+        pairs = self.cells // self.num_states
+        visits = np.bincount(pairs, weights=self.counts, minlength=self.num_states * self.num_actions)
+        return visits.reshape(self.num_states, self.num_actions)
+
+    def probabilities(self):
+        """Probabilidades estimadas (s, a, s'), em array denso; pares nunca visitados ficam com zeros."""
+        visits = self.visits().reshape(-1)[self.cells // self.num_states]
+        return self.__dense(self.counts / visits)
+
+    def confidence_intervals(self, z=1.96):
+        """
+        Intervalos de confiança das probabilidades (Wilson) e das recompensas médias (normal).
+
+        Args:
+            z: Quantil da normal (1.96 para 95%).
+
+        Returns:
+            Um dicionário com "probabilities" e "rewards", cada um uma tupla (lower, upper) de
+            arrays densos (s, a, s'). Onde não há dados, o intervalo é [0, 1] para probabilidades
+            e [-inf, inf] para recompensas.
+        """
+        n = self.visits()[..., None].astype(float)
+        p = self.probabilities().astype(float)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            center = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+            half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+            lower = np.where(n > 0, np.clip(center - half, 0, 1), 0.0)
+            upper = np.where(n > 0, np.clip(center + half, 0, 1), 1.0)
+
+        counts = self.counts.astype(float)
+        mean = self.reward_sums / counts
+        variance = np.maximum(self.reward_squares / counts - mean**2, 0)
+        reward_half = z * np.sqrt(variance / counts)
+
+        return {
+            "probabilities": (lower, upper),
+            "rewards": (self.__dense(mean - reward_half, -np.inf), self.__dense(mean + reward_half, np.inf)),
+        }
+
+    def to_model(self, fallback=None):
+        """
+        Emite o TransitionModel estimado, com k = maior número de sucessores observados num par.
+
+        Só os pares (s, a) alterados desde a última chamada são recalculados, a menos que k
+        tenha aumentado, caso em que o modelo é reconstruído. Cada chamada devolve um modelo
+        novo (cópia do estado interno): ambientes já criados não veem os dados ingeridos
+        depois, então crie um novo APIEnv(model=...) a cada atualização.
+
+        Args:
+            fallback: TransitionModel usado nos pares (s, a) sem nenhuma observação. Sem ele,
+                esses pares ficam no próprio estado com recompensa 0.
+        """
+        pairs = self.cells // self.num_states
+        k = max(int(np.bincount(pairs).max()) if len(pairs) else 0, 1)
+        if fallback is not None:
+            k = max(k, fallback.next_states.shape[-1])
+
+        model = self.__model
+        if model is None or model.next_states.shape[-1] < k:
+            shape = (self.num_states, self.num_actions, k)
+            model = TransitionModel(
+                np.zeros(shape, dtype=np.int64),
+                np.zeros(shape),
+                np.zeros(self.num_states),
+                np.zeros(self.num_actions),
+                np.zeros(shape),
+            )
+            self.dirty[:] = True
+
+        s, a = np.nonzero(self.dirty)
+        visits = self.visits()[s, a]
+
+        # Sucessores sem observação apontam para o próprio estado, com probabilidade 0
+        model.next_states[s, a] = s[:, None]
+        model.probabilities[s, a] = 0.0
+        model.transition_rewards[s, a] = 0.0
+
+        # Os k sucessores mais frequentes de cada par sujo, em ordem decrescente de contagem
+        selected = np.flatnonzero(self.dirty.reshape(-1)[pairs])
+        successors = self.cells[selected] % self.num_states
+        counts = self.counts[selected].astype(float)
+        order = np.lexsort((successors, -counts, pairs[selected]))
+        selected, successors, counts = selected[order], successors[order], counts[order]
+
+        pair = pairs[selected]
+        rank = np.arange(len(pair)) - np.searchsorted(pair, pair)
+        kept = rank < k
+        ps, pa = np.divmod(pair[kept], self.num_actions)
+        model.next_states[ps, pa, rank[kept]] = successors[kept]
+        model.probabilities[ps, pa, rank[kept]] = counts[kept] / self.visits()[ps, pa]
+        model.transition_rewards[ps, pa, rank[kept]] = self.reward_sums[selected[kept]] / counts[kept]
+
+        unvisited = visits == 0
+        su, au = s[unvisited], a[unvisited]
+        if fallback is not None:
+            fallback_k = fallback.next_states.shape[-1]
+            model.next_states[su, au, :fallback_k] = fallback.next_states[su, au]
+            model.probabilities[su, au, :fallback_k] = fallback.probabilities[su, au]
+            model.transition_rewards[su, au, :fallback_k] = fallback.rewards()[su, au]
+        else:
+            model.probabilities[su, au, 0] = 1.0
+
+        self.dirty[:] = False
+        self.__model = model
+        return TransitionModel(
+            model.next_states.copy(),
+            model.probabilities.copy(),
+            model.state_rewards.copy(),
+            model.action_penalties.copy(),
+            model.transition_rewards.copy(),
+        )
+
+    def __dense(self, values, fill=0.0):
+        """Espalha valores por célula observada num array (s, a, s') preenchido com 'fill'."""
+        dense = np.full(self.num_states * self.num_actions * self.num_states, fill, dtype=np.result_type(values, float))
+        dense[self.cells] = values
+        return dense.reshape(self.num_states, self.num_actions, self.num_states)
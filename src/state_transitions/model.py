@@ -0,0 +1,140 @@
+import hashlib
+
+import numpy as np
+
+
+class TransitionModel:
+    """Compiled transition/reward model: K successors per (state, action) pair, stored as arrays."""
+
+    def __init__(self, next_states, probabilities, state_rewards, action_penalties, transition_rewards=None):
+        """
+        Args:
+            next_states: Array (s, a, k) com os índices dos estados sucessores.
+            probabilities: Array (s, a, k) com a probabilidade de cada sucessor.
+            state_rewards: Array (s,) com a recompensa de chegar em cada estado.
+            action_penalties: Array (a,) com a penalidade de cada ação.
+            transition_rewards: Array (s, a, k) opcional com a recompensa de cada transição. Quando
+                fornecido (ex.: modelo estimado de dados), substitui state_rewards + action_penalties.
+        """
+        self.next_states = next_states
+        self.probabilities = probabilities
+        self.state_rewards = state_rewards
+        self.action_penalties = action_penalties
+        self.transition_rewards = transition_rewards
+
+    @classmethod
+    def from_env(cls, env):
+        """
+        Compila o modelo de um ambiente. Usa as tabelas de sucessores do APIEnv quando disponíveis
+        e, caso contrário, o dicionário env.transition_probabilities.
+        """
+        state_rewards = np.array([env.states_rewards.get(state, 0) for state in env.states], dtype=float)
+        action_penalties = np.array([env.action_rewards.get(action, 0) for action in env.actions], dtype=float)
+
+        if hasattr(env, "next_state_indices"):
+            return cls(
+                env.next_state_indices,
+                env.next_state_probabilities,
+                state_rewards,
+                action_penalties,
+                getattr(env, "transition_rewards", None),
+            )
+
+        index = {state: s for s, state in enumerate(env.states)}
+        transitions = [
+            [
+                env.transition_probabilities.get((state, action), [(state, 1.0)])
+                for action in env.actions
+            ]
+            for state in env.states
+        ]
+        k = max(len(successors) for row in transitions for successors in row)
+
+        # Pares com menos de k sucessores são completados com o próprio estado e probabilidade 0
+        shape = (len(env.states), len(env.actions), k)
+        next_states = np.broadcast_to(np.arange(shape[0])[:, None, None], shape).copy()
+        probabilities = np.zeros(shape)
+        for s, row in enumerate(transitions):
+            for a, successors in enumerate(row):
+                for i, (next_state, prob) in enumerate(successors):
+                    next_states[s, a, i] = index[next_state]
+                    probabilities[s, a, i] = prob
+
+        return cls(next_states, probabilities, state_rewards, action_penalties)
+
+    @property
+    def num_states(self):
+        return self.next_states.shape[0]
+
+    @property
+    def num_actions(self):
+        return self.next_states.shape[1]
+
+    def rewards(self, states=slice(None)):
+        """
+        Recompensa de cada transição (s, a, k): recompensa do estado de destino mais a penalidade da ação.
+
+        Args:
+            states: Índice ou array de estados para calcular apenas essas linhas (padrão: todos).
+        """
+        if self.transition_rewards is not None:
+            return self.transition_rewards[states]
+        return self.state_rewards[self.next_states[states]] + self.action_penalties[:, None]
+
+    def q_values(self, V, discount_factor):
+        """Valor esperado (s, a) de cada ação em cada estado, dada a função de valor V."""
+        return np.sum(
+            self.probabilities * (self.rewards() + discount_factor * V[self.next_states]), axis=-1
+        )
+
+    def value_iteration(self, discount_factor, theta):
+        """
+        Value iteration vetorizado sobre todos os estados, a partir de V = 0, até max |T V - V| < theta.
+
+        Returns:
+            V: A função de valor.
+            sweeps: Número de varreduras completas realizadas.
+        """
+        V = np.zeros(self.num_states)
+        sweeps = 0
+        while True:
+            V_new = self.q_values(V, discount_factor).max(axis=1)
+            sweeps += 1
+            if np.max(np.abs(V_new - V)) < theta:
+                return V_new, sweeps
+            V = V_new
+
+    def action_mask(self, terminal_states=()):
+        """Máscara (s, a) das ações válidas em cada estado (ver valid_action_mask)."""
+        return valid_action_mask(self.next_states, terminal_states)
+
+    def fingerprint(self):
+        """Hash SHA-256 do conteúdo do modelo (formas, dtypes e valores de todos os arrays)."""
+        digest = hashlib.sha256()
+        arrays = [self.next_states, self.probabilities, self.state_rewards, self.action_penalties]
+        if self.transition_rewards is not None:
+            arrays.append(self.transition_rewards)
+
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+
+def valid_action_mask(next_states, terminal_states=()):
+    """
+    Máscara (s, a) das ações válidas: uma ação é inválida (no-op) quando o seu sucessor
+    principal (k = 0) é o próprio estado, ex.: Increase_CPU com velocidade já Fast.
+
+    Estados terminais, e estados em que todas as ações seriam no-ops, mantêm todas as ações
+    válidas: nos solvers de horizonte infinito permanecer no objetivo é justamente o ótimo.
+
+    Args:
+        next_states: Array (s, a, k) com os índices dos sucessores, o principal em k = 0.
+        terminal_states: Índices dos estados terminais.
+    """
+    mask = next_states[..., 0] != np.arange(next_states.shape[0])[:, None]
+    mask[~mask.any(axis=1)] = True
+    mask[list(terminal_states)] = True
+    return mask
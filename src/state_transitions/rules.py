@@ -0,0 +1,284 @@
+import numpy as np
+
+# Níveis de cada componente do estado, na ordem usada para indexar os estados do APIEnv
+FEATURE_LEVELS = {
+    "availability": ["Offline", "Available"],
+    "speed": ["Slow", "Medium", "Fast"],
+    "health": ["Healthy", "Overloaded", "Error"],
+    "capacity": ["Low", "Medium", "High"],
+}
+
+# Regras de transição declarativas.
+#
+# Cada transição (principal e secundária) é uma lista de etapas aplicadas em sequência.
+# Em cada etapa, uma componente mapeia ação -> regra, onde a regra pode ser:
+#   "Nivel"                      -> a componente passa para o nível fixo;
+#   {"Nivel": "Proximo", ...}    -> mapeamento a partir do nível atual (ausente = mantém);
+#   ["Nivel1", "Nivel2"]         -> um dos níveis, sorteado por par estado-ação na geração do modelo;
+#   ("componente", {...})        -> mapeamento a partir do nível atual de outra componente.
+# Ações sem regra mantêm a componente inalterada. As condições de uma etapa sempre
+# olham o estado de entrada da etapa, nunca os valores já atualizados nela.
+_MAINTENANCE_ACTIONS = ["Corrective_Maintenance", "Preventive_Maintenance", "Restart_Components"]
+
+_AVAILABILITY_IF_HEALTHY = ("health", {"Healthy": "Available", "Overloaded": "Offline", "Error": "Offline"})
+_AVAILABILITY_IF_NOT_ERROR = ("health", {"Healthy": "Available", "Overloaded": "Available", "Error": "Offline"})
+
+DEFAULT_RULES = {
+    "main": [
+        {
+            "availability": {
+                "Decrease_CPU": _AVAILABILITY_IF_HEALTHY,
+                "Decrease_CPU_Slightly": _AVAILABILITY_IF_HEALTHY,
+                **{action: "Available" for action in _MAINTENANCE_ACTIONS},
+                "Update_Version": _AVAILABILITY_IF_NOT_ERROR,
+                "Rollback_Version": "Available",
+                "Add_Memory": "Available",
+                "Remove_Memory": _AVAILABILITY_IF_NOT_ERROR,
+            },
+            "speed": {
+                "Increase_CPU": {"Slow": "Fast", "Medium": "Fast"},
+                "Increase_CPU_Slightly": {"Slow": "Medium"},
+                "Decrease_CPU": {"Fast": "Medium", "Medium": "Slow"},
+                "Decrease_CPU_Slightly": {"Fast": "Medium"},
+                "Update_Version": "Medium",
+                "Rollback_Version": "Slow",
+                "Remove_Memory": "Slow",
+            },
+            "health": {
+                "Corrective_Maintenance": "Healthy",
+                "Preventive_Maintenance": {"Overloaded": "Healthy"},
+                "Restart_Components": "Healthy",
+                "Update_Version": ["Error", "Healthy"],
+                "Rollback_Version": "Healthy",
+                "Add_Memory": {"Overloaded": "Healthy", "Error": "Overloaded"},
+                "Remove_Memory": "Overloaded",
+            },
+            "capacity": {
+                "Decrease_CPU": {"High": "Medium", "Medium": "Low"},
+                "Decrease_CPU_Slightly": {"High": "Medium", "Medium": "Low"},
+                "Add_Memory": {"Low": "Medium", "Medium": "High", "High": "Medium"},
+                "Remove_Memory": {"Low": "Medium", "High": "Low"},
+                "Update_Version": "High",
+                "Rollback_Version": "Low",
+            },
+        },
+        # Ações de manutenção ajustam em conjunto a velocidade, capacidade e saúde resultantes
+        {
+            "speed": {
+                "Corrective_Maintenance": {"Slow": "Medium"},
+                "Preventive_Maintenance": {"Fast": "Medium"},
+                "Restart_Components": "Slow",
+            },
+            "capacity": {
+                "Preventive_Maintenance": {"High": "Medium"},
+                "Restart_Components": "Low",
+            },
+            "health": {
+                "Corrective_Maintenance": "Healthy",
+                "Restart_Components": "Healthy",
+            },
+        },
+    ],
+    "secondary": [
+        {
+            "availability": {
+                "Decrease_CPU": _AVAILABILITY_IF_HEALTHY,
+                "Decrease_CPU_Slightly": _AVAILABILITY_IF_HEALTHY,
+                **{action: "Offline" for action in _MAINTENANCE_ACTIONS},
+                "Update_Version": _AVAILABILITY_IF_NOT_ERROR,
+                "Rollback_Version": "Offline",
+                "Add_Memory": "Available",
+                "Remove_Memory": _AVAILABILITY_IF_NOT_ERROR,
+            },
+            "speed": {
+                "Increase_CPU": {"Medium": "Slow", "Fast": "Medium"},
+                "Increase_CPU_Slightly": {"Medium": "Slow"},
+                "Decrease_CPU": {"Slow": "Fast", "Fast": "Medium"},
+                "Decrease_CPU_Slightly": {"Slow": "Fast"},
+                "Update_Version": "Fast",
+                "Rollback_Version": "Medium",
+                "Add_Memory": "Slow",
+                "Remove_Memory": "Fast",
+            },
+            "health": {
+                "Corrective_Maintenance": {"Healthy": "Error", "Error": "Overloaded"},
+                "Preventive_Maintenance": {"Healthy": "Overloaded"},
+                "Restart_Components": "Error",
+                "Update_Version": ["Error", "Overloaded"],
+                "Rollback_Version": "Error",
+                "Add_Memory": "Healthy",
+                "Remove_Memory": "Error",
+            },
+            "capacity": {
+                "Decrease_CPU": {"Low": "High", "High": "Medium"},
+                "Decrease_CPU_Slightly": {"Low": "High", "High": "Medium"},
+                "Add_Memory": {"Low": "Medium", "High": "Low"},
+                "Remove_Memory": {"Low": "High", "High": "Medium"},
+                **{action: "Low" for action in _MAINTENANCE_ACTIONS},
+                "Update_Version": "Low",
+                "Rollback_Version": "Medium",
+            },
+        },
+        {
+            "speed": {
+                "Corrective_Maintenance": {"Medium": "Slow"},
+                "Preventive_Maintenance": {"Fast": "Slow"},
+                "Restart_Components": "Slow",
+            },
+            "capacity": {
+                "Corrective_Maintenance": {"Medium": "Low"},
+                "Preventive_Maintenance": {"High": "Low"},
+                "Restart_Components": "Low",
+            },
+            "health": {action: "Error" for action in _MAINTENANCE_ACTIONS},
+        },
+    ],
+    # Intervalo (mínimo, máximo) da probabilidade da transição principal por ação
+    "main_probability": {
+        "Increase_CPU": (0.8, 0.9),
+        "Decrease_CPU": (0.8, 0.9),
+        "Corrective_Maintenance": (0.7, 0.8),
+        "Preventive_Maintenance": (0.7, 0.8),
+        "Restart_Components": (0.9, 0.95),
+        "Add_Memory": (0.8, 0.85),
+        "Remove_Memory": (0.8, 0.85),
+    },
+    "default_main_probability": (0.7, 0.85),
+    "secondary_probability": (0.05, 0.2),
+}
+
+
+def compile_rules(rules, actions):
+    """
+    Compila as regras declarativas em tabelas NumPy indexadas por (ação, nível da condição, nível atual).
+
+    Args:
+        rules: Regras no formato de DEFAULT_RULES.
+        actions: Lista ordenada com os nomes das ações do ambiente.
+
+    Returns:
+        Um dicionário com as etapas compiladas das transições principal e secundária
+        e os intervalos de probabilidade por ação.
+    """
+    main_probability = [
+        rules["main_probability"].get(action, rules["default_main_probability"]) for action in actions
+    ]
+
+    return {
+        "num_actions": len(actions),
+        "main": [_compile_stage(stage, actions) for stage in rules["main"]],
+        "secondary": [_compile_stage(stage, actions) for stage in rules["secondary"]],
+        "main_probability": np.array(main_probability, dtype=float),
+        "secondary_probability": np.array(rules["secondary_probability"], dtype=float),
+    }
+
+
+def generate_successors(compiled_rules, rng):
+    """
+    Gera a tabela completa de sucessores e probabilidades para todos os pares estado-ação.
+
+    Args:
+        compiled_rules: Regras compiladas por compile_rules.
+        rng: numpy.random.Generator usado para sortear probabilidades e regras aleatórias.
+
+    Returns:
+        next_states: Array (s, a, 3) com os índices dos estados principal, secundário e o próprio estado.
+        probabilities: Array (s, a, 3) com as probabilidades de cada um desses sucessores.
+    """
+    dims = [len(levels) for levels in FEATURE_LEVELS.values()]
+    num_states = int(np.prod(dims))
+    shape = (num_states, compiled_rules["num_actions"])
+
+    components = {
+        feature: np.broadcast_to(levels[:, None], shape)
+        for feature, levels in zip(FEATURE_LEVELS, np.unravel_index(np.arange(num_states), dims))
+    }
+
+    main = components
+    for stage in compiled_rules["main"]:
+        main = _apply_stage(stage, main, rng)
+
+    secondary = components
+    for stage in compiled_rules["secondary"]:
+        secondary = _apply_stage(stage, secondary, rng)
+
+    next_states = np.stack(
+        [
+            np.ravel_multi_index([main[feature] for feature in FEATURE_LEVELS], dims),
+            np.ravel_multi_index([secondary[feature] for feature in FEATURE_LEVELS], dims),
+            np.broadcast_to(np.arange(num_states)[:, None], shape),
+        ],
+        axis=-1,
+    )
+
+    low, high = compiled_rules["main_probability"].T
+    main_prob = rng.uniform(low, high, size=shape)
+    secondary_prob = rng.uniform(*compiled_rules["secondary_probability"], size=shape)
+    secondary_prob = np.minimum(secondary_prob, 1 - main_prob)
+    remain_prob = np.maximum(1 - (main_prob + secondary_prob), 0)
+
+    probabilities = np.stack([main_prob, secondary_prob, remain_prob], axis=-1)
+
+    return next_states, probabilities
+
+
+def _compile_stage(stage, actions):
+    compiled = {}
+
+    for feature, action_rules in stage.items():
+        levels = FEATURE_LEVELS[feature]
+
+        conditions = {rule[0] for rule in action_rules.values() if isinstance(rule, tuple)}
+        if len(conditions) > 1:
+            raise ValueError(f"A componente '{feature}' só pode depender de uma outra componente por etapa.")
+        condition = conditions.pop() if conditions else None
+        condition_levels = FEATURE_LEVELS[condition] if condition else [None]
+
+        options = [
+            [
+                [_resolve_rule(action_rules.get(action), level, condition_level) for level in levels]
+                for condition_level in condition_levels
+            ]
+            for action in actions
+        ]
+
+        num_options = np.array([[[len(o) for o in row] for row in table] for table in options])
+        choices = np.zeros(num_options.shape + (num_options.max(),), dtype=np.int64)
+        for index in np.ndindex(num_options.shape):
+            a, c, l = index
+            choices[index][: num_options[index]] = [levels.index(o) for o in options[a][c][l]]
+
+        compiled[feature] = (condition, choices, num_options)
+
+    return compiled
+
+
+def _resolve_rule(rule, level, condition_level):
+    if rule is None:
+        result = level
+    elif isinstance(rule, tuple):
+        result = rule[1].get(condition_level, level)
+    elif isinstance(rule, dict):
+        result = rule.get(level, level)
+    else:
+        result = rule
+
+    return list(result) if isinstance(result, list) else [result]
+
+
+def _apply_stage(compiled_stage, components, rng):
+    action_index = np.arange(next(iter(components.values())).shape[1])[None, :]
+    updated = dict(components)
+
+    for feature, (condition, choices, num_options) in compiled_stage.items():
+        current = components[feature]
+        condition_level = components[condition] if condition else 0
+
+        option = 0
+        if num_options.max() > 1:
+            count = num_options[action_index, condition_level, current]
+            option = (rng.random(current.shape) * count).astype(np.int64)
+
+        updated[feature] = choices[action_index, condition_level, current, option]
+
+    return updated